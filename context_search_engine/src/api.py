@@ -19,6 +19,8 @@ from .models import (
 from .engine import ContextSearchEngine
 from .ollama_client import ollama_client
 from .huggingface_client import huggingface_client
+from .local_huggingface_client import local_huggingface_client
+from .http_pool import http_pool
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -48,12 +50,30 @@ async def startup_event():
     """Initialize the engine on startup."""
     logger.info("Starting Context Search Engine...")
     try:
+        # Open the long-lived client sessions on the shared connection pool
+        await http_pool.start()
+        await ollama_client.start()
+        await huggingface_client.start()
+        
         await engine.initialize()
         logger.info("Context Search Engine initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize engine: {e}")
         raise
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close the client sessions and the shared connection pool."""
+    logger.info("Shutting down Context Search Engine...")
+    try:
+        await ollama_client.close()
+        await huggingface_client.close()
+        await local_huggingface_client.close()
+        await http_pool.close()
+        engine.verdict_cache.close()
+    except Exception as e:
+        logger.error(f"Failed to close HTTP sessions: {e}")
+
 @app.get("/health")
 async def health_check() -> Dict[str, Any]:
     """Health check endpoint."""
@@ -25,7 +25,8 @@ class Config:
                 "host": "127.0.0.1",
                 "port": 8001,
                 "workers": 1,
-                "max_concurrent_requests": 10
+                "max_concurrent_requests": 10,
+                "backend_concurrency": {"ollama": 4, "huggingface": 2}
             },
             "ollama": {
                 "host": "http://localhost:11434",
@@ -61,6 +62,14 @@ class Config:
         return int(os.getenv("MAX_CONCURRENT_REQUESTS", 
                             self._config["server"]["max_concurrent_requests"]))
     
+    @property
+    def backend_concurrency(self) -> Dict[str, int]:
+        defaults = {"ollama": 4, "huggingface": 2}
+        limits = {**defaults, **self._config["server"].get("backend_concurrency", {})}
+        if os.getenv("OLLAMA_MAX_CONCURRENCY"):
+            limits["ollama"] = int(os.getenv("OLLAMA_MAX_CONCURRENCY"))
+        return {name: max(1, int(limit)) for name, limit in limits.items()}
+    
     # Ollama Configuration
     @property
     def ollama_host(self) -> str:
@@ -78,6 +87,19 @@ class Config:
     def ollama_max_retries(self) -> int:
         return int(os.getenv("OLLAMA_MAX_RETRIES", self._config["ollama"]["max_retries"]))
     
+    @property
+    def ollama_keep_alive(self) -> str:
+        return os.getenv("OLLAMA_KEEP_ALIVE", self._config["ollama"].get("keep_alive", "10m"))
+    
+    @property
+    def ollama_stream_verdicts(self) -> bool:
+        default = self._config["ollama"].get("stream_verdicts", True)
+        return os.getenv("OLLAMA_STREAM_VERDICTS", str(default)).lower() == "true"
+    
+    @property
+    def ollama_model_catalog_ttl(self) -> int:
+        return int(os.getenv("OLLAMA_MODEL_CATALOG_TTL", self._config["ollama"].get("model_catalog_ttl", 60)))
+    
     # Analysis Configuration
     @property
     def context_window_size(self) -> int:
@@ -93,6 +115,60 @@ class Config:
     def max_text_length(self) -> int:
         return self._config["analysis"]["max_text_length"]
     
+    @property
+    def prefix_reuse_enabled(self) -> bool:
+        default = self._config["analysis"].get("prefix_reuse", {}).get("enabled", True)
+        return os.getenv("PREFIX_REUSE", str(default)).lower() == "true"
+    
+    @property
+    def prefix_max_document_chars(self) -> int:
+        return int(self._config["analysis"].get("prefix_reuse", {}).get("max_document_chars", 4000))
+    
+    @property
+    def stop_sequences(self) -> List[str]:
+        return self._config["analysis"].get("stop_sequences", ["\n\n\n", "```"])
+    
+    @property
+    def dedup_enabled(self) -> bool:
+        default = self._config["analysis"].get("deduplication", {}).get("enabled", True)
+        return os.getenv("DEDUPLICATE_ENTITIES", str(default)).lower() == "true"
+    
+    @property
+    def dedup_min_context_similarity(self) -> float:
+        return float(self._config["analysis"].get("deduplication", {}).get("min_context_similarity", 0.5))
+    
+    @property
+    def dedup_flag_divergent(self) -> bool:
+        return bool(self._config["analysis"].get("deduplication", {}).get("flag_divergent", False))
+    
+    @property
+    def dedup_divergence_threshold(self) -> float:
+        return float(self._config["analysis"].get("deduplication", {}).get("divergence_threshold", 0.7))
+    
+    @property
+    def batch_analysis_enabled(self) -> bool:
+        default = self._config["analysis"].get("batching", {}).get("enabled", True)
+        return os.getenv("BATCH_ANALYSIS", str(default)).lower() == "true"
+    
+    @property
+    def batch_max_entities(self) -> int:
+        return int(self._config["analysis"].get("batching", {}).get("max_entities_per_prompt", 10))
+    
+    @property
+    def batch_max_gap(self) -> int:
+        return int(self._config["analysis"].get("batching", {}).get("max_gap", 100))
+    
+    @property
+    def escalation_enabled(self) -> bool:
+        default = self._config["analysis"].get("escalation", {}).get("enabled", True)
+        return os.getenv("TIERED_ESCALATION", str(default)).lower() == "true"
+    
+    @property
+    def escalation_validated_types(self) -> List[str]:
+        return self._config["analysis"].get("escalation", {}).get(
+            "validated_types", ["email", "phone", "ssn", "credit_card"]
+        )
+    
     # Language Configuration
     @property
     def supported_languages(self) -> List[str]:
@@ -177,6 +253,11 @@ class Config:
         return int(os.getenv("REQUEST_TIMEOUT", 
                             self._config.get("performance", {}).get("request_timeout", 30)))
     
+    @property
+    def connection_pool_size(self) -> int:
+        return int(os.getenv("CONNECTION_POOL_SIZE", 
+                            self._config.get("performance", {}).get("connection_pool_size", 20)))
+    
     @property
     def cache_enabled(self) -> bool:
         return os.getenv("ENABLE_CACHING", "true").lower() == "true"
@@ -186,6 +267,19 @@ class Config:
         return int(os.getenv("CACHE_TTL", 
                             self._config.get("performance", {}).get("cache_ttl", 300)))
     
+    @property
+    def cache_max_entries(self) -> int:
+        return int(self._config.get("performance", {}).get("cache_max_entries", 10000))
+    
+    @property
+    def cache_disk_path(self) -> Optional[str]:
+        return os.getenv("CACHE_DISK_PATH", self._config.get("performance", {}).get("cache_disk_path")) or None
+    
+    @property
+    def local_model_batch_size(self) -> int:
+        return int(os.getenv("LOCAL_MODEL_BATCH_SIZE",
+                            self._config.get("performance", {}).get("local_model_batch_size", 32)))
+    
     # Monitoring Settings
     @property
     def enable_metrics(self) -> bool:
@@ -220,6 +314,16 @@ class Config:
         """Get configuration for a specific analysis mode."""
         return self.analysis_modes.get(mode, self.analysis_modes.get("standard", {}))
     
+    def get_escalation_policy(self, mode: str) -> Dict[str, Any]:
+        """Get the tier thresholds for an analysis mode; a None threshold disables the tier."""
+        policy = {
+            "pattern_min_probability": 0.85,
+            "use_heuristics": False,
+            "local_min_confidence": 0.85
+        }
+        policy.update(self.get_analysis_mode_config(mode).get("escalation", {}))
+        return policy
+    
     def get_risk_level_for_pii_type(self, pii_type: str) -> str:
         """Determine risk level for a PII type."""
         if pii_type in self.high_risk_pii:
@@ -1,9 +1,10 @@
 import asyncio
 import logging
 import json
+import re
 import uuid
 import time
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set, Tuple, Awaitable
 from datetime import datetime
 
 from .config import config
@@ -21,17 +22,28 @@ from .models import (
     PIIType,
     ConfidenceLevel
 )
-from .ollama_client import ollama_client
+from .ollama_client import ollama_client, generation_log, prefix_warming
 from .huggingface_client import huggingface_client
 from .local_huggingface_client import local_huggingface_client
+from .http_pool import http_pool
+from .verdict_cache import VerdictCache
+from .pattern_validators import validate_entity_text
 from .prompt_manager import PromptManager
 
 logger = logging.getLogger(__name__)
 
+# Tiers an entity can be resolved by, cheapest first
+ESCALATION_TIERS = ("pattern", "heuristic", "local_model", "ollama")
+
+# Confidence given to a context heuristic verdict
+HEURISTIC_CONFIDENCE = 0.7
+
 class ContextSearchEngine:
     def __init__(self):
         self.prompt_manager = PromptManager()
         self.is_initialized = False
+        self.ollama_available = False
+        self.huggingface_available = False
         self.debug_info = {
             "last_request_prompts": [],
             "last_request_responses": [],
@@ -43,9 +55,30 @@ class ContextSearchEngine:
             "successful_requests": 0,
             "failed_requests": 0,
             "false_positives_filtered": 0,
+            "duplicate_entities_skipped": 0,
+            "ollama_prompts": 0,
+            "batched_prompts": 0,
+            "prompt_eval_ms_saved": 0.0,
             "average_latency": 0.0,
             "start_time": time.time()
         }
+        
+        # Entities resolved per analysis mode and tier
+        self.tier_stats: Dict[str, Dict[str, int]] = {}
+        
+        # Entity analyses run concurrently; these bound the fan-out across all requests
+        self.entity_semaphore = asyncio.Semaphore(config.max_concurrent_requests)
+        self.backend_semaphores = {
+            backend: asyncio.Semaphore(limit)
+            for backend, limit in config.backend_concurrency.items()
+        }
+        
+        self.verdict_cache = VerdictCache(
+            enabled=config.cache_enabled,
+            ttl=config.cache_ttl,
+            max_entries=config.cache_max_entries,
+            disk_path=config.cache_disk_path
+        )
     
     async def initialize(self):
         """Initialize the context search engine."""
@@ -83,9 +116,9 @@ class ContextSearchEngine:
             # Check HuggingFace connectivity (try local first, then API)
             huggingface_available = False
             try:
-                # Try local HuggingFace client first
+                # Load the local model once; inference then runs on its own thread
                 async with local_huggingface_client as local_hf_client:
-                    if await local_hf_client.health_check():
+                    if await local_hf_client.start():
                         huggingface_available = True
                         logger.info("Local HuggingFace model ready")
                     else:
@@ -151,25 +184,67 @@ class ContextSearchEngine:
             
             refined_entities = []
             
-            # Process each detected entity
-            for entity in request.previous_detections:
-                try:
-                    refined_entity = await self._analyze_entity(
-                        request.text, 
-                        entity, 
-                        request.analysis_mode,
-                        request.confidence_threshold
-                    )
-                    
-                    if refined_entity.is_validated:
-                        refined_entities.append(refined_entity)
-                    else:
-                        self.stats["false_positives_filtered"] += 1
-                        
-                except Exception as e:
-                    logger.error(f"Failed to analyze entity {entity.id}: {e}")
+            # Collect the timings of every Ollama generation made for this request
+            generation_timings: List[Dict[str, Any]] = []
+            log_token = generation_log.set(generation_timings)
+            
+            # Repeated detections are analyzed once through a representative
+            duplicates = self._find_duplicates(request.text, request.previous_detections)
+            representatives = [entity for entity in request.previous_detections if entity.id not in duplicates]
+            self.stats["duplicate_entities_skipped"] += len(duplicates)
+            
+            # Decisive cheap tiers first; only ambiguous entities are escalated to Ollama
+            resolved, local_verdicts, tiers = await self._resolve_without_ollama(
+                request.text,
+                representatives,
+                request.analysis_mode,
+                request.confidence_threshold
+            )
+            escalated = [entity for entity in representatives if entity.id not in resolved]
+            
+            # Analyze the escalated entities concurrently; results come back in input order
+            if self._use_batched_analysis(escalated):
+                results = await self._analyze_entities_batched(
+                    request.text,
+                    escalated,
+                    request.analysis_mode,
+                    request.confidence_threshold,
+                    local_verdicts
+                )
+            else:
+                results = await self._gather_prefix_first(
+                    [
+                        self._analyze_entity_limited(
+                            request.text,
+                            entity,
+                            request.analysis_mode,
+                            request.confidence_threshold,
+                            huggingface_result=local_verdicts.get(entity.id)
+                        )
+                        for entity in escalated
+                    ],
+                    self._use_document_prefix(request.text)
+                )
+            generation_log.reset(log_token)
+            
+            results = self._expand_duplicate_results(
+                request.text,
+                request.previous_detections,
+                {**dict(zip((entity.id for entity in escalated), results)), **resolved},
+                duplicates,
+                request.confidence_threshold
+            )
+            
+            for entity, result in zip(request.previous_detections, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Failed to analyze entity {entity.id}: {result}")
                     # Continue with other entities
                     continue
+                
+                if result.is_validated:
+                    refined_entities.append(result)
+                else:
+                    self.stats["false_positives_filtered"] += 1
             
             processing_time = time.time() - start_time
             self._update_stats(processing_time, success=True)
@@ -189,6 +264,9 @@ class ContextSearchEngine:
                 analysis_metadata={
                     "entities_analyzed": len(request.previous_detections),
                     "entities_validated": len(refined_entities),
+                    "entities_deduplicated": len(duplicates),
+                    "resolution_tiers": tiers,
+                    "prefix_reuse": self._prefix_reuse_metrics(request.text, generation_timings),
                     "false_positives_filtered": len(request.previous_detections) - len(refined_entities),
                     "average_confidence": self._calculate_average_confidence(refined_entities)
                 }
@@ -267,8 +345,487 @@ class ContextSearchEngine:
             logger.error(f"False positive check failed: {e}")
             raise
     
-    async def _analyze_entity(self, text: str, entity: DetectedEntity, mode: AnalysisMode, threshold: float) -> RefinedEntity:
-        """Analyze a single entity with context."""
+    @staticmethod
+    def _context_words(context: str, entity_text: str) -> Set[str]:
+        # Digit runs (timestamps, counters, ids) are collapsed so log lines compare alike
+        def words(value: str) -> Set[str]:
+            return set(re.findall(r"\w+", re.sub(r"\d+", "0", value.lower())))
+        return words(context) - words(entity_text)
+    
+    @staticmethod
+    def _context_similarity(words: Set[str], other: Set[str]) -> float:
+        if not words and not other:
+            return 1.0
+        return len(words & other) / len(words | other)
+    
+    def _find_duplicates(self, text: str, entities: List[DetectedEntity]) -> Dict[str, Tuple[str, float]]:
+        """Map each duplicate entity id to (representative id, context similarity).
+        
+        Entities with the same text, type and language are duplicates of the first
+        such entity whose context words overlap at least min_context_similarity.
+        """
+        if not config.dedup_enabled:
+            return {}
+        
+        representatives: Dict[Tuple[str, str, str], List[Tuple[str, Set[str]]]] = {}
+        duplicates: Dict[str, Tuple[str, float]] = {}
+        
+        for entity in entities:
+            context = self._extract_context(text, entity.position.start, entity.position.end, config.context_window_size)
+            words = self._context_words(context, entity.text)
+            candidates = representatives.setdefault((entity.text, entity.type.value, entity.language), [])
+            
+            best_id, best_similarity = None, -1.0
+            for representative_id, representative_words in candidates:
+                similarity = self._context_similarity(words, representative_words)
+                if similarity > best_similarity:
+                    best_id, best_similarity = representative_id, similarity
+            
+            if best_id is not None and best_similarity >= config.dedup_min_context_similarity:
+                duplicates[entity.id] = (best_id, best_similarity)
+            else:
+                candidates.append((entity.id, words))
+        
+        return duplicates
+    
+    def _expand_duplicate_results(self, text: str, entities: List[DetectedEntity], results: Dict[str, Any],
+                                  duplicates: Dict[str, Tuple[str, float]], threshold: float) -> List[Any]:
+        """Return results for all entities in input order, copying verdicts to duplicates."""
+        expanded = []
+        for entity in entities:
+            if entity.id not in duplicates:
+                expanded.append(results[entity.id])
+                continue
+            
+            representative_id, similarity = duplicates[entity.id]
+            representative = results[representative_id]
+            if isinstance(representative, Exception):
+                expanded.append(representative)
+                continue
+            
+            context = self._extract_context(text, entity.position.start, entity.position.end, config.context_window_size)
+            refined = self._refine_entity(entity, context, representative.analysis_result, threshold)
+            refined.sources.append("deduplicated")
+            refined.representative_id = representative_id
+            refined.context_divergent = config.dedup_flag_divergent and similarity < config.dedup_divergence_threshold
+            expanded.append(refined)
+        
+        return expanded
+    
+    async def _resolve_without_ollama(self, text: str, entities: List[DetectedEntity], mode: AnalysisMode,
+                                      threshold: float) -> Tuple[Dict[str, RefinedEntity], Dict[str, Dict[str, Any]], Dict[str, int]]:
+        """Resolve entities through the tiers that need no Ollama call.
+        
+        Returns the refined entities decided by a cheap tier, the local classifier
+        verdicts of the entities left for the models, and how many entities each tier took.
+        With the local model loaded, its verdicts for all remaining entities come from
+        one batched call even when escalation is off or Ollama is unavailable.
+        """
+        resolved: Dict[str, RefinedEntity] = {}
+        local_verdicts: Dict[str, Dict[str, Any]] = {}
+        tiers = dict.fromkeys(ESCALATION_TIERS, 0)
+        
+        # Without Ollama there is nothing to escalate to; the models run as before
+        tiering = config.escalation_enabled and self.ollama_available
+        policy = config.get_escalation_policy(mode.value)
+        pending = []
+        for entity in entities:
+            context = self._extract_context(text, entity.position.start, entity.position.end, config.context_window_size)
+            decision = self._cheap_tier_verdict(entity, context, policy) if tiering else None
+            if decision is None:
+                pending.append((entity, context))
+                continue
+            
+            tier, verdict = decision
+            resolved[entity.id] = self._refine_entity(entity, context, self._tier_analysis_result(verdict), threshold)
+            tiers[tier] += 1
+        
+        min_confidence = policy.get("local_min_confidence") if tiering else None
+        if pending and self.huggingface_available and (min_confidence is not None or local_huggingface_client.is_loaded):
+            verdicts = await self._classify_locally(text, pending, mode)
+            remaining = []
+            for entity, context in pending:
+                verdict = verdicts.get(entity.id)
+                if verdict is None:
+                    remaining.append((entity, context))
+                elif min_confidence is not None and self._local_verdict_is_decisive(verdict, min_confidence):
+                    resolved[entity.id] = self._refine_entity(entity, context, self._tier_analysis_result(verdict), threshold)
+                    tiers["local_model"] += 1
+                else:
+                    local_verdicts[entity.id] = verdict
+                    remaining.append((entity, context))
+            pending = remaining
+        
+        if not (tiering and entities):
+            return resolved, local_verdicts, tiers
+        
+        tiers["ollama"] += len(pending)
+        
+        mode_stats = self.tier_stats.setdefault(mode.value, dict.fromkeys(ESCALATION_TIERS, 0))
+        for tier, count in tiers.items():
+            mode_stats[tier] += count
+        return resolved, local_verdicts, tiers
+    
+    @staticmethod
+    def _local_verdict_is_decisive(verdict: Dict[str, Any], min_confidence: float) -> bool:
+        """Whether a local classifier verdict may stand in for Ollama.
+        
+        The local confidence is a PII likelihood that the context heuristics set to
+        0.7 or 0.3 and the sentiment of the prompt moves up or down. A verdict decides
+        only when an indicator matched and the likelihood clears min_confidence in
+        the verdict's direction.
+        """
+        if "error" in verdict or not verdict.get("indicator_matched"):
+            return False
+        confidence = verdict.get("confidence", 0.0)
+        certainty = confidence if verdict.get("is_genuine_pii") else 1.0 - confidence
+        return certainty >= min_confidence
+    
+    def _cheap_tier_verdict(self, entity: DetectedEntity, context: str,
+                            policy: Dict[str, Any]) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Decide an entity from its format or its context alone; returns (tier, verdict) or None."""
+        min_probability = policy.get("pattern_min_probability")
+        if (min_probability is not None and entity.type.value in config.escalation_validated_types
+                and entity.probability >= min_probability):
+            decision = validate_entity_text(entity.type.value, entity.text)
+            if decision is not None:
+                is_genuine, reason = decision
+                return "pattern", {
+                    "is_genuine_pii": is_genuine,
+                    "confidence": max(entity.probability, 0.9) if is_genuine else 0.9,
+                    "reason": f"Pattern validation: {reason}",
+                    "risk_level": config.get_risk_level_for_pii_type(entity.type.value) if is_genuine else "minimal"
+                }
+        
+        # Validated types are left to their validators and the models; other entities
+        # are only decided here when an indicator actually matches
+        if policy.get("use_heuristics") and entity.type.value not in config.escalation_validated_types:
+            is_genuine = local_huggingface_client._heuristic_indicator_verdict(entity.text, context)
+            if is_genuine is None:
+                return None
+            return "heuristic", {
+                "is_genuine_pii": is_genuine,
+                "confidence": HEURISTIC_CONFIDENCE,
+                "reason": "Context heuristics: " + ("PII indicators" if is_genuine else "false positive indicators"),
+                "risk_level": config.get_risk_level_for_pii_type(entity.type.value) if is_genuine else "minimal"
+            }
+        
+        return None
+    
+    async def _classify_locally(self, text: str, pending: List[Tuple[DetectedEntity, str]],
+                                mode: AnalysisMode) -> Dict[str, Dict[str, Any]]:
+        """Get classifier verdicts by entity id; uncached entities share one local batch.
+        
+        Without the local model, entities are classified one by one through the API;
+        entities whose classification failed are left out.
+        """
+        verdicts: Dict[str, Dict[str, Any]] = {}
+        uncached = []
+        for entity, context in pending:
+            cached = self.verdict_cache.get(self._huggingface_cache_key(entity, context))
+            if cached is not None:
+                self._record_cached_response(entity, "huggingface", cached)
+                verdicts[entity.id] = cached
+            else:
+                uncached.append((entity, context))
+        
+        if not uncached:
+            return verdicts
+        
+        if local_huggingface_client.is_loaded:
+            async with self.backend_semaphores["huggingface"]:
+                responses = await local_huggingface_client.classify_entities([
+                    {"entity_text": entity.text, "entity_type": entity.type.value, "context": context}
+                    for entity, context in uncached
+                ])
+            for (entity, context), response in zip(uncached, responses):
+                verdicts[entity.id] = self._store_huggingface_response(entity, context, response)
+            return verdicts
+        
+        async def classify(entity: DetectedEntity, context: str) -> Dict[str, Any]:
+            async with self.entity_semaphore:
+                return await self._analyze_with_huggingface(text, entity, context, mode)
+        
+        results = await asyncio.gather(*(classify(entity, context) for entity, context in uncached), return_exceptions=True)
+        for (entity, _), result in zip(uncached, results):
+            if isinstance(result, Exception):
+                logger.warning(f"HuggingFace analysis of {entity.id} failed: {result}")
+                continue
+            verdicts[entity.id] = result
+        return verdicts
+    
+    @staticmethod
+    def _tier_analysis_result(verdict: Dict[str, Any]) -> ContextAnalysisResult:
+        """Build the analysis result for a verdict taken from a single tier."""
+        try:
+            risk_level = RiskLevel(verdict.get("risk_level", "medium"))
+        except ValueError:
+            risk_level = RiskLevel.LOW
+        
+        return ContextAnalysisResult(
+            is_genuine_pii=verdict.get("is_genuine_pii", True),
+            confidence=verdict.get("confidence", 0.5),
+            reason=verdict.get("reason", "No reason provided"),
+            risk_level=risk_level,
+            false_positive_indicators=verdict.get("false_positive_indicators", [])
+        )
+    
+    def _escalation_stats(self) -> Dict[str, Any]:
+        """Share of entities each tier resolved and the Ollama latency the cheap tiers saved."""
+        generation = ollama_client.get_generation_stats()
+        resolved = dict.fromkeys(ESCALATION_TIERS, 0)
+        latency_saved = 0.0
+        for mode, counts in self.tier_stats.items():
+            for tier, count in counts.items():
+                resolved[tier] += count
+            # Estimate: one single-entity Ollama prompt in this mode per entity resolved without one
+            avoided = sum(counts.values()) - counts["ollama"]
+            latency_saved += avoided * generation.get(mode, {}).get("avg_latency_ms", 0.0)
+        
+        total = sum(resolved.values())
+        return {
+            "enabled": config.escalation_enabled,
+            "resolved": resolved,
+            "shares": {tier: count / total if total else 0.0 for tier, count in resolved.items()},
+            "by_mode": self.tier_stats,
+            "estimated_latency_saved_ms": latency_saved
+        }
+    
+    def _use_document_prefix(self, text: str) -> bool:
+        """Whether Ollama prompts for this text start with the whole document as a shared prefix."""
+        return config.prefix_reuse_enabled and self.ollama_available and len(text) <= config.prefix_max_document_chars
+    
+    async def _gather_prefix_first(self, coroutines: List[Awaitable], prefix_shared: bool) -> List[Any]:
+        """Gather coroutines; with a shared prefix the first runs alone so the rest find it cached."""
+        if not prefix_shared or len(coroutines) < 2:
+            return await asyncio.gather(*coroutines, return_exceptions=True)
+        
+        # Generations of the first coroutine are tagged as the ones that warm the prefix
+        token = prefix_warming.set(True)
+        try:
+            first = await asyncio.gather(coroutines[0], return_exceptions=True)
+        finally:
+            prefix_warming.reset(token)
+        return first + await asyncio.gather(*coroutines[1:], return_exceptions=True)
+    
+    def _prefix_reuse_metrics(self, text: str, timings: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Prompt-eval time saved on follow-up calls, measured against the call that warmed the prefix.
+        
+        Ollama's prompt_eval_duration is compared when the warming call and a follow-up
+        both report it. Streamed verdicts stop before Ollama sends it, so those calls are
+        compared by time to first token instead, which also counts queueing behind
+        concurrent follow-ups and so understates the saving. Without a measured warming
+        call and follow-up no saving is reported.
+        """
+        enabled = self._use_document_prefix(text)
+        metrics = {"enabled": enabled, "ollama_calls": len(timings)}
+        if not enabled:
+            return metrics
+        
+        for measure in ("prompt_eval_ms", "time_to_first_token_ms"):
+            measured = [timing for timing in timings if timing.get(measure) is not None]
+            cold = [timing[measure] for timing in measured if timing.get("prefix_warming")]
+            warm = [timing[measure] for timing in measured if not timing.get("prefix_warming")]
+            if cold and warm:
+                break
+        else:
+            return metrics
+        
+        saved = sum(max(0.0, cold[0] - prefill_ms) for prefill_ms in warm)
+        self.stats["prompt_eval_ms_saved"] += saved
+        return {
+            **metrics,
+            "measured_by": measure,
+            "measured_calls": len(measured),
+            "cold_prompt_eval_ms": cold[0],
+            "total_prompt_eval_ms": sum(cold) + sum(warm),
+            "prompt_eval_ms_saved": saved
+        }
+    
+    def _use_batched_analysis(self, entities: List[DetectedEntity]) -> bool:
+        return config.batch_analysis_enabled and self.ollama_available and len(entities) > 1
+    
+    def _group_entities(self, entities: List[DetectedEntity]) -> List[List[DetectedEntity]]:
+        """Group same-language entities whose context windows overlap or lie close together."""
+        window = config.context_window_size
+        groups: List[List[DetectedEntity]] = []
+        group_end = 0
+        
+        for entity in sorted(entities, key=lambda e: (e.language, e.position.start)):
+            gap = (entity.position.start - window) - group_end
+            if (groups and groups[-1][-1].language == entity.language and
+                    len(groups[-1]) < config.batch_max_entities and gap <= config.batch_max_gap):
+                groups[-1].append(entity)
+                group_end = max(group_end, entity.position.end + window)
+            else:
+                groups.append([entity])
+                group_end = entity.position.end + window
+        
+        return groups
+    
+    async def _analyze_entities_batched(self, text: str, entities: List[DetectedEntity], mode: AnalysisMode, threshold: float,
+                                        huggingface_results: Optional[Dict[str, Dict[str, Any]]] = None) -> List[Any]:
+        """Analyze entities with one Ollama prompt per group of nearby entities.
+        
+        Entities without a usable verdict from their group prompt (single-entity groups,
+        failed prompts, missing or malformed array items) fall back to a prompt of their own.
+        huggingface_results holds classifier verdicts already computed per entity id.
+        """
+        huggingface_results = huggingface_results or {}
+        # Entities with a cached Ollama verdict are left out of the group prompts
+        verdicts: Dict[str, Dict[str, Any]] = {}
+        uncached = []
+        for entity in entities:
+            context = self._extract_context(text, entity.position.start, entity.position.end, config.context_window_size)
+            cached = self.verdict_cache.get(self._ollama_cache_key(entity, context, mode))
+            if cached is not None:
+                verdicts[entity.id] = cached
+            else:
+                uncached.append(entity)
+        
+        groups = [group for group in self._group_entities(uncached) if len(group) > 1]
+        group_results = await self._gather_prefix_first(
+            [self._analyze_group_with_ollama(text, group, mode) for group in groups],
+            self._use_document_prefix(text)
+        )
+        
+        for group, result in zip(groups, group_results):
+            if isinstance(result, Exception):
+                logger.warning(f"Batched analysis of {len(group)} entities failed, analyzing them individually: {result}")
+                continue
+            verdicts.update(result)
+        
+        return await self._gather_prefix_first(
+            [
+                self._analyze_entity_limited(text, entity, mode, threshold, ollama_result=verdicts.get(entity.id),
+                                             huggingface_result=huggingface_results.get(entity.id))
+                for entity in entities
+            ],
+            self._use_document_prefix(text) and not groups
+        )
+    
+    async def _analyze_group_with_ollama(self, text: str, group: List[DetectedEntity], mode: AnalysisMode) -> Dict[str, Dict[str, Any]]:
+        """Analyze a group of entities with a single prompt, returning verdicts by entity id."""
+        model = config.get_model_for_language(group[0].language)
+        context = self._extract_context(
+            text,
+            group[0].position.start,
+            max(entity.position.end for entity in group),
+            config.context_window_size
+        )
+        listing = [
+            {"text": entity.text, "type": entity.type.value, "language": entity.language}
+            for entity in group
+        ]
+        if self._use_document_prefix(text):
+            prompt = self.prompt_manager.get_document_prefix(text) + self.prompt_manager.get_batch_question(listing)
+        else:
+            prompt = self.prompt_manager.get_batch_analysis_prompt(text=context, entities=listing)
+        
+        # Store prompt for debugging
+        self.debug_info["last_request_prompts"].append({
+            "entity_id": ",".join(entity.id for entity in group),
+            "entity_text": ", ".join(entity.text for entity in group),
+            "entity_type": ",".join(entity.type.value for entity in group),
+            "prompt": prompt,
+            "model": model,
+            "context": context,
+            "engine": "ollama"
+        })
+        
+        async with self.backend_semaphores["ollama"], ollama_client as client:
+            response = await client.analyze_json_list(
+                text=context,
+                prompt_template=prompt,
+                model=model,
+                options=self._ollama_options(mode, verdicts=len(group)),
+                stats_label=f"{mode.value}:batched",
+                keep_alive=config.ollama_keep_alive
+            )
+        self.stats["ollama_prompts"] += 1
+        self.stats["batched_prompts"] += 1
+        
+        # Store response for debugging
+        self.debug_info["last_request_responses"].append({
+            "entity_id": ",".join(entity.id for entity in group),
+            "entity_text": ", ".join(entity.text for entity in group),
+            "engine": "ollama",
+            "response": response
+        })
+        
+        verdicts = self._map_group_verdicts(group, response)
+        for entity in group:
+            if entity.id in verdicts:
+                context = self._extract_context(text, entity.position.start, entity.position.end, config.context_window_size)
+                self.verdict_cache.put(self._ollama_cache_key(entity, context, mode), verdicts[entity.id])
+        return verdicts
+    
+    def _map_group_verdicts(self, group: List[DetectedEntity], verdicts: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Map array verdicts back to entities by their 1-based number, or by position."""
+        numbered = all(isinstance(verdict.get("entity"), int) for verdict in verdicts)
+        if not numbered and len(verdicts) != len(group):
+            # Positions cannot be trusted when items are missing or extra
+            return {}
+        
+        mapped = {}
+        for position, verdict in enumerate(verdicts):
+            index = verdict["entity"] - 1 if numbered else position
+            if not 0 <= index < len(group) or "is_genuine_pii" not in verdict:
+                continue
+            mapped[group[index].id] = {**verdict, "model_source": "ollama", "batched": True}
+        return mapped
+    
+    def _ollama_options(self, mode: AnalysisMode, verdicts: int = 1) -> Dict[str, Any]:
+        """Ollama generation options for an analysis mode's token budget and temperature."""
+        mode_config = config.get_analysis_mode_config(mode.value)
+        return {
+            "num_predict": int(mode_config.get("max_tokens", 200)) * verdicts,
+            "temperature": float(mode_config.get("temperature", 0.1)),
+            "stop": config.stop_sequences
+        }
+    
+    def _ollama_cache_key(self, entity: DetectedEntity, context: str, mode: AnalysisMode) -> str:
+        return VerdictCache.make_key(
+            backend="ollama",
+            model=config.get_model_for_language(entity.language),
+            prompt_version=self.prompt_manager.version,
+            entity_text=entity.text,
+            entity_type=entity.type.value,
+            context=context,
+            language=entity.language,
+            mode=mode.value
+        )
+    
+    def _huggingface_cache_key(self, entity: DetectedEntity, context: str) -> str:
+        return VerdictCache.make_key(
+            backend="huggingface",
+            model=f"{local_huggingface_client.fallback_model_name}|{huggingface_client.model_name}",
+            prompt_version=self.prompt_manager.version,
+            entity_text=entity.text,
+            entity_type=entity.type.value,
+            context=context
+        )
+    
+    def _record_cached_response(self, entity: DetectedEntity, engine: str, response: Dict[str, Any]):
+        self.debug_info["last_request_responses"].append({
+            "entity_id": entity.id,
+            "entity_text": entity.text,
+            "engine": engine,
+            "response": response,
+            "cached": True
+        })
+    
+    async def _analyze_entity_limited(self, text: str, entity: DetectedEntity, mode: AnalysisMode, threshold: float,
+                                      ollama_result: Optional[Dict[str, Any]] = None,
+                                      huggingface_result: Optional[Dict[str, Any]] = None) -> RefinedEntity:
+        """Analyze a single entity once a slot in the engine-wide limit is free."""
+        async with self.entity_semaphore:
+            return await self._analyze_entity(text, entity, mode, threshold, ollama_result, huggingface_result)
+    
+    async def _analyze_entity(self, text: str, entity: DetectedEntity, mode: AnalysisMode, threshold: float,
+                              ollama_result: Optional[Dict[str, Any]] = None,
+                              huggingface_result: Optional[Dict[str, Any]] = None) -> RefinedEntity:
+        """Analyze a single entity with context, reusing verdicts already computed for it if given."""
         try:
             # Extract context around the entity
             context = self._extract_context(
@@ -279,56 +836,61 @@ class ContextSearchEngine:
             )
             
             # Perform context analysis
-            analysis_result = await self._perform_context_analysis(text, entity, context, mode)
-            
-            # Calculate refined probability
-            refined_probability = self._calculate_refined_probability(
-                entity.probability, 
-                analysis_result.confidence,
-                analysis_result.is_genuine_pii
+            analysis_result = await self._perform_context_analysis(
+                text, entity, context, mode, ollama_result, huggingface_result
             )
             
-            # Determine if entity should be validated
-            is_validated = (
-                analysis_result.is_genuine_pii and 
-                refined_probability >= threshold and
-                analysis_result.confidence >= 0.4
-            )
-            
-            return RefinedEntity(
-                id=entity.id,
-                text=entity.text,
-                type=entity.type,
-                language=entity.language,
-                position=entity.position,
-                original_probability=entity.probability,
-                refined_probability=refined_probability,
-                confidence_level=self._get_confidence_level(refined_probability),
-                sources=entity.sources + ["context_analysis"],
-                context=context,
-                analysis_result=analysis_result,
-                is_validated=is_validated
-            )
+            return self._refine_entity(entity, context, analysis_result, threshold)
             
         except Exception as e:
             logger.error(f"Entity analysis failed for {entity.id}: {e}")
             raise
     
-    async def _perform_context_analysis(self, text: str, entity: DetectedEntity, context: str, mode: AnalysisMode) -> ContextAnalysisResult:
-        """Perform deep context analysis using both Ollama and HuggingFace models."""
-        ollama_result = None
-        huggingface_result = None
+    def _refine_entity(self, entity: DetectedEntity, context: str, analysis_result: ContextAnalysisResult, threshold: float) -> RefinedEntity:
+        """Build the refined entity for an analysis result."""
+        # Calculate refined probability
+        refined_probability = self._calculate_refined_probability(
+            entity.probability, 
+            analysis_result.confidence,
+            analysis_result.is_genuine_pii
+        )
+        
+        # Determine if entity should be validated
+        is_validated = (
+            analysis_result.is_genuine_pii and 
+            refined_probability >= threshold and
+            analysis_result.confidence >= 0.4
+        )
         
+        return RefinedEntity(
+            id=entity.id,
+            text=entity.text,
+            type=entity.type,
+            language=entity.language,
+            position=entity.position,
+            original_probability=entity.probability,
+            refined_probability=refined_probability,
+            confidence_level=self._get_confidence_level(refined_probability),
+            sources=entity.sources + ["context_analysis"],
+            context=context,
+            analysis_result=analysis_result,
+            is_validated=is_validated
+        )
+    
+    async def _perform_context_analysis(self, text: str, entity: DetectedEntity, context: str, mode: AnalysisMode,
+                                        ollama_result: Optional[Dict[str, Any]] = None,
+                                        huggingface_result: Optional[Dict[str, Any]] = None) -> ContextAnalysisResult:
+        """Perform deep context analysis using both Ollama and HuggingFace models."""
         # Run both models in parallel if available
-        tasks = []
+        tasks = {}
         
-        if self.ollama_available:
-            tasks.append(self._analyze_with_ollama(text, entity, context, mode))
+        if self.ollama_available and ollama_result is None:
+            tasks["ollama"] = self._analyze_with_ollama(text, entity, context, mode)
         
-        if self.huggingface_available:
-            tasks.append(self._analyze_with_huggingface(text, entity, context, mode))
+        if self.huggingface_available and huggingface_result is None:
+            tasks["huggingface"] = self._analyze_with_huggingface(text, entity, context, mode)
         
-        if not tasks:
+        if not tasks and ollama_result is None and huggingface_result is None:
             # Fallback if no models are available
             return ContextAnalysisResult(
                 is_genuine_pii=True,  # Conservative default
@@ -339,17 +901,17 @@ class ContextSearchEngine:
         
         try:
             # Run analyses in parallel
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+            results = await asyncio.gather(*tasks.values(), return_exceptions=True)
             
             # Process results
-            for i, result in enumerate(results):
+            for source, result in zip(tasks, results):
                 if isinstance(result, Exception):
-                    logger.warning(f"Analysis task {i} failed: {result}")
+                    logger.warning(f"Analysis task {source} failed: {result}")
                     continue
                 
-                if i == 0 and self.ollama_available:  # First task was Ollama
+                if source == "ollama":
                     ollama_result = result
-                elif (i == 1 and self.ollama_available) or (i == 0 and not self.ollama_available):  # HuggingFace task
+                else:
                     huggingface_result = result
             
             # Combine results from both models
@@ -370,11 +932,22 @@ class ContextSearchEngine:
             # Get appropriate model for language
             model = config.get_model_for_language(entity.language)
             
-            # Get analysis mode configuration
-            mode_config = config.get_analysis_mode_config(mode.value)
+            cache_key = self._ollama_cache_key(entity, context, mode)
+            cached = self.verdict_cache.get(cache_key)
+            if cached is not None:
+                self._record_cached_response(entity, "ollama", cached)
+                return cached
             
-            # Get appropriate prompt based on language
-            if entity.language in ["chinese", "japanese", "korean"]:
+            # Get appropriate prompt: document prefix + question, or by language
+            if self._use_document_prefix(text):
+                prompt = self.prompt_manager.get_document_prefix(text) + self.prompt_manager.get_entity_question(
+                    entity=entity.text,
+                    type=entity.type.value,
+                    language=entity.language,
+                    start=entity.position.start,
+                    end=entity.position.end
+                )
+            elif entity.language in ["chinese", "japanese", "korean"]:
                 prompt = self.prompt_manager.get_multilingual_prompt(
                     language=entity.language,
                     text=context,
@@ -404,16 +977,20 @@ class ContextSearchEngine:
             })
             
             # Analyze with Ollama
-            async with ollama_client as client:
+            async with self.backend_semaphores["ollama"], ollama_client as client:
                 response = await client.analyze_json(
                     text=context,
                     prompt_template=prompt,
                     model=model,
+                    options=self._ollama_options(mode),
+                    stats_label=mode.value,
+                    keep_alive=config.ollama_keep_alive,
                     entity=entity.text,
                     type=entity.type.value,
                     start=entity.position.start,
                     end=entity.position.end
                 )
+            self.stats["ollama_prompts"] += 1
             
             # Store response for debugging
             self.debug_info["last_request_responses"].append({
@@ -424,6 +1001,9 @@ class ContextSearchEngine:
             })
             
             response["model_source"] = "ollama"
+            # Responses that had to be guessed from free text are not worth keeping
+            if "raw_response" not in response:
+                self.verdict_cache.put(cache_key, response)
             return response
             
         except Exception as e:
@@ -433,9 +1013,15 @@ class ContextSearchEngine:
     async def _analyze_with_huggingface(self, text: str, entity: DetectedEntity, context: str, mode: AnalysisMode) -> Dict[str, Any]:
         """Perform analysis using HuggingFace model (local first, then API)."""
         try:
-            # Try local HuggingFace client first
-            async with local_huggingface_client as local_hf_client:
-                if await local_hf_client.health_check():
+            cache_key = self._huggingface_cache_key(entity, context)
+            cached = self.verdict_cache.get(cache_key)
+            if cached is not None:
+                self._record_cached_response(entity, "huggingface", cached)
+                return cached
+            
+            # Local model first if it was loaded at startup, then the API
+            async with self.backend_semaphores["huggingface"], local_huggingface_client as local_hf_client:
+                if local_hf_client.is_loaded:
                     response = await local_hf_client.classify_text(
                         text=text,
                         entity_text=entity.text,
@@ -456,21 +1042,28 @@ class ContextSearchEngine:
                             end=entity.position.end
                         )
             
-            # Store response for debugging
-            self.debug_info["last_request_responses"].append({
-                "entity_id": entity.id,
-                "entity_text": entity.text,
-                "engine": "huggingface",
-                "response": response
-            })
-            
-            response["model_source"] = "huggingface"
-            return response
+            return self._store_huggingface_response(entity, context, response)
             
         except Exception as e:
             logger.error(f"HuggingFace analysis failed: {e}")
             raise
     
+    def _store_huggingface_response(self, entity: DetectedEntity, context: str, response: Dict[str, Any]) -> Dict[str, Any]:
+        """Record a classifier response for debugging and cache it if it is a real verdict."""
+        # Store response for debugging
+        self.debug_info["last_request_responses"].append({
+            "entity_id": entity.id,
+            "entity_text": entity.text,
+            "engine": "huggingface",
+            "response": response
+        })
+        
+        response["model_source"] = "huggingface"
+        # Fallback answers after a model error or unexpected output are not cached
+        if "error" not in response and "raw_response" not in response:
+            self.verdict_cache.put(self._huggingface_cache_key(entity, context), response)
+        return response
+    
     def _combine_analysis_results(self, ollama_result: Optional[Dict], huggingface_result: Optional[Dict], entity: DetectedEntity) -> ContextAnalysisResult:
         """Combine results from both models into a single analysis result."""
         # Initialize with default values - conservative approach
@@ -593,7 +1186,11 @@ class ContextSearchEngine:
             **self.stats,
             "uptime": uptime,
             "error_rate": error_rate,
-            "requests_per_second": self.stats["total_requests"] / max(1, uptime)
+            "requests_per_second": self.stats["total_requests"] / max(1, uptime),
+            "http_pool": http_pool.get_stats(),
+            "verdict_cache": self.verdict_cache.get_stats(),
+            "ollama_generation": ollama_client.get_generation_stats(),
+            "escalation": self._escalation_stats()
         }
     
     def get_debug_info(self) -> Dict[str, Any]:
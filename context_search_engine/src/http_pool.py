@@ -0,0 +1,80 @@
+import aiohttp
+import logging
+from typing import Dict, Any, Optional
+
+from .config import config
+
+logger = logging.getLogger(__name__)
+
+class HTTPConnectionPool:
+    """Shared TCP connector for the Ollama and HuggingFace client sessions.
+
+    Sessions created here share one keep-alive connection pool and report
+    through a trace config how many requests reused an open connection.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.connector: Optional[aiohttp.TCPConnector] = None
+        self.trace_config = aiohttp.TraceConfig()
+        self.trace_config.on_request_start.append(self._on_request_start)
+        self.trace_config.on_request_exception.append(self._on_request_exception)
+        self.trace_config.on_connection_create_end.append(self._on_connection_created)
+        self.trace_config.on_connection_reuseconn.append(self._on_connection_reused)
+        self.stats = {
+            "requests": 0,
+            "request_errors": 0,
+            "connections_created": 0,
+            "connections_reused": 0
+        }
+
+    async def start(self):
+        """Create the shared connector; called once at application startup."""
+        if self.connector is None or self.connector.closed:
+            self.connector = aiohttp.TCPConnector(limit=self.limit, ttl_dns_cache=300)
+            logger.info(f"HTTP connection pool started with limit {self.limit}")
+
+    async def close(self):
+        """Close the shared connector and every connection it holds."""
+        if self.connector is not None and not self.connector.closed:
+            await self.connector.close()
+            logger.info("HTTP connection pool closed")
+        self.connector = None
+
+    def create_session(self, timeout: int, headers: Optional[Dict[str, str]] = None) -> aiohttp.ClientSession:
+        """Create a session on the shared connector; closing it leaves the connector open."""
+        if self.connector is None or self.connector.closed:
+            self.connector = aiohttp.TCPConnector(limit=self.limit, ttl_dns_cache=300)
+
+        return aiohttp.ClientSession(
+            connector=self.connector,
+            connector_owner=False,
+            timeout=aiohttp.ClientTimeout(total=timeout),
+            headers=headers,
+            trace_configs=[self.trace_config]
+        )
+
+    async def _on_request_start(self, session, context, params):
+        self.stats["requests"] += 1
+
+    async def _on_request_exception(self, session, context, params):
+        self.stats["request_errors"] += 1
+
+    async def _on_connection_created(self, session, context, params):
+        self.stats["connections_created"] += 1
+
+    async def _on_connection_reused(self, session, context, params):
+        self.stats["connections_reused"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get connection pool and reuse statistics."""
+        acquired = self.stats["connections_created"] + self.stats["connections_reused"]
+        return {
+            **self.stats,
+            "limit": self.limit,
+            "active": self.connector is not None and not self.connector.closed,
+            "reuse_ratio": self.stats["connections_reused"] / acquired if acquired else 0.0
+        }
+
+# Global connection pool instance
+http_pool = HTTPConnectionPool(config.connection_pool_size)
@@ -7,6 +7,7 @@ from typing import Dict, Any, Optional, List
 from datetime import datetime
 
 from .config import config
+from .http_pool import http_pool
 
 logger = logging.getLogger(__name__)
 
@@ -18,25 +19,49 @@ class HuggingFaceClient:
         self.timeout = 30
         self.max_retries = 3
         self.session: Optional[aiohttp.ClientSession] = None
+        self._session_users = 0
+        self._session_lock = asyncio.Lock()
+        self._persistent = False
         
-    async def __aenter__(self):
-        """Async context manager entry."""
+    def _create_session(self) -> aiohttp.ClientSession:
         headers = {
             "Content-Type": "application/json",
         }
         if self.api_token:
             headers["Authorization"] = f"Bearer {self.api_token}"
             
-        self.session = aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=self.timeout),
-            headers=headers
-        )
+        return http_pool.create_session(timeout=self.timeout, headers=headers)
+    
+    async def __aenter__(self):
+        """Async context manager entry; concurrent users share one session."""
+        async with self._session_lock:
+            if self.session is None or self.session.closed:
+                self.session = self._create_session()
+            self._session_users += 1
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Async context manager exit."""
-        if self.session:
-            await self.session.close()
+        """Async context manager exit; a temporary session is closed by its last user."""
+        async with self._session_lock:
+            self._session_users -= 1
+            if self._session_users == 0 and self.session and not self._persistent:
+                await self.session.close()
+                self.session = None
+    
+    async def start(self):
+        """Open the session kept for the lifetime of the application."""
+        async with self._session_lock:
+            if self.session is None or self.session.closed:
+                self.session = self._create_session()
+            self._persistent = True
+    
+    async def close(self):
+        """Close the application-lifetime session at shutdown."""
+        async with self._session_lock:
+            self._persistent = False
+            if self.session and self._session_users == 0:
+                await self.session.close()
+                self.session = None
     
     async def _make_request(self, text: str, **kwargs) -> Dict[str, Any]:
         """Make request to Hugging Face Inference API."""
@@ -53,7 +78,7 @@ class HuggingFaceClient:
         for attempt in range(self.max_retries):
             try:
                 if not self.session:
-                    await self.__aenter__()
+                    self.session = self._create_session()
                 
                 logger.debug(f"Making request to HuggingFace API (attempt {attempt + 1})")
                 async with self.session.post(url, json=payload) as response:
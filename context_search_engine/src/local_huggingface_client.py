@@ -1,9 +1,14 @@
+import asyncio
 import logging
 import torch
 import os
-from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Any, List, Optional
 from transformers import AutoTokenizer, AutoModelForSequenceClassification, pipeline
 
+from .config import config
+
 logger = logging.getLogger(__name__)
 
 class LocalHuggingFaceClient:
@@ -19,6 +24,9 @@ class LocalHuggingFaceClient:
         self.tokenizer = None
         self.classifier = None
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.batch_size = config.local_model_batch_size
+        # Single worker thread that runs model loading and inference off the event loop
+        self._executor: Optional[ThreadPoolExecutor] = None
         
     async def __aenter__(self):
         """Async context manager entry."""
@@ -80,74 +88,119 @@ class LocalHuggingFaceClient:
             logger.error(f"Failed to load local model: {e}")
             return False
     
+    async def start(self) -> bool:
+        """Load the model on the inference thread; called once at application startup."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="local-hf")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._load_model)
+    
+    async def close(self):
+        """Stop the inference thread."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+    
+    @property
+    def is_loaded(self) -> bool:
+        return self.classifier is not None
+    
     async def health_check(self) -> bool:
-        """Check if local model is available."""
-        try:
-            return self._load_model()
-        except Exception as e:
-            logger.error(f"Local HuggingFace health check failed: {e}")
-            return False
+        """Check if the local model was loaded at startup."""
+        return self.is_loaded
     
     async def classify_text(self, text: str, entity_text: str, entity_type: str, **kwargs) -> Dict[str, Any]:
         """Classify text for PII detection using local model."""
+        verdicts = await self.classify_entities([{
+            "entity_text": entity_text,
+            "entity_type": entity_type,
+            "context": kwargs.get('context', text)
+        }])
+        return verdicts[0]
+    
+    async def classify_entities(self, entities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Classify entities with one batched pipeline call on the inference thread.
+        
+        Each entity is a dict with entity_text, entity_type and context; one verdict
+        is returned per entity, in order.
+        """
+        if not entities:
+            return []
+        
         try:
-            if not self._load_model():
-                raise Exception("Failed to load local model")
-            
-            logger.info(f"Analyzing with local HuggingFace model: {self.fallback_model_name}")
+            if not self.is_loaded:
+                raise Exception("Local model is not loaded")
             
-            # For PII detection, we'll analyze the context around the entity
-            context = kwargs.get('context', text)
+            logger.debug(f"Analyzing {len(entities)} entities with local HuggingFace model: {self.fallback_model_name}")
             
-            # Create a prompt that helps identify PII vs non-PII
-            # We'll use heuristics combined with the sentiment model
-            analysis_text = f"This text contains potential personal information: {entity_text}"
+            # For PII detection, the sentiment of a prompt about each entity is
+            # combined with heuristics on the context around it
+            analysis_texts = [
+                f"This text contains potential personal information: {entity['entity_text']}"
+                for entity in entities
+            ]
             
-            # Use the sentiment classifier as a proxy
-            result = self.classifier(analysis_text)[0]
-            
-            # Convert sentiment to PII likelihood
-            # If the sentiment is negative, it might indicate concern about privacy (PII)
-            # If positive, it might be non-sensitive information
-            sentiment_score = result['score']
-            sentiment_label = result['label']
-            
-            # Heuristic-based PII detection combined with model output
-            is_genuine_pii = self._heuristic_pii_detection(entity_text, entity_type, context)
-            
-            # Adjust confidence based on sentiment analysis
-            base_confidence = 0.7 if is_genuine_pii else 0.3
-            
-            # If sentiment suggests negative (concern), increase PII likelihood
-            if sentiment_label.lower() in ['negative', 'neg']:
-                confidence = min(0.95, base_confidence + (sentiment_score * 0.2))
-                is_genuine_pii = True
-            else:
-                confidence = max(0.1, base_confidence - (sentiment_score * 0.1))
-            
-            # Determine risk level
-            risk_level = self._determine_risk_level(entity_type, confidence)
+            # The pipeline is not thread-safe; the single inference thread serializes calls
+            loop = asyncio.get_running_loop()
+            results = await loop.run_in_executor(
+                self._executor,
+                partial(self.classifier, analysis_texts, batch_size=self.batch_size)
+            )
             
-            return {
-                "is_genuine_pii": is_genuine_pii,
-                "confidence": confidence,
-                "reason": f"Local analysis - Entity type: {entity_type}, Sentiment: {sentiment_label}({sentiment_score:.3f}), Heuristic: {is_genuine_pii}",
-                "risk_level": risk_level,
-                "model": "local_huggingface_hybrid",
-                "sentiment_analysis": result
-            }
+            return [self._build_verdict(entity, result) for entity, result in zip(entities, results)]
             
         except Exception as e:
             logger.error(f"Local HuggingFace classification failed: {e}")
             # Return conservative default
-            return {
-                "is_genuine_pii": True,
-                "confidence": 0.6,
-                "reason": f"Local analysis failed, using heuristics: {str(e)}",
-                "risk_level": "medium",
-                "model": "local_huggingface_fallback",
-                "error": str(e)
-            }
+            return [
+                {
+                    "is_genuine_pii": True,
+                    "confidence": 0.6,
+                    "reason": f"Local analysis failed, using heuristics: {str(e)}",
+                    "risk_level": "medium",
+                    "model": "local_huggingface_fallback",
+                    "error": str(e)
+                }
+                for _ in entities
+            ]
+    
+    def _build_verdict(self, entity: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
+        """Turn the sentiment of one entity's prompt into a PII verdict."""
+        entity_text = entity["entity_text"]
+        entity_type = entity["entity_type"]
+        
+        # Convert sentiment to PII likelihood
+        # If the sentiment is negative, it might indicate concern about privacy (PII)
+        # If positive, it might be non-sensitive information
+        sentiment_score = result['score']
+        sentiment_label = result['label']
+        
+        # Heuristic-based PII detection combined with model output
+        is_genuine_pii = self._heuristic_pii_detection(entity_text, entity_type, entity.get("context", ""))
+        
+        # Adjust confidence based on sentiment analysis
+        base_confidence = 0.7 if is_genuine_pii else 0.3
+        
+        # If sentiment suggests negative (concern), increase PII likelihood
+        if sentiment_label.lower() in ['negative', 'neg']:
+            confidence = min(0.95, base_confidence + (sentiment_score * 0.2))
+            is_genuine_pii = True
+        else:
+            confidence = max(0.1, base_confidence - (sentiment_score * 0.1))
+        
+        # Determine risk level
+        risk_level = self._determine_risk_level(entity_type, confidence)
+        
+        return {
+            "is_genuine_pii": is_genuine_pii,
+            "confidence": confidence,
+            "reason": f"Local analysis - Entity type: {entity_type}, Sentiment: {sentiment_label}({sentiment_score:.3f}), Heuristic: {is_genuine_pii}",
+            "risk_level": risk_level,
+            "model": "local_huggingface_hybrid",
+            "sentiment_analysis": result,
+            # False when the heuristics fell back to their default guess
+            "indicator_matched": self._heuristic_indicator_verdict(entity_text, entity.get("context", "")) is not None
+        }
     
     def _heuristic_pii_detection(self, entity_text: str, entity_type: str, context: str) -> bool:
         """Use heuristics to detect if entity is likely PII."""
@@ -156,6 +209,21 @@ class LocalHuggingFaceClient:
         if entity_type.lower() in ['phone', 'email', 'ssn', 'credit_card']:
             return True
         
+        indicated = self._heuristic_indicator_verdict(entity_text, context)
+        if indicated is not None:
+            return indicated
+        
+        # Default for names - assume real unless proven otherwise
+        if entity_type.lower() == 'name':
+            # Short names or single letters are likely false positives
+            if len(entity_text.strip()) < 3:
+                return False
+            return True
+        
+        return True  # Conservative default
+    
+    def _heuristic_indicator_verdict(self, entity_text: str, context: str) -> Optional[bool]:
+        """Whether false positive or real PII indicators match; None when neither does."""
         # Check for obvious false positives
         entity_lower = entity_text.lower().strip()
         
@@ -191,14 +259,7 @@ class LocalHuggingFaceClient:
             if indicator in context_lower:
                 return True
         
-        # Default for names - assume real unless proven otherwise
-        if entity_type.lower() == 'name':
-            # Short names or single letters are likely false positives
-            if len(entity_text.strip()) < 3:
-                return False
-            return True
-        
-        return True  # Conservative default
+        return None
     
     def _determine_risk_level(self, entity_type: str, confidence: float) -> str:
         """Determine risk level based on entity type and confidence."""
@@ -83,6 +83,8 @@ class RefinedEntity(BaseModel):
     context: str
     analysis_result: ContextAnalysisResult
     is_validated: bool = True
+    representative_id: Optional[str] = None  # Set when the verdict was copied from a duplicate
+    context_divergent: bool = False
 
 class ContextSearchResponse(BaseModel):
     stage: int = 3
@@ -187,10 +189,12 @@ class OllamaRequest(BaseModel):
     model: str
     prompt: str
     stream: bool = False
+    format: Optional[str] = None  # "json" constrains the output to valid JSON
+    keep_alive: Optional[str] = None  # how long Ollama keeps the model loaded, e.g. "10m"
     options: Dict[str, Any] = {
         "temperature": 0.1,
         "top_p": 0.9,
-        "max_tokens": 200
+        "num_predict": 200
     }
 
 class OllamaResponse(BaseModel):
@@ -201,4 +205,9 @@ class OllamaResponse(BaseModel):
     total_duration: Optional[int] = None
     load_duration: Optional[int] = None
     prompt_eval_count: Optional[int] = None
-    eval_count: Optional[int] = None
\ No newline at end of file
+    prompt_eval_duration: Optional[int] = None
+    eval_count: Optional[int] = None
+    eval_duration: Optional[int] = None
+    done_reason: Optional[str] = None
+    # Measured by the client on streamed calls; Ollama does not report it
+    time_to_first_token: Optional[int] = None
\ No newline at end of file
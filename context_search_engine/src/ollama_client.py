@@ -2,32 +2,129 @@ import aiohttp
 import asyncio
 import json
 import logging
-from typing import Dict, Any, Optional, List
+import time
+from contextvars import ContextVar
+from typing import Dict, Any, Optional, List, Set, Tuple
 from datetime import datetime
 
 from .config import config
+from .http_pool import http_pool
 from .models import OllamaRequest, OllamaResponse, ModelStatus
 
 logger = logging.getLogger(__name__)
 
+# When set, every generation in the current context appends its timings here
+generation_log: ContextVar[Optional[List[Dict[str, Any]]]] = ContextVar("generation_log", default=None)
+# Set while a call runs alone to put a shared prompt prefix into Ollama's cache
+prefix_warming: ContextVar[bool] = ContextVar("prefix_warming", default=False)
+
+def _ms(nanoseconds: Optional[int]) -> Optional[float]:
+    return nanoseconds / 1e6 if nanoseconds is not None else None
+
+class ModelNotFoundError(Exception):
+    """Raised when Ollama reports that the requested model is not installed."""
+
+class JSONStreamScanner:
+    """Finds the first complete top-level JSON object or array in streamed text."""
+    
+    def __init__(self):
+        self.buffer = ""
+        self._position = 0
+        self._start: Optional[int] = None
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+    
+    def feed(self, chunk: str) -> Optional[str]:
+        """Add streamed text; returns the JSON text once a valid value has closed."""
+        self.buffer += chunk
+        while self._position < len(self.buffer):
+            char = self.buffer[self._position]
+            self._position += 1
+            
+            if self._start is None:
+                if char in "{[":
+                    self._start, self._depth = self._position - 1, 1
+                continue
+            
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    candidate = self.buffer[self._start:self._position]
+                    self._start = None
+                    try:
+                        json.loads(candidate)
+                        return candidate
+                    except json.JSONDecodeError:
+                        continue
+        return None
+
 class OllamaClient:
     def __init__(self):
         self.base_url = config.ollama_host
         self.timeout = config.ollama_timeout
         self.max_retries = config.ollama_max_retries
         self.session: Optional[aiohttp.ClientSession] = None
+        self._session_users = 0
+        self._session_lock = asyncio.Lock()
+        self._persistent = False
+        
+        # Installed model names from /api/tags, refreshed once older than the TTL
+        self.model_catalog_ttl = config.ollama_model_catalog_ttl
+        self.stream_verdicts = config.ollama_stream_verdicts
+        self._model_catalog: Optional[Set[str]] = None
+        self._catalog_fetched_at = 0.0
+        self._catalog_refresh: Optional[asyncio.Task] = None
         
+        # Generated tokens and latency per stats label (the analysis mode)
+        self.generation_stats: Dict[str, Dict[str, float]] = {}
+        
+    def _create_session(self) -> aiohttp.ClientSession:
+        return http_pool.create_session(timeout=self.timeout)
+    
     async def __aenter__(self):
-        """Async context manager entry."""
-        self.session = aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=self.timeout)
-        )
+        """Async context manager entry; concurrent users share one session."""
+        async with self._session_lock:
+            if self.session is None or self.session.closed:
+                self.session = self._create_session()
+            self._session_users += 1
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Async context manager exit."""
-        if self.session:
-            await self.session.close()
+        """Async context manager exit; a temporary session is closed by its last user."""
+        async with self._session_lock:
+            self._session_users -= 1
+            if self._session_users == 0 and self.session and not self._persistent:
+                await self.session.close()
+                self.session = None
+    
+    async def start(self):
+        """Open the session kept for the lifetime of the application."""
+        async with self._session_lock:
+            if self.session is None or self.session.closed:
+                self.session = self._create_session()
+            self._persistent = True
+    
+    async def close(self):
+        """Close the application-lifetime session at shutdown."""
+        if self._catalog_refresh is not None:
+            self._catalog_refresh.cancel()
+        async with self._session_lock:
+            self._persistent = False
+            if self.session and self._session_users == 0:
+                await self.session.close()
+                self.session = None
     
     async def _make_request(self, endpoint: str, method: str = "GET", data: Optional[Dict] = None) -> Dict[str, Any]:
         """Make HTTP request to Ollama API."""
@@ -36,20 +133,24 @@ class OllamaClient:
         for attempt in range(self.max_retries):
             try:
                 if not self.session:
-                    self.session = aiohttp.ClientSession(
-                        timeout=aiohttp.ClientTimeout(total=self.timeout)
-                    )
+                    self.session = self._create_session()
                 
                 if method == "GET":
                     async with self.session.get(url) as response:
-                        response.raise_for_status()
+                        await self._raise_for_status(response)
                         return await response.json()
                 
                 elif method == "POST":
                     async with self.session.post(url, json=data) as response:
-                        response.raise_for_status()
+                        await self._raise_for_status(response)
                         return await response.json()
                         
+            except aiohttp.ClientResponseError as e:
+                # Client errors will not succeed on retry
+                if e.status < 500 or attempt == self.max_retries - 1:
+                    raise
+                logger.warning(f"Ollama request failed (attempt {attempt + 1}/{self.max_retries}): {e}")
+                await asyncio.sleep(2 ** attempt)  # Exponential backoff
             except aiohttp.ClientError as e:
                 logger.warning(f"Ollama request failed (attempt {attempt + 1}/{self.max_retries}): {e}")
                 if attempt == self.max_retries - 1:
@@ -58,6 +159,79 @@ class OllamaClient:
         
         raise Exception("Max retries exceeded")
     
+    async def _stream_generate(self, data: Dict[str, Any], stop_on_json: bool) -> Tuple[Dict[str, Any], bool]:
+        """Read an NDJSON /api/generate stream, optionally stopping at the first complete JSON value.
+        
+        Returns the response data and whether the stream was cut short. On an early stop
+        the connection is closed rather than drained, which makes Ollama abort generation.
+        """
+        url = f"{self.base_url}/api/generate"
+        
+        for attempt in range(self.max_retries):
+            try:
+                if not self.session:
+                    self.session = self._create_session()
+                
+                async with self.session.post(url, json={**data, "stream": True}) as response:
+                    await self._raise_for_status(response)
+                    
+                    request_sent_at = time.monotonic()
+                    scanner = JSONStreamScanner()
+                    chunks = 0
+                    first_chunk_at = None
+                    last_chunk: Dict[str, Any] = {}
+                    async for line in response.content:
+                        if not line.strip():
+                            continue
+                        last_chunk = json.loads(line)
+                        if last_chunk.get("error"):
+                            raise Exception(f"Ollama stream error: {last_chunk['error']}")
+                        chunks += 1
+                        if first_chunk_at is None:
+                            first_chunk_at = time.monotonic()
+                        
+                        completed = scanner.feed(last_chunk.get("response", ""))
+                        time_to_first_token = int((first_chunk_at - request_sent_at) * 1e9)
+                        if last_chunk.get("done"):
+                            return {**last_chunk, "response": scanner.buffer,
+                                    "time_to_first_token": time_to_first_token}, False
+                        if stop_on_json and completed is not None:
+                            response.close()
+                            # Ollama only reports prompt evaluation in the final chunk, which never arrives
+                            return {
+                                "model": data["model"],
+                                "response": completed,
+                                "done": False,
+                                "done_reason": "early_stop",
+                                "eval_count": chunks,
+                                "eval_duration": int((time.monotonic() - first_chunk_at) * 1e9),
+                                "time_to_first_token": time_to_first_token
+                            }, True
+                    
+                    return {**last_chunk, "model": data["model"], "response": scanner.buffer,
+                            "done": bool(last_chunk.get("done"))}, False
+                    
+            except aiohttp.ClientResponseError as e:
+                if e.status < 500 or attempt == self.max_retries - 1:
+                    raise
+                logger.warning(f"Ollama stream failed (attempt {attempt + 1}/{self.max_retries}): {e}")
+                await asyncio.sleep(2 ** attempt)  # Exponential backoff
+            except aiohttp.ClientError as e:
+                logger.warning(f"Ollama stream failed (attempt {attempt + 1}/{self.max_retries}): {e}")
+                if attempt == self.max_retries - 1:
+                    raise
+                await asyncio.sleep(2 ** attempt)  # Exponential backoff
+        
+        raise Exception("Max retries exceeded")
+    
+    async def _raise_for_status(self, response: aiohttp.ClientResponse):
+        """Raise ModelNotFoundError for a missing model, else the usual response error."""
+        if response.status == 404:
+            body = await response.text()
+            if "model" in body.lower() and "not found" in body.lower():
+                raise ModelNotFoundError(body)
+        response.raise_for_status()
+    
     async def health_check(self) -> bool:
         """Check if Ollama is running and accessible."""
         try:
@@ -73,6 +247,9 @@ class OllamaClient:
             response = await self._make_request("/api/tags")
             models = []
             
+            self._model_catalog = {model_data["name"] for model_data in response.get("models", [])}
+            self._catalog_fetched_at = time.monotonic()
+            
             for model_data in response.get("models", []):
                 model = ModelStatus(
                     name=model_data["name"],
@@ -90,32 +267,49 @@ class OllamaClient:
             return []
     
     async def check_model_exists(self, model_name: str) -> bool:
-        """Check if a specific model exists in Ollama."""
-        models = await self.list_models()
-        return any(model.name == model_name for model in models)
+        """Check if a specific model exists in Ollama, using the cached model catalog."""
+        if self._model_catalog is None:
+            await self.list_models()
+        elif time.monotonic() - self._catalog_fetched_at > self.model_catalog_ttl:
+            if self._persistent:
+                # Answer from the stale catalog while it is refreshed in the background
+                self._schedule_catalog_refresh()
+            else:
+                await self.list_models()
+        
+        return model_name in (self._model_catalog or set())
+    
+    def _schedule_catalog_refresh(self):
+        if self._catalog_refresh is None or self._catalog_refresh.done():
+            self._catalog_refresh = asyncio.get_event_loop().create_task(self.list_models())
+    
+    def invalidate_model_catalog(self):
+        """Drop the cached catalog so the next check fetches /api/tags again."""
+        self._model_catalog = None
+        self._catalog_fetched_at = 0.0
     
     async def pull_model(self, model_name: str) -> bool:
         """Pull a model from Ollama registry."""
         try:
             logger.info(f"Pulling model: {model_name}")
-            data = {"name": model_name}
+            data = {"name": model_name, "stream": False}
             await self._make_request("/api/pull", method="POST", data=data)
+            self.invalidate_model_catalog()
             logger.info(f"Successfully pulled model: {model_name}")
             return True
         except Exception as e:
             logger.error(f"Failed to pull model {model_name}: {e}")
             return False
     
-    async def generate(self, request: OllamaRequest) -> OllamaResponse:
-        """Generate text using Ollama model."""
+    async def generate(self, request: OllamaRequest, stats_label: str = "default") -> OllamaResponse:
+        """Generate text using Ollama model.
+        
+        With request.stream the completion is read incrementally; for JSON-format
+        requests reading stops as soon as the JSON value is complete.
+        """
         try:
             logger.info(f"Starting Ollama generation with model: {request.model}")
-            
-            # Check if model exists
-            if not await self.check_model_exists(request.model):
-                logger.warning(f"Model {request.model} not found, attempting to pull...")
-                if not await self.pull_model(request.model):
-                    raise Exception(f"Failed to pull model: {request.model}")
+            start_time = time.monotonic()
             
             # Prepare request data
             data = {
@@ -124,17 +318,31 @@ class OllamaClient:
                 "stream": request.stream,
                 "options": request.options
             }
+            if request.format:
+                data["format"] = request.format
+            if request.keep_alive:
+                data["keep_alive"] = request.keep_alive
             
             logger.info(f"Sending request to Ollama: model={request.model}, prompt_length={len(request.prompt)}")
             logger.debug(f"Request data: {json.dumps(data, indent=2)}")
             
-            # Make generation request
-            response_data = await self._make_request("/api/generate", method="POST", data=data)
+            # Make generation request; only a missing model triggers a catalog check and pull
+            try:
+                response_data, stopped_early = await self._request_generation(request, data)
+            except ModelNotFoundError:
+                self.invalidate_model_catalog()
+                if not await self.check_model_exists(request.model):
+                    logger.warning(f"Model {request.model} not found, attempting to pull...")
+                    if not await self.pull_model(request.model):
+                        raise Exception(f"Failed to pull model: {request.model}")
+                response_data, stopped_early = await self._request_generation(request, data)
             
             logger.info(f"Received response from Ollama: done={response_data.get('done', False)}, response_length={len(response_data.get('response', ''))}")
             logger.debug(f"Full response: {json.dumps(response_data, indent=2)}")
             
-            return OllamaResponse(**response_data)
+            response = OllamaResponse(**response_data)
+            self._record_generation(stats_label, response, time.monotonic() - start_time, request, stopped_early)
+            return response
             
         except Exception as e:
             logger.error(f"Ollama generation failed: {type(e).__name__}: {str(e)}")
@@ -142,8 +350,68 @@ class OllamaClient:
             logger.error(f"Traceback: {traceback.format_exc()}")
             raise
     
-    async def analyze_text(self, text: str, prompt_template: str, model: Optional[str] = None, **kwargs) -> str:
-        """Analyze text using a prompt template."""
+    async def _request_generation(self, request: OllamaRequest, data: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        if request.stream:
+            return await self._stream_generate(data, stop_on_json=request.format == "json")
+        return await self._make_request("/api/generate", method="POST", data=data), False
+    
+    def _record_generation(self, label: str, response: OllamaResponse, latency: float,
+                           request: Optional[OllamaRequest] = None, stopped_early: bool = False):
+        stats = self.generation_stats.setdefault(label, {
+            "calls": 0,
+            "generated_tokens": 0,
+            "prompt_tokens": 0,
+            "truncated": 0,
+            "total_latency_ms": 0.0,
+            "early_stops": 0,
+            "time_saved_upper_bound_ms": 0.0
+        })
+        stats["calls"] += 1
+        stats["generated_tokens"] += response.eval_count or 0
+        stats["prompt_tokens"] += response.prompt_eval_count or 0
+        stats["truncated"] += int(response.done_reason == "length")
+        stats["total_latency_ms"] += latency * 1000
+        
+        log = generation_log.get()
+        if log is not None:
+            log.append({
+                "label": label,
+                "prompt_tokens": response.prompt_eval_count,
+                "prompt_eval_ms": _ms(response.prompt_eval_duration),
+                "time_to_first_token_ms": _ms(response.time_to_first_token),
+                "prefix_warming": prefix_warming.get(),
+                "latency_ms": latency * 1000
+            })
+        
+        if stopped_early and response.eval_count:
+            # Upper bound: the model may have ended well before using its num_predict budget,
+            # so this is what the early stop saved at most, at the rate this call streamed
+            budget = int((request.options if request else {}).get("num_predict", 0))
+            skipped = max(0, budget - response.eval_count)
+            ms_per_token = (response.eval_duration or 0) / 1e6 / max(1, response.eval_count - 1)
+            stats["early_stops"] += 1
+            stats["time_saved_upper_bound_ms"] += skipped * ms_per_token
+    
+    def get_generation_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get generated tokens and latency per stats label."""
+        return {
+            label: {
+                **stats,
+                "avg_generated_tokens": stats["generated_tokens"] / stats["calls"],
+                "avg_time_saved_upper_bound_ms": stats["time_saved_upper_bound_ms"] / stats["calls"],
+                "avg_latency_ms": stats["total_latency_ms"] / stats["calls"]
+            }
+            for label, stats in self.generation_stats.items()
+        }
+    
+    async def analyze_text(self, text: str, prompt_template: str, model: Optional[str] = None,
+                           options: Optional[Dict[str, Any]] = None, output_format: Optional[str] = None,
+                           stats_label: str = "default", keep_alive: Optional[str] = None, **kwargs) -> str:
+        """Analyze text using a prompt template.
+        
+        options are Ollama generation options (num_predict, temperature, stop, ...)
+        merged over the defaults; output_format="json" requests constrained JSON output.
+        """
         try:
             # Use default model if not specified
             if not model:
@@ -161,16 +429,19 @@ class OllamaClient:
             request = OllamaRequest(
                 model=model,
                 prompt=formatted_prompt,
-                stream=False,
+                stream=self.stream_verdicts and output_format == "json",
+                format=output_format,
+                keep_alive=keep_alive,
                 options={
                     "temperature": 0.1,
                     "top_p": 0.9,
-                    "max_tokens": 300
+                    "num_predict": 300,
+                    **(options or {})
                 }
             )
             
             # Generate response
-            response = await self.generate(request)
+            response = await self.generate(request, stats_label=stats_label)
             return response.response.strip()
             
         except Exception as e:
@@ -180,6 +451,7 @@ class OllamaClient:
     async def analyze_json(self, text: str, prompt_template: str, model: Optional[str] = None, **kwargs) -> Dict[str, Any]:
         """Analyze text and return JSON response."""
         try:
+            kwargs.setdefault("output_format", "json")
             response_text = await self.analyze_text(text, prompt_template, model, **kwargs)
             logger.debug(f"Raw LLM response: {response_text}")
             
@@ -241,6 +513,39 @@ class OllamaClient:
             logger.error(f"JSON analysis failed: {e}")
             raise
     
+    async def analyze_json_list(self, text: str, prompt_template: str, model: Optional[str] = None, **kwargs) -> List[Dict[str, Any]]:
+        """Analyze text and return a JSON array response of objects."""
+        try:
+            kwargs.setdefault("output_format", "json")
+            response_text = await self.analyze_text(text, prompt_template, model, **kwargs)
+            logger.debug(f"Raw LLM response: {response_text}")
+            
+            import re
+            
+            candidates = [response_text.strip()]
+            # Fall back to the outermost array, e.g. when wrapped in prose or a code block
+            array_match = re.search(r'\[.*\]', response_text, re.DOTALL)
+            if array_match:
+                candidates.append(array_match.group())
+            
+            for candidate in candidates:
+                try:
+                    parsed = json.loads(candidate)
+                except json.JSONDecodeError:
+                    continue
+                
+                # Some models wrap the array in an object, e.g. {"verdicts": [...]}
+                if isinstance(parsed, dict):
+                    parsed = next((value for value in parsed.values() if isinstance(value, list)), None)
+                if isinstance(parsed, list):
+                    return [item for item in parsed if isinstance(item, dict)]
+            
+            raise ValueError(f"Could not parse JSON array from LLM response: {response_text[:200]}")
+            
+        except Exception as e:
+            logger.error(f"JSON array analysis failed: {e}")
+            raise
+    
     def _format_size(self, size_bytes: int) -> str:
         """Format size in bytes to human readable format."""
         if size_bytes == 0:
@@ -0,0 +1,89 @@
+import re
+from typing import Optional, Tuple
+
+# Documentation and test values that match the PII formats but are never real PII
+PLACEHOLDER_EMAIL_DOMAINS = {"example.com", "example.org", "example.net", "test.com", "domain.com", "email.com"}
+PLACEHOLDER_EMAIL_TLDS = {"example", "test", "invalid", "localhost"}
+TEST_CARD_NUMBERS = {
+    "4111111111111111", "4242424242424242", "4012888888881881",
+    "5555555555554444", "5105105105105100", "378282246310005", "6011111111111117"
+}
+PLACEHOLDER_SSNS = {"123456789", "078051120", "219099999"}
+
+EMAIL_PATTERN = re.compile(r"^[A-Za-z0-9._%+-]+@([A-Za-z0-9-]+\.)+[A-Za-z]{2,}$")
+SSN_PATTERN = re.compile(r"^\d{3}[- ]?\d{2}[- ]?\d{4}$")
+PHONE_PATTERN = re.compile(r"^\+?[\d\s().-]+$")
+
+def _digits(value: str) -> str:
+    return re.sub(r"\D", "", value)
+
+def luhn_valid(number: str) -> bool:
+    """Check a card number against the Luhn checksum."""
+    total = 0
+    for index, digit in enumerate(reversed(number)):
+        value = int(digit)
+        if index % 2 == 1:
+            value *= 2
+            if value > 9:
+                value -= 9
+        total += value
+    return total % 10 == 0
+
+def validate_email(text: str) -> Optional[Tuple[bool, str]]:
+    value = text.strip()
+    if not EMAIL_PATTERN.match(value):
+        return None
+    domain = value.rsplit("@", 1)[1].lower()
+    if domain in PLACEHOLDER_EMAIL_DOMAINS or domain.rsplit(".", 1)[1] in PLACEHOLDER_EMAIL_TLDS:
+        return False, f"Placeholder email domain {domain}"
+    return True, "Well-formed email address"
+
+def validate_credit_card(text: str) -> Optional[Tuple[bool, str]]:
+    number = _digits(text)
+    if not 13 <= len(number) <= 19 or re.search(r"[^\d\s-]", text.strip()):
+        return None
+    if number in TEST_CARD_NUMBERS:
+        return False, "Published test card number"
+    if not luhn_valid(number):
+        return False, "Fails the Luhn checksum"
+    return True, "Passes the Luhn checksum"
+
+def validate_ssn(text: str) -> Optional[Tuple[bool, str]]:
+    value = text.strip()
+    if not SSN_PATTERN.match(value):
+        return None
+    number = _digits(value)
+    area, group, serial = number[:3], number[3:5], number[5:]
+    if number in PLACEHOLDER_SSNS:
+        return False, "Well-known sample SSN"
+    if area in ("000", "666") or area.startswith("9") or group == "00" or serial == "0000":
+        return False, "Never-issued SSN range"
+    return True, "Valid SSN structure"
+
+def validate_phone(text: str) -> Optional[Tuple[bool, str]]:
+    value = text.strip()
+    number = _digits(value)
+    if not PHONE_PATTERN.match(value) or not 7 <= len(number) <= 15:
+        return None
+    if len(set(number)) == 1:
+        return False, "Repeated-digit placeholder number"
+    # NANP reserves 555-0100 through 555-0199 for fictional use
+    if re.search(r"55501\d\d$", number):
+        return False, "Fictional 555-01XX number"
+    return True, "Well-formed phone number"
+
+VALIDATORS = {
+    "email": validate_email,
+    "credit_card": validate_credit_card,
+    "ssn": validate_ssn,
+    "phone": validate_phone
+}
+
+def validate_entity_text(entity_type: str, text: str) -> Optional[Tuple[bool, str]]:
+    """Check an entity against the rules for its type.
+
+    Returns (is_genuine_pii, reason) when the rules decide the entity, or None when
+    the type has no validator or the text does not have the expected shape.
+    """
+    validator = VALIDATORS.get(entity_type)
+    return validator(text) if validator else None
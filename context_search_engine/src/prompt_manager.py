@@ -1,6 +1,6 @@
 import os
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List
 from .config import config
 
 logger = logging.getLogger(__name__)
@@ -27,6 +27,45 @@ class PromptManager:
             end=end
         )
     
+    def get_batch_analysis_prompt(self, text: str, entities: List[Dict[str, Any]]) -> str:
+        """Get context analysis prompt covering several entities of one text span."""
+        template = self.prompts.get("batch_context_analysis", self._default_batch_prompt())
+        return template.format(
+            text=text,
+            entities=self._entity_listing(entities),
+            count=len(entities)
+        )
+    
+    def _entity_listing(self, entities: List[Dict[str, Any]]) -> str:
+        return "\n".join(
+            f'{number}. "{entity["text"]}" (Type: {entity["type"]}, Language: {entity["language"]})'
+            for number, entity in enumerate(entities, 1)
+        )
+    
+    def get_document_prefix(self, text: str) -> str:
+        """Get the instructions and document shared by every question about one text."""
+        template = self.prompts.get("document_prefix", self._default_document_prefix())
+        return template.format(text=text)
+    
+    def get_entity_question(self, entity: str, type: str, language: str, start: int, end: int) -> str:
+        """Get the entity-specific question appended to the document prefix."""
+        template = self.prompts.get("entity_question", self._default_entity_question())
+        return template.format(
+            entity=entity,
+            type=type,
+            language=language,
+            start=start,
+            end=end
+        )
+    
+    def get_batch_question(self, entities: List[Dict[str, Any]]) -> str:
+        """Get the multi-entity question appended to the document prefix."""
+        template = self.prompts.get("batch_question", self._default_batch_question())
+        return template.format(
+            entities=self._entity_listing(entities),
+            count=len(entities)
+        )
+    
     def get_false_positive_prompt(self, text: str, entity: str, type: str) -> str:
         """Get false positive detection prompt."""
         template = self.prompts.get("false_positive_detection", self._default_false_positive_prompt())
@@ -60,6 +99,47 @@ Is this likely to be real personal information (not fictional, example, or gener
 Respond in JSON format:
 {{"is_genuine_pii": true, "confidence": 0.8, "reason": "This appears to be a real person's name", "risk_level": "medium"}}"""
     
+    def _default_batch_prompt(self) -> str:
+        """Default multi-entity context analysis prompt."""
+        return """Analyze whether each of the {count} entities below is genuine personal information in this context:
+
+Text: "{text}"
+
+Entities:
+{entities}
+
+For each entity decide if it is likely to be real personal information (not fictional, example, or generic text).
+
+Respond with a JSON object whose "verdicts" array holds one object per entity, in the same order:
+{{"verdicts": [{{"entity": 1, "is_genuine_pii": true, "confidence": 0.8, "reason": "This appears to be a real person's name", "risk_level": "medium"}}]}}"""
+    
+    def _default_document_prefix(self) -> str:
+        """Default shared prefix: instructions followed by the whole document."""
+        return """You are a privacy expert reviewing a document for genuine personally identifiable information (PII).
+Detected entities may be false positives: fictional characters, example or placeholder text,
+titles, product names, or company names in non-personal contexts.
+
+Document:
+\"\"\"
+{text}
+\"\"\"
+"""
+    
+    def _default_entity_question(self) -> str:
+        """Default question about one entity of the document."""
+        return """Question: Is "{entity}" (Type: {type}, Language: {language}, characters {start}-{end}) genuine personal information in this document?
+
+Respond in JSON format:
+{{"is_genuine_pii": true, "confidence": 0.8, "reason": "This appears to be a real person's name", "risk_level": "medium"}}"""
+    
+    def _default_batch_question(self) -> str:
+        """Default question about several entities of the document."""
+        return """Question: For each of the {count} entities below, is it genuine personal information in this document?
+{entities}
+
+Respond with a JSON object whose "verdicts" array holds one object per entity, in the same order:
+{{"verdicts": [{{"entity": 1, "is_genuine_pii": true, "confidence": 0.8, "reason": "This appears to be a real person's name", "risk_level": "medium"}}]}}"""
+    
     def _default_false_positive_prompt(self) -> str:
         """Default false positive detection prompt."""
         return """Determine if this detected entity is a false positive:
@@ -0,0 +1,189 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class VerdictCache:
+    """Cache of model verdicts for an entity in its context.
+
+    Verdicts are kept in an in-memory LRU with a TTL and, when a disk path is
+    configured, in a SQLite file so they survive restarts. Expired verdicts are
+    treated as misses on both tiers. Disk writes are queued and committed in
+    batches on a writer thread, so storing a verdict never blocks the event loop.
+    """
+
+    def __init__(self, enabled: bool = True, ttl: int = 300, max_entries: int = 10000,
+                 disk_path: Optional[str] = None):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.disk_path = disk_path
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        # Rows waiting for the writer thread; a flush is scheduled at most once at a time
+        self._pending_writes: List[Tuple[str, str, float]] = []
+        self._pending_lock = threading.Lock()
+        self._flush_scheduled = False
+        self._writer: Optional[ThreadPoolExecutor] = None
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0
+        }
+
+        if self.enabled and self.disk_path:
+            self._open_disk_tier()
+
+    def _open_disk_tier(self):
+        try:
+            directory = os.path.dirname(self.disk_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.disk_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS verdicts (key TEXT PRIMARY KEY, verdict TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM verdicts WHERE stored_at < ?", (time.time() - self.ttl,))
+            self._db.commit()
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="verdict-cache")
+            logger.info(f"Verdict cache disk tier opened at {self.disk_path}")
+        except sqlite3.Error as e:
+            logger.warning(f"Verdict cache disk tier unavailable, using memory only: {e}")
+            self._db = None
+
+    @staticmethod
+    def make_key(backend: str, model: str, prompt_version: str, entity_text: str, entity_type: str,
+                 context: str, **variant: Any) -> str:
+        """Build a cache key; the context is whitespace- and case-normalized before hashing."""
+        normalized_context = " ".join(context.split()).lower()
+        payload = json.dumps({
+            "backend": backend,
+            "model": model,
+            "prompt_version": prompt_version,
+            "entity": entity_text,
+            "type": entity_type,
+            "context": hashlib.sha256(normalized_context.encode("utf-8")).hexdigest(),
+            **variant
+        }, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached verdict, or None on a miss."""
+        if not self.enabled:
+            return None
+
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            stored_at, verdict = entry
+            if now - stored_at <= self.ttl:
+                self._entries.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return dict(verdict)
+            del self._entries[key]
+
+        if self._db is not None:
+            try:
+                with self._db_lock:
+                    row = self._db.execute(
+                        "SELECT verdict, stored_at FROM verdicts WHERE key = ?", (key,)
+                    ).fetchone()
+                if row is not None and now - row[1] <= self.ttl:
+                    verdict = json.loads(row[0])
+                    self._remember(key, verdict, row[1])
+                    self.stats["disk_hits"] += 1
+                    return dict(verdict)
+            except (sqlite3.Error, json.JSONDecodeError) as e:
+                logger.warning(f"Verdict cache disk lookup failed: {e}")
+
+        self.stats["misses"] += 1
+        return None
+
+    def put(self, key: str, verdict: Dict[str, Any]):
+        """Store a verdict in memory and, if configured, on disk."""
+        if not self.enabled:
+            return
+
+        stored_at = time.time()
+        self._remember(key, dict(verdict), stored_at)
+        self.stats["stores"] += 1
+
+        if self._writer is not None:
+            with self._pending_lock:
+                self._pending_writes.append((key, json.dumps(verdict, ensure_ascii=False, default=str), stored_at))
+                if self._flush_scheduled:
+                    return
+                self._flush_scheduled = True
+            self._writer.submit(self._flush_writes)
+
+    def _flush_writes(self):
+        """Write every queued verdict in one transaction; runs on the writer thread."""
+        with self._pending_lock:
+            rows, self._pending_writes = self._pending_writes, []
+            self._flush_scheduled = False
+        try:
+            with self._db_lock:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO verdicts (key, verdict, stored_at) VALUES (?, ?, ?)", rows
+                )
+                self._db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Verdict cache disk write failed for {len(rows)} verdicts: {e}")
+
+    def _remember(self, key: str, verdict: Dict[str, Any], stored_at: float):
+        self._entries[key] = (stored_at, verdict)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def clear(self):
+        """Drop all cached verdicts from both tiers."""
+        self._entries.clear()
+        if self._writer is not None:
+            with self._pending_lock:
+                self._pending_writes = []
+            # Runs after any flush already queued, so no older verdict is written back afterwards
+            self._writer.submit(self._delete_all).result()
+
+    def _delete_all(self):
+        with self._db_lock:
+            self._db.execute("DELETE FROM verdicts")
+            self._db.commit()
+
+    def close(self):
+        """Write the queued verdicts and close the disk tier."""
+        if self._writer is not None:
+            self._writer.shutdown(wait=True)
+            self._writer = None
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache sizes and hit ratios."""
+        lookups = self.stats["memory_hits"] + self.stats["disk_hits"] + self.stats["misses"]
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        return {
+            **self.stats,
+            "enabled": self.enabled,
+            "ttl": self.ttl,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "disk_enabled": self._db is not None,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            "memory_hit_ratio": self.stats["memory_hits"] / lookups if lookups else 0.0,
+            "disk_hit_ratio": self.stats["disk_hits"] / lookups if lookups else 0.0
+        }
@@ -1,12 +1,17 @@
 import pytest
+import pytest_asyncio
 import asyncio
 from unittest.mock import AsyncMock, MagicMock, patch
 import uuid
 
 from src.engine import ContextSearchEngine
+from src.config import config as engine_config
+from src.ollama_client import generation_log, prefix_warming
+from src.local_huggingface_client import LocalHuggingFaceClient
 from src.models import (
     ContextSearchRequest, ContextSearchResponse, DetectedEntity,
-    PIIType, ConfidenceLevel, AnalysisMode, RiskLevel, Position
+    PIIType, ConfidenceLevel, AnalysisMode, RiskLevel, Position,
+    RefinedEntity, ContextAnalysisResult
 )
 
 
@@ -258,4 +263,669 @@ class TestErrorHandling:
             mock_client.validate_entity.side_effect = Exception("Connection error")
             
             with pytest.raises(Exception):
-                await engine.validate_entity("test-id", "test@example.com", "context")
\ No newline at end of file
+                await engine.validate_entity("test-id", "test@example.com", "context")
+
+def _entity(index):
+    return DetectedEntity(
+        id=f"entity-{index}",
+        text=f"user{index}@example.com",
+        type=PIIType.EMAIL,
+        language="english",
+        position=Position(start=index * 30, end=index * 30 + 17),
+        probability=0.9,
+        confidence_level=ConfidenceLevel.HIGH
+    )
+
+
+def _refined(entity, is_validated=True):
+    return RefinedEntity(
+        id=entity.id,
+        text=entity.text,
+        type=entity.type,
+        language=entity.language,
+        position=entity.position,
+        original_probability=entity.probability,
+        refined_probability=0.9,
+        confidence_level=ConfidenceLevel.HIGH,
+        sources=["context_analysis"],
+        context=entity.text,
+        analysis_result=ContextAnalysisResult(
+            is_genuine_pii=is_validated,
+            confidence=0.9,
+            reason="test",
+            risk_level=RiskLevel.MEDIUM
+        ),
+        is_validated=is_validated
+    )
+
+
+class TestConcurrentAnalysis:
+    """Test concurrent analysis of the entities in a request."""
+    
+    @pytest.fixture
+    def ready_engine(self, engine):
+        engine.is_initialized = True
+        engine.ollama_available = False
+        engine.huggingface_available = True
+        return engine
+    
+    @pytest.mark.asyncio
+    async def test_results_keep_input_order(self, ready_engine):
+        """Entities finishing out of order are still returned in request order."""
+        entities = [_entity(i) for i in range(6)]
+        
+        async def analyze(text, entity, mode, threshold, ollama_result=None, huggingface_result=None):
+            await asyncio.sleep(0.01 * (len(entities) - int(entity.id.split("-")[1])))
+            return _refined(entity)
+        
+        with patch.object(ready_engine, '_analyze_entity', side_effect=analyze):
+            response = await ready_engine.search(ContextSearchRequest(
+                text="text", languages=["english"], previous_detections=entities
+            ))
+        
+        assert [item.id for item in response.items] == [entity.id for entity in entities]
+    
+    @pytest.mark.asyncio
+    async def test_failed_entity_does_not_fail_request(self, ready_engine):
+        """One failing entity is skipped while the others are still returned."""
+        entities = [_entity(i) for i in range(4)]
+        
+        async def analyze(text, entity, mode, threshold, ollama_result=None, huggingface_result=None):
+            if entity.id == "entity-1":
+                raise RuntimeError("backend unavailable")
+            return _refined(entity, is_validated=entity.id != "entity-3")
+        
+        with patch.object(ready_engine, '_analyze_entity', side_effect=analyze):
+            response = await ready_engine.search(ContextSearchRequest(
+                text="text", languages=["english"], previous_detections=entities
+            ))
+        
+        assert [item.id for item in response.items] == ["entity-0", "entity-2"]
+        assert ready_engine.stats["false_positives_filtered"] == 1
+        assert ready_engine.stats["successful_requests"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self, ready_engine):
+        """No more entities are analyzed at once than the engine-wide limit allows."""
+        ready_engine.entity_semaphore = asyncio.Semaphore(3)
+        entities = [_entity(i) for i in range(10)]
+        in_flight = 0
+        peak = 0
+        
+        async def analyze(text, entity, mode, threshold, ollama_result=None, huggingface_result=None):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return _refined(entity)
+        
+        with patch.object(ready_engine, '_analyze_entity', side_effect=analyze):
+            response = await ready_engine.search(ContextSearchRequest(
+                text="text", languages=["english"], previous_detections=entities
+            ))
+        
+        assert len(response.items) == 10
+        assert peak == 3
+    
+    @pytest.mark.asyncio
+    async def test_local_model_classifies_entities_in_one_batch(self, ready_engine):
+        """With the local model loaded, all entities share one classifier call."""
+        entities = [_entity(i) for i in range(4)]
+        local_verdict = {"is_genuine_pii": True, "confidence": 0.8, "reason": "local", "risk_level": "medium"}
+        
+        with patch('src.engine.local_huggingface_client') as local:
+            local.is_loaded = True
+            local.classify_entities = AsyncMock(side_effect=lambda batch: [dict(local_verdict) for _ in batch])
+            
+            response = await ready_engine.search(ContextSearchRequest(
+                text="x" * 200, languages=["english"], previous_detections=entities
+            ))
+        
+        assert local.classify_entities.await_count == 1
+        assert len(local.classify_entities.await_args.args[0]) == 4
+        assert [item.id for item in response.items] == [entity.id for entity in entities]
+
+
+def _verdict(number, is_genuine=True):
+    return {
+        "entity": number,
+        "is_genuine_pii": is_genuine,
+        "confidence": 0.9,
+        "reason": "test",
+        "risk_level": "medium"
+    }
+
+
+class TestBatchedAnalysis:
+    """Test multi-entity prompts for nearby entities."""
+    
+    @pytest.fixture
+    def ready_engine(self, engine, monkeypatch):
+        # Every entity goes to Ollama so the prompts themselves are exercised
+        monkeypatch.setenv("TIERED_ESCALATION", "false")
+        engine.is_initialized = True
+        engine.ollama_available = True
+        engine.huggingface_available = False
+        return engine
+    
+    @pytest.fixture
+    def mock_ollama(self):
+        with patch('src.engine.ollama_client') as client:
+            client.__aenter__.return_value = client
+            client.analyze_json = AsyncMock(return_value=_verdict(1))
+            client.analyze_json_list = AsyncMock()
+            yield client
+    
+    def test_nearby_entities_are_grouped(self, engine):
+        """Close entities of one language share a group; distant or other-language ones do not."""
+        near = [_entity(i) for i in range(3)]
+        far = _entity(100)
+        korean = _entity(1).model_copy(update={"id": "korean", "language": "korean"})
+        
+        groups = engine._group_entities(near + [far, korean])
+        
+        assert [[entity.id for entity in group] for group in groups] == [
+            ["entity-0", "entity-1", "entity-2"], ["entity-100"], ["korean"]
+        ]
+    
+    def test_group_size_is_limited(self, engine):
+        """Groups never exceed the configured number of entities per prompt."""
+        groups = engine._group_entities([_entity(i) for i in range(25)])
+        assert max(len(group) for group in groups) <= 10
+        assert sum(len(group) for group in groups) == 25
+    
+    @pytest.mark.asyncio
+    async def test_one_prompt_for_nearby_entities(self, ready_engine, mock_ollama):
+        """Nearby entities are validated from a single batched prompt."""
+        entities = [_entity(i) for i in range(5)]
+        mock_ollama.analyze_json_list.return_value = [_verdict(n, n != 3) for n in range(1, 6)]
+        
+        response = await ready_engine.search(ContextSearchRequest(
+            text="x" * 400, languages=["english"], previous_detections=entities
+        ))
+        
+        assert mock_ollama.analyze_json_list.await_count == 1
+        assert mock_ollama.analyze_json.await_count == 0
+        assert [item.id for item in response.items] == ["entity-0", "entity-1", "entity-3", "entity-4"]
+        assert ready_engine.stats["ollama_prompts"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_missing_verdict_falls_back_to_single_prompt(self, ready_engine, mock_ollama):
+        """Entities left out of the batched answer are analyzed individually."""
+        entities = [_entity(i) for i in range(3)]
+        mock_ollama.analyze_json_list.return_value = [_verdict(1), _verdict(3)]
+        
+        response = await ready_engine.search(ContextSearchRequest(
+            text="x" * 400, languages=["english"], previous_detections=entities
+        ))
+        
+        assert mock_ollama.analyze_json.await_count == 1
+        assert mock_ollama.analyze_json.await_args.kwargs["entity"] == "user1@example.com"
+        assert len(response.items) == 3
+    
+    @pytest.mark.asyncio
+    async def test_failed_batch_falls_back_to_single_prompts(self, ready_engine, mock_ollama):
+        """An unparsable batched answer does not lose the entities of its group."""
+        entities = [_entity(i) for i in range(3)]
+        mock_ollama.analyze_json_list.side_effect = ValueError("no JSON array")
+        
+        response = await ready_engine.search(ContextSearchRequest(
+            text="x" * 400, languages=["english"], previous_detections=entities
+        ))
+        
+        assert mock_ollama.analyze_json.await_count == 3
+        assert len(response.items) == 3
+
+
+class TestVerdictCache:
+    """Test that repeated analyses are answered from the verdict cache."""
+    
+    @pytest.mark.asyncio
+    async def test_repeated_entity_uses_cached_ollama_verdict(self, engine, sample_entity):
+        engine.ollama_available = True
+        engine.huggingface_available = False
+        text = "Please reach me, my email is john@example.com"
+        
+        with patch('src.engine.ollama_client') as client:
+            client.__aenter__.return_value = client
+            client.analyze_json = AsyncMock(return_value=_verdict(1))
+            
+            first = await engine._analyze_with_ollama(text, sample_entity, text, AnalysisMode.STANDARD)
+            second = await engine._analyze_with_ollama(text, sample_entity, text, AnalysisMode.STANDARD)
+        
+        assert client.analyze_json.await_count == 1
+        assert second == first
+        assert engine.get_stats()["verdict_cache"]["memory_hits"] == 1
+
+
+def _occurrences(text, needle, entity_type=PIIType.EMAIL):
+    entities = []
+    start = text.find(needle)
+    while start != -1:
+        entities.append(DetectedEntity(
+            id=f"occurrence-{len(entities)}",
+            text=needle,
+            type=entity_type,
+            language="english",
+            position=Position(start=start, end=start + len(needle)),
+            probability=0.9,
+            confidence_level=ConfidenceLevel.HIGH
+        ))
+        start = text.find(needle, start + 1)
+    return entities
+
+
+class TestDeduplication:
+    """Test that repeated detections are analyzed once."""
+    
+    @pytest.fixture
+    def ready_engine(self, engine):
+        engine.is_initialized = True
+        engine.ollama_available = False
+        engine.huggingface_available = True
+        return engine
+    
+    @pytest.mark.asyncio
+    async def test_repeated_log_entity_is_analyzed_once(self, ready_engine):
+        """Occurrences of one email in alike log lines share one analysis."""
+        text = "".join(f"2024-01-01 12:00:{second:02d} INFO login succeeded user=john@example.com\n" for second in range(20))
+        entities = _occurrences(text, "john@example.com")
+        
+        async def analyze(text, entity, mode, threshold, ollama_result=None, huggingface_result=None):
+            return _refined(entity)
+        
+        with patch.object(ready_engine, '_analyze_entity', side_effect=analyze) as mock_analyze:
+            response = await ready_engine.search(ContextSearchRequest(
+                text=text, languages=["english"], previous_detections=entities
+            ))
+        
+        assert mock_analyze.await_count == 1
+        assert [item.id for item in response.items] == [entity.id for entity in entities]
+        assert all(item.representative_id == "occurrence-0" for item in response.items[1:])
+        assert all("deduplicated" in item.sources for item in response.items[1:])
+        assert response.analysis_metadata["entities_deduplicated"] == 19
+    
+    @pytest.mark.asyncio
+    async def test_unlike_contexts_are_analyzed_separately(self, ready_engine):
+        """The same text in unrelated surroundings is not deduplicated."""
+        text = (
+            "Jordan signed the rental contract for the apartment downtown last week. "
+            + "x " * 200
+            + "The Jordan river flows south through the valley into the Dead Sea."
+        )
+        entities = _occurrences(text, "Jordan", PIIType.NAME)
+        
+        async def analyze(text, entity, mode, threshold, ollama_result=None, huggingface_result=None):
+            return _refined(entity)
+        
+        with patch.object(ready_engine, '_analyze_entity', side_effect=analyze) as mock_analyze:
+            await ready_engine.search(ContextSearchRequest(
+                text=text, languages=["english"], previous_detections=entities
+            ))
+        
+        assert mock_analyze.await_count == 2
+    
+    def test_divergent_duplicates_are_flagged(self, engine, monkeypatch):
+        """With flag_divergent, copies with moderately different contexts are flagged."""
+        monkeypatch.setitem(engine_config._config["analysis"], "deduplication", {
+            "enabled": True, "min_context_similarity": 0.2, "flag_divergent": True, "divergence_threshold": 0.9
+        })
+        text = "call john@example.com about the invoice today\n" + " " * 400 + "call john@example.com about the contract tomorrow"
+        entities = _occurrences(text, "john@example.com")
+        
+        duplicates = engine._find_duplicates(text, entities)
+        results = engine._expand_duplicate_results(
+            text, entities, {"occurrence-0": _refined(entities[0])}, duplicates, 0.5
+        )
+        
+        assert duplicates["occurrence-1"][0] == "occurrence-0"
+        assert results[1].context_divergent is True
+        assert results[1].context.startswith(" ")
+
+
+class TestGenerationOptions:
+    """Test that analysis modes set the Ollama generation budget."""
+    
+    def test_mode_budget_maps_to_num_predict(self, engine):
+        options = engine._ollama_options(AnalysisMode.FAST)
+        assert options["num_predict"] == 100
+        assert options["temperature"] == 0.1
+        assert options["stop"]
+        assert engine._ollama_options(AnalysisMode.FAST, verdicts=3)["num_predict"] == 300
+    
+    @pytest.mark.asyncio
+    async def test_ollama_analysis_uses_mode_options(self, engine, sample_entity):
+        text = "Please reach me, my email is john@example.com"
+        
+        with patch('src.engine.ollama_client') as client:
+            client.__aenter__.return_value = client
+            client.analyze_json = AsyncMock(return_value=_verdict(1))
+            
+            await engine._analyze_with_ollama(text, sample_entity, text, AnalysisMode.THOROUGH)
+        
+        kwargs = client.analyze_json.await_args.kwargs
+        assert kwargs["options"]["num_predict"] == 300
+        assert kwargs["stats_label"] == "thorough"
+
+
+class TestDocumentPrefix:
+    """Test the shared document prefix layout for Ollama prompts."""
+    
+    @pytest.fixture
+    def ready_engine(self, engine, monkeypatch):
+        # Every entity goes to Ollama so the prompts themselves are exercised
+        monkeypatch.setenv("TIERED_ESCALATION", "false")
+        engine.is_initialized = True
+        engine.ollama_available = True
+        engine.huggingface_available = False
+        return engine
+    
+    @pytest.fixture
+    def document(self):
+        text = "." * 3000
+        entities = []
+        for index, start in enumerate((100, 1400, 2700)):
+            name = f"user{index}@example.com"
+            text = text[:start] + name + text[start + len(name):]
+            entities.append(DetectedEntity(
+                id=f"entity-{index}", text=name, type=PIIType.EMAIL, language="english",
+                position=Position(start=start, end=start + len(name)),
+                probability=0.9, confidence_level=ConfidenceLevel.HIGH
+            ))
+        return text, entities
+    
+    @pytest.mark.asyncio
+    async def test_prompts_share_document_prefix(self, ready_engine, document):
+        """Every entity prompt starts with the same instructions and document."""
+        text, entities = document
+        prompts, events = [], []
+        
+        async def analyze_json(**kwargs):
+            events.append("start")
+            prompts.append(kwargs["prompt_template"])
+            warming = prefix_warming.get()
+            generation_log.get().append({"prompt_eval_ms": 100.0 if warming else 10.0, "prefix_warming": warming})
+            await asyncio.sleep(0.01)
+            events.append("end")
+            return _verdict(1)
+        
+        with patch('src.engine.ollama_client') as client:
+            client.__aenter__.return_value = client
+            client.analyze_json = AsyncMock(side_effect=analyze_json)
+            
+            response = await ready_engine.search(ContextSearchRequest(
+                text=text, languages=["english"], previous_detections=entities
+            ))
+        
+        prefix = ready_engine.prompt_manager.get_document_prefix(text)
+        assert len(prompts) == 3
+        assert all(prompt.startswith(prefix) for prompt in prompts)
+        assert all(entity.text in prompt[len(prefix):] for entity, prompt in zip(entities, prompts))
+        assert client.analyze_json.await_args.kwargs["keep_alive"]
+        # The first call warms the prefix before the others start
+        assert events[:3] == ["start", "end", "start"]
+        
+        metrics = response.analysis_metadata["prefix_reuse"]
+        assert metrics["enabled"] is True
+        assert metrics["cold_prompt_eval_ms"] == 100.0
+        assert metrics["prompt_eval_ms_saved"] == 180.0
+    
+    @pytest.mark.asyncio
+    async def test_streamed_calls_are_measured_by_time_to_first_token(self, ready_engine, document):
+        """Calls stopped early report no prompt evaluation time, so their time to first token is compared."""
+        text, entities = document
+        
+        async def analyze_json(**kwargs):
+            warming = prefix_warming.get()
+            generation_log.get().append({
+                "prompt_eval_ms": None, "time_to_first_token_ms": 120.0 if warming else 30.0, "prefix_warming": warming
+            })
+            return _verdict(1)
+        
+        with patch('src.engine.ollama_client') as client:
+            client.__aenter__.return_value = client
+            client.analyze_json = AsyncMock(side_effect=analyze_json)
+            
+            response = await ready_engine.search(ContextSearchRequest(
+                text=text, languages=["english"], previous_detections=entities
+            ))
+        
+        metrics = response.analysis_metadata["prefix_reuse"]
+        assert metrics["measured_by"] == "time_to_first_token_ms"
+        assert metrics["cold_prompt_eval_ms"] == 120.0
+        assert metrics["prompt_eval_ms_saved"] == 180.0
+        assert ready_engine.stats["prompt_eval_ms_saved"] == 180.0
+    
+    def test_prefix_saving_needs_a_measured_warming_call(self, ready_engine, document):
+        """Without timings for the warming call and a follow-up no saving is claimed."""
+        text, _ = document
+        timings = [
+            {"prompt_eval_ms": None, "time_to_first_token_ms": None, "prefix_warming": True},
+            {"prompt_eval_ms": None, "time_to_first_token_ms": 30.0, "prefix_warming": False}
+        ]
+        
+        assert ready_engine._prefix_reuse_metrics(text, timings) == {"enabled": True, "ollama_calls": 2}
+        assert ready_engine.stats["prompt_eval_ms_saved"] == 0.0
+    
+    @pytest.mark.asyncio
+    async def test_long_documents_use_context_windows(self, ready_engine):
+        """Documents above the prefix limit fall back to per-entity context prompts."""
+        assert ready_engine._use_document_prefix("x" * 4000)
+        assert not ready_engine._use_document_prefix("x" * 4001)
+
+
+class TestTieredEscalation:
+    """Test that cheap tiers decide entities before Ollama is asked."""
+    
+    TEXT = "Call me at 415-867-5309 or ask Jordan; the form says SSN 000-12-3456."
+    
+    @pytest.fixture
+    def ready_engine(self, engine):
+        engine.is_initialized = True
+        engine.ollama_available = True
+        engine.huggingface_available = False
+        return engine
+    
+    @pytest.fixture
+    def entities(self):
+        def entity(entity_id, value, pii_type, probability):
+            start = self.TEXT.index(value)
+            return DetectedEntity(
+                id=entity_id,
+                text=value,
+                type=pii_type,
+                language="english",
+                position=Position(start=start, end=start + len(value)),
+                probability=probability,
+                confidence_level=ConfidenceLevel.HIGH
+            )
+        
+        return [
+            entity("phone", "415-867-5309", PIIType.PHONE, 0.95),
+            entity("name", "Jordan", PIIType.NAME, 0.8),
+            entity("ssn", "000-12-3456", PIIType.SSN, 0.95)
+        ]
+    
+    @pytest.fixture
+    def mock_ollama(self):
+        with patch('src.engine.ollama_client') as client:
+            client.__aenter__.return_value = client
+            client.analyze_json = AsyncMock(return_value=_verdict(1))
+            client.get_generation_stats.return_value = {"standard": {"avg_latency_ms": 400.0}}
+            yield client
+    
+    @pytest.mark.asyncio
+    async def test_validated_patterns_skip_ollama(self, ready_engine, entities, mock_ollama):
+        """Well-formed and never-issued values are decided by the validators; only the name is escalated."""
+        response = await ready_engine.search(ContextSearchRequest(
+            text=self.TEXT, languages=["english"], previous_detections=entities
+        ))
+        
+        assert mock_ollama.analyze_json.await_count == 1
+        assert mock_ollama.analyze_json.await_args.kwargs["entity"] == "Jordan"
+        assert [item.id for item in response.items] == ["phone", "name"]
+        assert response.analysis_metadata["resolution_tiers"] == {
+            "pattern": 2, "heuristic": 0, "local_model": 0, "ollama": 1
+        }
+        
+        escalation = ready_engine.get_stats()["escalation"]
+        assert escalation["shares"]["pattern"] == pytest.approx(2 / 3)
+        assert escalation["estimated_latency_saved_ms"] == 800.0
+    
+    @pytest.mark.asyncio
+    async def test_confident_local_verdict_depends_on_mode(self, ready_engine, entities, mock_ollama):
+        """A confident local verdict decides in standard mode; thorough mode escalates and reuses it."""
+        ready_engine.huggingface_available = True
+        local_verdict = {"is_genuine_pii": True, "confidence": 0.9, "reason": "local", "risk_level": "medium",
+                         "indicator_matched": True}
+        name = entities[1]
+        
+        with patch.object(ready_engine, '_analyze_with_huggingface', AsyncMock(return_value=local_verdict)) as local:
+            standard = await ready_engine.search(ContextSearchRequest(
+                text=self.TEXT, languages=["english"], previous_detections=[name]
+            ))
+            assert mock_ollama.analyze_json.await_count == 0
+            assert standard.analysis_metadata["resolution_tiers"]["local_model"] == 1
+            
+            thorough = await ready_engine.search(ContextSearchRequest(
+                text=self.TEXT, languages=["english"], previous_detections=[name],
+                analysis_mode=AnalysisMode.THOROUGH
+            ))
+        
+        assert mock_ollama.analyze_json.await_count == 1
+        assert local.await_count == 2
+        assert thorough.analysis_metadata["resolution_tiers"]["ollama"] == 1
+        assert "Ollama" in thorough.items[0].analysis_result.reason
+    
+    @pytest.mark.asyncio
+    async def test_fast_mode_uses_context_heuristics(self, ready_engine, mock_ollama):
+        """In fast mode a placeholder name is dropped by the heuristics without any model call."""
+        text = "Sample form: name test, signed by the applicant."
+        start = text.index("test")
+        entity = DetectedEntity(
+            id="name", text="test", type=PIIType.NAME, language="english",
+            position=Position(start=start, end=start + 4), probability=0.6,
+            confidence_level=ConfidenceLevel.LOW
+        )
+        
+        response = await ready_engine.search(ContextSearchRequest(
+            text=text, languages=["english"], previous_detections=[entity], analysis_mode=AnalysisMode.FAST
+        ))
+        
+        assert mock_ollama.analyze_json.await_count == 0
+        assert response.items == []
+        assert response.analysis_metadata["resolution_tiers"]["heuristic"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_fast_mode_escalates_names_without_indicators(self, ready_engine, mock_ollama):
+        """A name with no indicator in its context is not guessed by the heuristics."""
+        text = "The meeting notes were reviewed by Jordan Avery on Tuesday."
+        start = text.index("Jordan Avery")
+        entity = DetectedEntity(
+            id="name", text="Jordan Avery", type=PIIType.NAME, language="english",
+            position=Position(start=start, end=start + 12), probability=0.6,
+            confidence_level=ConfidenceLevel.LOW
+        )
+        
+        response = await ready_engine.search(ContextSearchRequest(
+            text=text, languages=["english"], previous_detections=[entity], analysis_mode=AnalysisMode.FAST
+        ))
+        
+        assert mock_ollama.analyze_json.await_count == 1
+        assert response.analysis_metadata["resolution_tiers"] == {
+            "pattern": 0, "heuristic": 0, "local_model": 0, "ollama": 1
+        }
+    
+    @pytest.mark.asyncio
+    async def test_validated_types_skip_the_heuristics(self, ready_engine, mock_ollama):
+        """An email the validators cannot decide is escalated even when its context has indicators."""
+        text = "Contact: jordan@localhost for the demo."
+        start = text.index("jordan@localhost")
+        entity = DetectedEntity(
+            id="email", text="jordan@localhost", type=PIIType.EMAIL, language="english",
+            position=Position(start=start, end=start + 16), probability=0.9,
+            confidence_level=ConfidenceLevel.HIGH
+        )
+        
+        response = await ready_engine.search(ContextSearchRequest(
+            text=text, languages=["english"], previous_detections=[entity], analysis_mode=AnalysisMode.FAST
+        ))
+        
+        assert mock_ollama.analyze_json.await_count == 1
+        assert response.analysis_metadata["resolution_tiers"]["heuristic"] == 0
+    
+    @pytest_asyncio.fixture
+    async def local_model(self, ready_engine):
+        """The real local client with a fake sentiment pipeline in place of the transformer."""
+        client = LocalHuggingFaceClient()
+        sentiment = {"label": "neutral", "score": 0.9}
+        client.classifier = MagicMock(side_effect=lambda texts, batch_size: [dict(sentiment) for _ in texts])
+        await client.start()
+        ready_engine.huggingface_available = True
+        with patch('src.engine.local_huggingface_client', client):
+            yield sentiment
+        await client.close()
+    
+    def _name_entity(self, text, name):
+        start = text.index(name)
+        return DetectedEntity(
+            id="name", text=name, type=PIIType.NAME, language="english",
+            position=Position(start=start, end=start + len(name)), probability=0.6,
+            confidence_level=ConfidenceLevel.LOW
+        )
+    
+    @pytest.mark.asyncio
+    async def test_local_model_escalates_names_without_indicators(self, ready_engine, local_model, mock_ollama):
+        """The heuristics' default guess for a plain name is not enough for the local tier."""
+        text = "The meeting notes were reviewed by Jordan Avery on Tuesday."
+        
+        for mode in (AnalysisMode.FAST, AnalysisMode.STANDARD):
+            response = await ready_engine.search(ContextSearchRequest(
+                text=text, languages=["english"], previous_detections=[self._name_entity(text, "Jordan Avery")],
+                analysis_mode=mode
+            ))
+            assert response.analysis_metadata["resolution_tiers"]["local_model"] == 0
+            assert response.analysis_metadata["resolution_tiers"]["ollama"] == 1
+        
+        assert mock_ollama.analyze_json.await_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_local_model_decides_when_sentiment_backs_an_indicator(self, ready_engine, local_model, mock_ollama):
+        """An indicator plus a strong negative sentiment decides in standard mode."""
+        text = "Please contact Jordan Avery about the lease."
+        local_model.update(label="negative", score=0.9)
+        
+        response = await ready_engine.search(ContextSearchRequest(
+            text=text, languages=["english"], previous_detections=[self._name_entity(text, "Jordan Avery")]
+        ))
+        
+        assert mock_ollama.analyze_json.await_count == 0
+        assert response.analysis_metadata["resolution_tiers"]["local_model"] == 1
+        assert [item.id for item in response.items] == ["name"]
+    
+    def test_local_not_pii_verdicts_need_sentiment_past_the_threshold(self, ready_engine):
+        """A false positive indicator backed by a positive sentiment can decide "not PII"."""
+        client = LocalHuggingFaceClient()
+        entity = {"entity_text": "Jordan Avery", "entity_type": "name", "context": "In the movie, Jordan Avery plays the villain."}
+        verdict = client._build_verdict(entity, {"label": "positive", "score": 0.9})
+        
+        assert verdict["is_genuine_pii"] is False and verdict["indicator_matched"]
+        assert ready_engine._local_verdict_is_decisive(verdict, 0.75)
+        assert not ready_engine._local_verdict_is_decisive(verdict, 0.85)
+        weak = client._build_verdict(entity, {"label": "positive", "score": 0.1})
+        assert not ready_engine._local_verdict_is_decisive(weak, 0.75)
+    
+    @pytest.mark.asyncio
+    async def test_disabled_escalation_sends_everything_to_ollama(self, ready_engine, entities, mock_ollama, monkeypatch):
+        """With escalation disabled every entity is part of the Ollama prompt."""
+        monkeypatch.setenv("TIERED_ESCALATION", "false")
+        mock_ollama.analyze_json_list = AsyncMock(return_value=[_verdict(n) for n in range(1, 4)])
+        
+        response = await ready_engine.search(ContextSearchRequest(
+            text=self.TEXT, languages=["english"], previous_detections=entities
+        ))
+        
+        assert mock_ollama.analyze_json_list.await_count == 1
+        assert len(response.items) == 3
+        assert ready_engine.tier_stats == {}
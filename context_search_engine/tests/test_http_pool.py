@@ -0,0 +1,69 @@
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.http_pool import HTTPConnectionPool
+from src.ollama_client import OllamaClient
+
+
+@pytest_asyncio.fixture
+async def ollama_server():
+    """Minimal stand-in for the Ollama HTTP API."""
+    async def tags(request):
+        return web.json_response({"models": []})
+    
+    app = web.Application()
+    app.router.add_get("/api/tags", tags)
+    server = TestServer(app)
+    await server.start_server()
+    yield server
+    await server.close()
+
+
+@pytest_asyncio.fixture
+async def pool(monkeypatch):
+    pool = HTTPConnectionPool(limit=5)
+    monkeypatch.setattr("src.ollama_client.http_pool", pool)
+    await pool.start()
+    yield pool
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_persistent_session_survives_context_exit(ollama_server, pool):
+    """A started client keeps one session and connection across context blocks."""
+    client = OllamaClient()
+    client.base_url = str(ollama_server.make_url("")).rstrip("/")
+    await client.start()
+    session = client.session
+    
+    for _ in range(3):
+        async with client as c:
+            assert await c.health_check()
+    
+    assert client.session is session and not session.closed
+    stats = pool.get_stats()
+    assert stats["requests"] == 3
+    assert stats["connections_created"] == 1
+    assert stats["connections_reused"] == 2
+    
+    await client.close()
+    assert client.session is None
+    assert not pool.connector.closed
+
+
+@pytest.mark.asyncio
+async def test_temporary_session_closed_by_last_user(ollama_server, pool):
+    """Without start(), nested users share a session that the last one closes."""
+    client = OllamaClient()
+    client.base_url = str(ollama_server.make_url("")).rstrip("/")
+    
+    async with client as outer:
+        async with client as inner:
+            assert inner.session is outer.session
+            assert await inner.health_check()
+        assert client.session is not None
+    
+    assert client.session is None
+    assert not pool.connector.closed
@@ -0,0 +1,64 @@
+import threading
+
+import pytest
+import pytest_asyncio
+
+from src.local_huggingface_client import LocalHuggingFaceClient
+
+
+class FakePipeline:
+    """Stand-in for the transformers sentiment pipeline that records its calls."""
+    
+    def __init__(self):
+        self.calls = []
+    
+    def __call__(self, texts, batch_size=None):
+        self.calls.append({"texts": texts, "batch_size": batch_size, "thread": threading.current_thread().name})
+        return [{"label": "negative" if "secret" in text else "positive", "score": 0.9} for text in texts]
+
+
+@pytest_asyncio.fixture
+async def client(monkeypatch):
+    client = LocalHuggingFaceClient()
+    pipeline = FakePipeline()
+    monkeypatch.setattr(client, "_load_model", lambda: setattr(client, "classifier", pipeline) or True)
+    yield client
+    await client.close()
+
+
+def _entities(*values):
+    return [{"entity_text": value, "entity_type": "name", "context": f"contact {value}"} for value in values]
+
+
+@pytest.mark.asyncio
+async def test_entities_are_classified_in_one_call_off_the_loop(client):
+    """All entities share one pipeline call, run on the inference thread."""
+    assert await client.start()
+    
+    verdicts = await client.classify_entities(_entities("Jordan", "secret agent", "Alex"))
+    
+    calls = client.classifier.calls
+    assert len(calls) == 1
+    assert len(calls[0]["texts"]) == 3
+    assert calls[0]["batch_size"] == client.batch_size
+    assert calls[0]["thread"] != threading.current_thread().name
+    assert [verdict["model"] for verdict in verdicts] == ["local_huggingface_hybrid"] * 3
+    assert verdicts[1]["confidence"] > verdicts[0]["confidence"]
+
+
+@pytest.mark.asyncio
+async def test_health_check_does_not_load_the_model(client):
+    """The model is only loaded by start(); health checks just report it."""
+    assert not await client.health_check()
+    assert client.classifier is None
+    
+    await client.start()
+    assert await client.health_check()
+
+
+@pytest.mark.asyncio
+async def test_unloaded_model_returns_fallback_verdicts(client):
+    verdicts = await client.classify_entities(_entities("Jordan", "Alex"))
+    
+    assert len(verdicts) == 2
+    assert all("error" in verdict and verdict["is_genuine_pii"] for verdict in verdicts)
@@ -0,0 +1,226 @@
+import asyncio
+import json
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.http_pool import HTTPConnectionPool
+from src.models import OllamaRequest
+from src.ollama_client import JSONStreamScanner, OllamaClient, generation_log
+
+
+class FakeOllama:
+    """Stand-in for the Ollama HTTP API that records the endpoints called."""
+    
+    def __init__(self, installed):
+        self.installed = set(installed)
+        self.calls = []
+        self.generate_bodies = []
+    
+    async def tags(self, request):
+        self.calls.append("tags")
+        return web.json_response({"models": [{"name": name} for name in sorted(self.installed)]})
+    
+    async def pull(self, request):
+        self.calls.append("pull")
+        self.installed.add((await request.json())["name"])
+        return web.json_response({"status": "success"})
+    
+    async def generate(self, request):
+        self.calls.append("generate")
+        body = await request.json()
+        self.generate_bodies.append(body)
+        model = body["model"]
+        if model not in self.installed:
+            return web.json_response({"error": f"model '{model}' not found, try pulling it first"}, status=404)
+        return web.json_response({
+            "model": model,
+            "response": '{"is_genuine_pii": true, "confidence": 0.9}',
+            "done": True,
+            "done_reason": "stop",
+            "prompt_eval_count": 40,
+            "eval_count": 12
+        })
+
+
+@pytest_asyncio.fixture
+async def fake_ollama(monkeypatch):
+    pool = HTTPConnectionPool(limit=5)
+    monkeypatch.setattr("src.ollama_client.http_pool", pool)
+    fake = FakeOllama(installed=["llama3.2:1b"])
+    app = web.Application()
+    app.router.add_get("/api/tags", fake.tags)
+    app.router.add_post("/api/pull", fake.pull)
+    app.router.add_post("/api/generate", fake.generate)
+    server = TestServer(app)
+    await server.start_server()
+    yield fake, str(server.make_url("")).rstrip("/")
+    await server.close()
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_generate_skips_model_check(fake_ollama):
+    """Generation goes straight to /api/generate when the model is installed."""
+    fake, url = fake_ollama
+    client = OllamaClient()
+    client.base_url = url
+    
+    async with client as c:
+        for _ in range(3):
+            await c.generate(OllamaRequest(model="llama3.2:1b", prompt="hi"))
+    
+    assert fake.calls == ["generate"] * 3
+
+
+@pytest.mark.asyncio
+async def test_missing_model_is_pulled_once(fake_ollama):
+    """A model-not-found error triggers one catalog check, a pull and a retry."""
+    fake, url = fake_ollama
+    client = OllamaClient()
+    client.base_url = url
+    
+    async with client as c:
+        response = await c.generate(OllamaRequest(model="qwen2.5:3b", prompt="hi"))
+        assert response.model == "qwen2.5:3b"
+        assert await c.check_model_exists("qwen2.5:3b")
+    
+    assert fake.calls == ["generate", "tags", "pull", "generate", "tags"]
+
+
+@pytest.mark.asyncio
+async def test_model_catalog_is_cached(fake_ollama):
+    """Repeated availability checks within the TTL reuse one /api/tags listing."""
+    fake, url = fake_ollama
+    client = OllamaClient()
+    client.base_url = url
+    
+    async with client as c:
+        assert await c.check_model_exists("llama3.2:1b")
+        assert not await c.check_model_exists("phi3:3.8b")
+        assert await c.check_model_exists("llama3.2:1b")
+        
+        client.model_catalog_ttl = 0
+        assert await c.check_model_exists("llama3.2:1b")
+    
+    assert fake.calls == ["tags", "tags"]
+
+
+@pytest.mark.asyncio
+async def test_analyze_json_sends_generation_options(fake_ollama):
+    """Mode options reach Ollama as num_predict/stop with JSON output, and usage is tracked."""
+    fake, url = fake_ollama
+    client = OllamaClient()
+    client.base_url = url
+    
+    async with client as c:
+        verdict = await c.analyze_json(
+            text="context",
+            prompt_template="Is {entity} PII in {text}?",
+            model="llama3.2:1b",
+            options={"num_predict": 100, "temperature": 0.2, "stop": ["```"]},
+            stats_label="fast",
+            entity="John"
+        )
+    
+    body = fake.generate_bodies[0]
+    assert verdict == {"is_genuine_pii": True, "confidence": 0.9}
+    assert body["prompt"] == "Is John PII in context?"
+    assert body["format"] == "json"
+    assert body["options"]["num_predict"] == 100
+    assert body["options"]["temperature"] == 0.2
+    assert body["options"]["stop"] == ["```"]
+    assert "max_tokens" not in body["options"]
+    
+    stats = client.get_generation_stats()["fast"]
+    assert stats["calls"] == 1
+    assert stats["generated_tokens"] == 12
+    assert stats["avg_generated_tokens"] == 12
+
+
+VERDICT_TOKENS = ['{"is_genuine', '_pii": true, ', '"confidence": 0.9, ', '"reason": "a {quoted} name"', '}']
+NUM_PREDICT = 100
+TOKEN_INTERVAL = 0.02
+
+
+@pytest_asyncio.fixture
+async def streaming_ollama(monkeypatch):
+    """Stub server streaming an NDJSON verdict, then whitespace up to the token budget.
+    
+    Ollama's JSON mode can pad a finished object with whitespace until num_predict is
+    used up, which is the case the early stop and its saving bound are for.
+    """
+    pool = HTTPConnectionPool(limit=5)
+    monkeypatch.setattr("src.ollama_client.http_pool", pool)
+    state = {"tokens_sent": 0, "disconnected": False, "finished": False}
+    
+    async def generate(request):
+        body = await request.json()
+        response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await response.prepare(request)
+        try:
+            for token in VERDICT_TOKENS + ["\n"] * (NUM_PREDICT - len(VERDICT_TOKENS)):
+                chunk = {"model": body["model"], "response": token, "done": False}
+                await response.write((json.dumps(chunk) + "\n").encode())
+                state["tokens_sent"] += 1
+                await asyncio.sleep(TOKEN_INTERVAL)
+            await response.write((json.dumps({"model": body["model"], "response": "", "done": True}) + "\n").encode())
+            state["finished"] = True
+        except (ConnectionResetError, asyncio.CancelledError):
+            state["disconnected"] = True
+            raise
+        return response
+    
+    app = web.Application()
+    app.router.add_post("/api/generate", generate)
+    server = TestServer(app)
+    await server.start_server()
+    yield state, str(server.make_url("")).rstrip("/")
+    await server.close()
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_stream_stops_once_verdict_is_complete(streaming_ollama):
+    """The client returns at the closing brace and drops the connection mid-stream."""
+    state, url = streaming_ollama
+    client = OllamaClient()
+    client.base_url = url
+    
+    timings = []
+    log_token = generation_log.set(timings)
+    async with client as c:
+        verdict = await c.analyze_json(
+            text="context",
+            prompt_template="prompt",
+            options={"num_predict": NUM_PREDICT},
+            stats_label="standard"
+        )
+    generation_log.reset(log_token)
+    
+    assert verdict == {"is_genuine_pii": True, "confidence": 0.9, "reason": "a {quoted} name"}
+    # The stream never reached the final chunk that carries Ollama's prompt timings
+    assert timings[0]["prompt_eval_ms"] is None
+    assert timings[0]["time_to_first_token_ms"] > 0
+    for _ in range(50):
+        if state["disconnected"]:
+            break
+        await asyncio.sleep(0.02)
+    assert state["disconnected"] and not state["finished"]
+    assert state["tokens_sent"] < 10
+    
+    stats = client.get_generation_stats()["standard"]
+    assert stats["early_stops"] == 1
+    assert stats["generated_tokens"] == len(VERDICT_TOKENS)
+    # The padding the stub would still have streamed is what the bound must cover
+    padding = NUM_PREDICT - len(VERDICT_TOKENS)
+    assert stats["time_saved_upper_bound_ms"] >= padding * TOKEN_INTERVAL * 1000
+
+
+def test_scanner_ignores_braces_in_strings_and_prose():
+    scanner = JSONStreamScanner()
+    assert scanner.feed('Sure! Here is {not json} and ') is None
+    assert scanner.feed('{"reason": "uses \\"}\\" inside", "n": [1, {"a": 2}]') is None
+    assert scanner.feed('}\n\n') == '{"reason": "uses \\"}\\" inside", "n": [1, {"a": 2}]}'
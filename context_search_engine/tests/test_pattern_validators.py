@@ -0,0 +1,31 @@
+import pytest
+
+from src.pattern_validators import luhn_valid, validate_entity_text
+
+
+@pytest.mark.parametrize("entity_type, text, expected", [
+    ("email", "jane.roe@acme-corp.com", True),
+    ("email", "john@example.com", False),
+    ("email", "not an email", None),
+    ("credit_card", "4539 1488 0343 6467", True),
+    ("credit_card", "4111-1111-1111-1111", False),
+    ("credit_card", "4539 1488 0343 6468", False),
+    ("ssn", "536-22-1234", True),
+    ("ssn", "666-12-3456", False),
+    ("ssn", "123-45-6789", False),
+    ("phone", "+1 (415) 867-5309", True),
+    ("phone", "555-0142", False),
+    ("phone", "12", None),
+    ("name", "Jordan", None),
+])
+def test_validate_entity_text(entity_type, text, expected):
+    decision = validate_entity_text(entity_type, text)
+    if expected is None:
+        assert decision is None
+    else:
+        assert decision[0] is expected
+
+
+def test_luhn_valid():
+    assert luhn_valid("79927398713")
+    assert not luhn_valid("79927398710")
@@ -0,0 +1,105 @@
+import threading
+import time
+
+from src.verdict_cache import VerdictCache
+
+
+def _key(context="Contact John at the office", **overrides):
+    fields = {
+        "backend": "ollama",
+        "model": "llama3.2:1b",
+        "prompt_version": "1.0.0",
+        "entity_text": "John",
+        "entity_type": "name",
+        "context": context
+    }
+    fields.update(overrides)
+    return VerdictCache.make_key(**fields)
+
+
+def test_key_normalizes_context_whitespace_and_case():
+    assert _key("Contact  John\nat the OFFICE") == _key()
+    assert _key(model="phi3:3.8b") != _key()
+    assert _key(prompt_version="1.1.0") != _key()
+    assert _key(entity_type="organization") != _key()
+
+
+def test_memory_hit_and_ttl_expiry():
+    cache = VerdictCache(ttl=60)
+    cache.put(_key(), {"is_genuine_pii": True, "confidence": 0.9})
+    
+    assert cache.get(_key()) == {"is_genuine_pii": True, "confidence": 0.9}
+    
+    cache.ttl = 0
+    time.sleep(0.01)
+    assert cache.get(_key()) is None
+    
+    stats = cache.get_stats()
+    assert stats["memory_hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_ratio"] == 0.5
+
+
+def test_lru_eviction():
+    cache = VerdictCache(max_entries=2)
+    for name in ("a", "b", "c"):
+        cache.put(_key(entity_text=name), {"entity": name})
+    
+    assert cache.get(_key(entity_text="a")) is None
+    assert cache.get(_key(entity_text="c")) == {"entity": "c"}
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "verdicts.sqlite")
+    cache = VerdictCache(disk_path=path)
+    cache.put(_key(), {"is_genuine_pii": False})
+    cache.close()
+    
+    restarted = VerdictCache(disk_path=path)
+    assert restarted.get(_key()) == {"is_genuine_pii": False}
+    assert restarted.get(_key()) == {"is_genuine_pii": False}
+    stats = restarted.get_stats()
+    assert stats["disk_hits"] == 1
+    assert stats["memory_hits"] == 1
+    restarted.close()
+
+
+def test_disk_writes_are_batched_on_the_writer_thread(tmp_path):
+    """put only queues the row; commits happen off the caller's thread, several rows at a time."""
+    path = str(tmp_path / "verdicts.sqlite")
+    cache = VerdictCache(disk_path=path)
+    release = threading.Event()
+    cache._writer.submit(release.wait, 5)
+    
+    for name in "abcde":
+        cache.put(_key(entity_text=name), {"entity": name})
+    # The writer is busy, so nothing has reached the disk yet and the memory tier serves reads
+    assert len(cache._pending_writes) == 5
+    assert cache.get(_key(entity_text="c")) == {"entity": "c"}
+    
+    release.set()
+    cache.close()
+    restarted = VerdictCache(disk_path=path)
+    assert [restarted.get(_key(entity_text=name)) for name in "abcde"] == [{"entity": name} for name in "abcde"]
+    assert restarted.get_stats()["disk_hits"] == 5
+    restarted.close()
+
+
+def test_clear_drops_queued_disk_writes(tmp_path):
+    path = str(tmp_path / "verdicts.sqlite")
+    cache = VerdictCache(disk_path=path)
+    cache.put(_key(), {"is_genuine_pii": True})
+    cache.clear()
+    cache.close()
+    
+    restarted = VerdictCache(disk_path=path)
+    assert restarted.get(_key()) is None
+    restarted.close()
+
+
+def test_disabled_cache_stores_nothing():
+    cache = VerdictCache(enabled=False)
+    cache.put(_key(), {"is_genuine_pii": True})
+    assert cache.get(_key()) is None
+    assert cache.get_stats()["entries"] == 0
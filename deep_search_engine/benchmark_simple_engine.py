@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+Simple Learning Engine Benchmark
+
+Measures per-request classification time of the Simple Learning Engine on
+synthetic documents of increasing size. Run from the deep_search_engine
+directory so the active model in models/runtime is picked up, or the model
+shipped in models/active when nothing has been deployed yet:
+
+    python benchmark_simple_engine.py
+"""
+
+import asyncio
+import pickle
+import random
+import re
+import sys
+import os
+import tempfile
+import time
+from bisect import bisect_left
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.simple_learning_engine import SimpleLearningEngine
+from src.model_pool import PooledModel
+from src.stage1_index import Stage1WeightIndex
+from src.compact_model import compact_path_for, export_compact_model, load_compact_model
+from src.online_learner import OnlineClassifier
+from src.probability_cache import TokenProbabilityCache
+from src.models import DeepSearchRequest
+from src.ner_segmentation import basic_segment_text, resolve_overlaps, scan_patterns
+
+WORDS = [
+    "the", "meeting", "report", "Contact", "John", "Smith", "Jane", "Doe", "Acme", "Corp",
+    "please", "review", "document", "Seoul", "Paris", "555-123-4567", "john.doe@example.com",
+    "123-45-6789", "Main", "Street", "Monday", "invoice", "2024", "order", "#4821", "Inc",
+    "shipping", "address", "New", "York", "NY", "10001", "backup", "completed", "Maria", "Garcia",
+]
+
+DOCUMENT_SIZES = [200, 1000, 5000]
+REPEATS = 5
+
+
+def make_document(token_count: int, seed: int = 42) -> str:
+    """Build a synthetic document with a realistic mix of PII and filler tokens."""
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(token_count))
+
+
+async def classify_per_segment(engine: SimpleLearningEngine, request: DeepSearchRequest) -> int:
+    """Reference implementation: one model call per segment, without the probability cache."""
+    cache = engine.probability_cache
+    engine.probability_cache = TokenProbabilityCache(max_bytes=0)
+    try:
+        stage1_weights = engine._process_stage1_weights([])
+        detected = 0
+        for segment in engine._segment_text_enhanced(request.text):
+            if len(segment['text'].strip()) > 0:
+                stage1_weight = engine._find_stage1_weight(segment, stage1_weights)
+                if await engine._classify_segment_with_weights(segment, request.confidence_threshold, stage1_weight):
+                    detected += 1
+        return detected
+    finally:
+        engine.probability_cache = cache
+
+
+async def time_call(func, *args) -> float:
+    """Return the best wall-clock time in milliseconds over REPEATS runs."""
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        await func(*args)
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+async def search_uncached(engine: SimpleLearningEngine, request: DeepSearchRequest):
+    engine.probability_cache.clear()
+    return await engine.search(request)
+
+
+async def benchmark_search(engine: SimpleLearningEngine):
+    print("\nPer-request classification time")
+    print(f"{'tokens':>8} {'per-segment (ms)':>18} {'batched (ms)':>14} {'speedup':>9} {'cached (ms)':>13}")
+
+    for size in DOCUMENT_SIZES:
+        request = DeepSearchRequest(text=make_document(size), languages=["english"], confidence_threshold=0.7)
+        per_segment = await time_call(classify_per_segment, engine, request)
+        batched = await time_call(search_uncached, engine, request)
+        # Steady state: every token was seen by an earlier request
+        cached = await time_call(engine.search, request)
+        print(f"{size:>8} {per_segment:>18.1f} {batched:>14.1f} {per_segment / batched:>8.1f}x {cached:>13.1f}")
+    print(f"  probability cache: {engine.probability_cache.get_stats()}")
+
+
+def benchmark_stage1_lookup(engine: SimpleLearningEngine, count: int = 10000, linear_sample: int = 500):
+    """Compare linear and indexed Stage 1 lookups for count segments against count weights."""
+    rng = random.Random(7)
+    # Stage 1 hits are real spans of a long document, most of them far from any given segment
+    tokens = [f"{rng.choice(WORDS)}{rng.randint(0, 99999)}" for _ in range(count * 3)]
+    document = " ".join(tokens)
+    all_segments = engine._segment_text_enhanced(document)
+    segments = all_segments[:count]
+    raw_weights = [
+        {
+            'text': segment['text'],
+            'type': 'name',
+            'position': {'start': segment['start'], 'end': segment['end']}
+        }
+        for segment in rng.sample(all_segments, count)
+    ]
+    stage1_weights = engine._process_stage1_weights(raw_weights)
+
+    start = time.perf_counter()
+    index = Stage1WeightIndex(stage1_weights)
+    indexed_matches = [index.find(segment) for segment in segments]
+    indexed_ms = (time.perf_counter() - start) * 1000
+
+    # The linear scan is too slow to run in full; time a sample and extrapolate
+    sample = segments[:linear_sample]
+    start = time.perf_counter()
+    linear_matches = [engine._find_stage1_weight(segment, stage1_weights) for segment in sample]
+    linear_ms = (time.perf_counter() - start) * 1000 * len(segments) / len(sample)
+
+    assert all(a is b for a, b in zip(linear_matches, indexed_matches)), "index and linear lookup disagree"
+
+    print(f"\nStage 1 lookup: {len(segments)} segments x {len(stage1_weights)} weights")
+    print(f"  linear (extrapolated from {len(sample)}): {linear_ms:>10.1f} ms")
+    print(f"  indexed (including build):       {indexed_ms:>10.1f} ms")
+    print(f"  speedup:                         {linear_ms / indexed_ms:>10.1f}x")
+
+
+def benchmark_model_load(vocabulary_size: int = 200000, repeats: int = 5):
+    """Compare unpickling a large classifier with opening its compact export."""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+
+    rng = random.Random(11)
+    texts = [
+        " ".join(f"term{rng.randint(0, vocabulary_size)}" for _ in range(12))
+        for _ in range(vocabulary_size // 4)
+    ]
+    labels = [rng.choice(["pii", "non_pii"]) for _ in texts]
+    model = Pipeline([
+        ('tfidf', TfidfVectorizer(max_features=vocabulary_size, ngram_range=(1, 1))),
+        ('classifier', LogisticRegression(max_iter=50))
+    ])
+    model.fit(texts, labels)
+
+    def best_of(load) -> float:
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            load()
+            timings.append((time.perf_counter() - start) * 1000)
+        return min(timings)
+
+    with tempfile.TemporaryDirectory() as directory:
+        model_file = os.path.join(directory, "simple_classifier.pkl")
+        with open(model_file, 'wb') as f:
+            pickle.dump(model, f)
+        compact_path = export_compact_model(model, compact_path_for(model_file))
+
+        def load_pickle():
+            with open(model_file, 'rb') as f:
+                return pickle.load(f)
+
+        pickle_ms = best_of(load_pickle)
+        compact_ms = best_of(lambda: load_compact_model(compact_path))
+
+    print(f"\nModel load ({len(model.named_steps['tfidf'].vocabulary_)} features)")
+    print(f"  pickle:  {pickle_ms:>8.2f} ms")
+    print(f"  compact: {compact_ms:>8.2f} ms")
+
+
+def benchmark_incremental_update(total_samples: int = 20000, batch_size: int = 50):
+    """Compare refitting TF-IDF + logistic regression on all data with one partial_fit per batch."""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+
+    rng = random.Random(5)
+    texts = [" ".join(rng.choice(WORDS) + str(rng.randint(0, 999)) for _ in range(3)) for _ in range(total_samples)]
+    labels = [rng.choice(["pii", "non_pii"]) for _ in texts]
+    batch_texts, batch_labels = texts[-batch_size:], labels[-batch_size:]
+
+    start = time.perf_counter()
+    Pipeline([
+        ('tfidf', TfidfVectorizer(max_features=1000, ngram_range=(1, 2))),
+        ('classifier', LogisticRegression(random_state=42))
+    ]).fit(texts, labels)
+    refit_ms = (time.perf_counter() - start) * 1000
+
+    model = OnlineClassifier()
+    model.partial_fit(texts[:-batch_size], labels[:-batch_size])
+    start = time.perf_counter()
+    model.partial_fit(batch_texts, batch_labels)
+    update_ms = (time.perf_counter() - start) * 1000
+
+    print(f"\nTraining update ({batch_size} new samples, {total_samples} total)")
+    print(f"  full refit:  {refit_ms:>8.2f} ms")
+    print(f"  partial_fit: {update_ms:>8.2f} ms")
+
+
+def benchmark_overlap_resolution(token_count: int = 20000):
+    """Compare pairwise overlap checks with the sorted sweep on NER-sized segment lists."""
+    document = make_document(token_count)
+    tokens, position = [], 0
+    for word in document.split(" "):
+        # Every other word stands in for a kept spaCy token
+        if len(tokens) % 2 == 0:
+            tokens.append({'text': word, 'start': position, 'end': position + len(word)})
+        else:
+            tokens.append(None)
+        position += len(word) + 1
+    tokens = [token for token in tokens if token]
+    priority_classes = [tokens] + list(scan_patterns(document).values())
+
+    start = time.perf_counter()
+    swept = list(resolve_overlaps(priority_classes))
+    sweep_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    kept = []
+    for candidates in priority_classes:
+        for candidate in candidates:
+            if not any(candidate['start'] < other['end'] and candidate['end'] > other['start'] for other in kept):
+                kept.append(candidate)
+    kept.sort(key=lambda segment: segment['start'])
+    pairwise_ms = (time.perf_counter() - start) * 1000
+
+    assert kept == swept, "sweep and pairwise overlap resolution disagree"
+    candidates = sum(len(segments) for segments in priority_classes)
+    print(f"\nOverlap resolution ({candidates} candidate segments)")
+    print(f"  pairwise: {pairwise_ms:>10.1f} ms")
+    print(f"  sweep:    {sweep_ms:>10.1f} ms")
+
+
+def _whitespace_segments(text: str):
+    """Segmentation before script-aware splitting: (start, end) of whitespace words that could be PII."""
+    return [
+        (match.start(), match.end()) for match in re.finditer(r"\S+", text)
+        if match.group()[0].isupper() or any(c.isdigit() for c in match.group()) or '@' in match.group()
+    ]
+
+
+def _names_hit(spans, names) -> float:
+    """Fraction of names that contain at least one segment span."""
+    spans = sorted(spans)
+    hit = 0
+    for name_start, name_end in names:
+        i = bisect_left(spans, (name_start,))
+        if i < len(spans) and spans[i][1] <= name_end:
+            hit += 1
+    return hit / len(names)
+
+
+def make_cjk_document(locale: str, records: int = 200, seed: int = 42):
+    """Build a document from Faker data for a locale; returns the text and the name spans."""
+    from faker import Faker
+
+    faker = Faker(locale)
+    faker.seed_instance(seed)
+    separator = " " if locale == "ko_KR" else ""
+    parts, names, position = [], [], 0
+    for _ in range(records):
+        for kind, value in (("filler", faker.text(60)), ("name", faker.name()), ("address", faker.address()),
+                            ("company", faker.company()), ("phone", faker.phone_number())):
+            value = value.replace("\n", separator)
+            if kind == "name":
+                names.append((position, position + len(value)))
+            parts.append(value)
+            position += len(value) + len(separator)
+    return separator.join(parts), names
+
+
+async def benchmark_cjk_segmentation(engine: SimpleLearningEngine):
+    """Segment Chinese, Japanese and Korean documents built with the labeling data generator's locales."""
+    # Both projects name their package "src", so load the generator module by path
+    import importlib.util
+    generator_path = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "..", "deep_search_labeling", "backend", "src", "data_generator.py"
+    )
+    spec = importlib.util.spec_from_file_location("data_generator", generator_path)
+    data_generator = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(data_generator)
+    PIIDataGenerator = data_generator.PIIDataGenerator
+
+    print("\nCJK segmentation (200 records per locale; names hit = names containing a segment)")
+    print(f"{'locale':>8} {'method':>14} {'segments':>9} {'longest':>8} {'names hit':>10} {'time (ms)':>10}")
+    for language in ("chinese", "japanese", "korean"):
+        locale = PIIDataGenerator.LOCALES[language]
+        text, names = make_cjk_document(locale)
+
+        start = time.perf_counter()
+        words = _whitespace_segments(text)
+        whitespace_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        segments = basic_segment_text(text)
+        script_ms = (time.perf_counter() - start) * 1000
+        spans = [(segment['start'], segment['end']) for segment in segments]
+
+        for method, method_spans, elapsed in (("whitespace", words, whitespace_ms), ("script-aware", spans, script_ms)):
+            longest = max((end - start for start, end in method_spans), default=0)
+            print(f"{locale:>8} {method:>14} {len(method_spans):>9} {longest:>8} "
+                  f"{_names_hit(method_spans, names):>9.0%} {elapsed:>10.1f}")
+
+        request = DeepSearchRequest(text=text, languages=[language], confidence_threshold=0.7)
+        search_ms = await time_call(search_uncached, engine, request)
+        print(f"{locale:>8} {'search':>14} {'':>9} {'':>8} {'':>10} {search_ms:>10.1f}")
+
+
+async def benchmark_shadow_overhead(engine: SimpleLearningEngine, size: int = 5000, requests: int = 20):
+    """Median primary search latency with shadow scoring of every request off and on."""
+    request = DeepSearchRequest(text=make_document(size), languages=["english"], confidence_threshold=0.7)
+    candidate = PooledModel("benchmark", engine.model, 0)
+    evaluator = engine.shadow_evaluator
+    configured_ratio, evaluator.max_pending = evaluator.pause_ratio, requests
+
+    async def median_latency() -> float:
+        timings = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            await engine.search(request)
+            timings.append((time.perf_counter() - start) * 1000)
+            await asyncio.sleep(0)
+        return sorted(timings)[len(timings) // 2]
+
+    print(f"\nPrimary latency with shadowing ({size} tokens, every request sampled)")
+    print(f"  off:                       {await median_latency():>8.1f} ms")
+    for pause_ratio in (0.0, configured_ratio):
+        evaluator.pause_ratio = pause_ratio
+        evaluator.start(candidate, "benchmark", sample_rate=1.0)
+        shadowed = await median_latency()
+        report = await evaluator.stop()
+        print(f"  on, pause ratio {pause_ratio:<4}:     {shadowed:>8.1f} ms "
+              f"({report['evaluated']} scored, {report['over_budget']} over budget)")
+    evaluator.pause_ratio = configured_ratio
+
+
+async def main():
+    engine = SimpleLearningEngine()
+    await engine.initialize()
+
+    await benchmark_search(engine)
+    await benchmark_shadow_overhead(engine)
+    benchmark_stage1_lookup(engine)
+    benchmark_model_load()
+    benchmark_incremental_update()
+    benchmark_overlap_resolution()
+    await benchmark_cjk_segmentation(engine)
+
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.WARNING)
+    asyncio.run(main())
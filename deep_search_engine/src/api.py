@@ -39,6 +39,7 @@ app.add_middleware(
 # Initialize the deep search engine and model manager
 engine = DeepSearchEngine()
 model_manager = ModelManager()
+engine.simple_engine.set_model_manager(model_manager)
 
 @app.on_event("startup")
 async def startup_event():
@@ -51,6 +52,11 @@ async def startup_event():
         logger.error(f"Failed to initialize engine: {e}")
         raise
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background training on shutdown."""
+    await engine.shutdown()
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
@@ -94,6 +100,9 @@ async def deep_search(request: DeepSearchRequest) -> Dict[str, Any]:
                 detail=f"Text exceeds maximum length of {config.max_text_length} characters"
             )
         
+        if request.model_version and not model_manager.has_model(request.model_version):
+            raise HTTPException(status_code=404, detail=f"Model version {request.model_version} not found")
+        
         # Perform deep search
         logger.info(f"Performing deep search for {len(request.languages)} languages")
         response = await engine.search(request)
@@ -227,11 +236,8 @@ async def deploy_model(deploy_data: Dict[str, Any]):
         if not model_version:
             raise HTTPException(status_code=400, detail="model_version is required")
         
-        # Deploy the model
-        model_manager.deploy_model(model_version, replace_current)
-        
-        # Reload the engine with the new model
-        await engine.reload_model()
+        # Deploy the model and reload the engine with it, after any model update in flight
+        await engine.reload_model(lambda: model_manager.deploy_model(model_version, replace_current))
         
         return {
             "success": True,
@@ -274,11 +280,8 @@ async def rollback_model(rollback_data: Dict[str, str]):
         if not backup_id:
             raise HTTPException(status_code=400, detail="backup_id is required")
         
-        # Rollback the model
-        model_manager.rollback_model(backup_id)
-        
-        # Reload the engine with the restored model
-        await engine.reload_model()
+        # Rollback the model and reload the engine with it, after any model update in flight
+        await engine.reload_model(lambda: model_manager.rollback_model(backup_id))
         
         return {
             "success": True,
@@ -293,6 +296,61 @@ async def rollback_model(rollback_data: Dict[str, str]):
         logger.error(f"Failed to rollback model: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/model/shadow")
+async def start_shadow_evaluation(shadow_data: Dict[str, Any]):
+    """Score a sample of live searches with a candidate version, without affecting responses."""
+    try:
+        model_version = shadow_data.get("model_version")
+        sample_rate = shadow_data.get("sample_rate")
+        
+        if not model_version:
+            raise HTTPException(status_code=400, detail="model_version is required")
+        if not model_manager.has_model(model_version):
+            raise HTTPException(status_code=404, detail=f"Model version {model_version} not found")
+        
+        report = await engine.start_shadow_evaluation(
+            model_version, float(sample_rate) if sample_rate is not None else None
+        )
+        
+        return {
+            "success": True,
+            "message": f"Shadow evaluation of model {model_version} started",
+            "data": report
+        }
+        
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to start shadow evaluation: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/model/shadow")
+async def get_shadow_report():
+    """Get latency, agreement and probability drift of the shadow candidate."""
+    try:
+        return {
+            "success": True,
+            "data": engine.get_shadow_report()
+        }
+    except Exception as e:
+        logger.error(f"Failed to get shadow report: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.delete("/model/shadow")
+async def stop_shadow_evaluation():
+    """Stop shadow evaluation and return the final report."""
+    try:
+        return {
+            "success": True,
+            "message": "Shadow evaluation stopped",
+            "data": await engine.stop_shadow_evaluation()
+        }
+    except Exception as e:
+        logger.error(f"Failed to stop shadow evaluation: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 # Cascaded Detection Endpoints
 
 @app.post("/detection/set-cascaded")
@@ -369,6 +427,9 @@ async def search_with_separate_results(request: DeepSearchRequest):
                 detail="Separate results only available with cascaded detection enabled"
             )
         
+        if request.model_version:
+            raise HTTPException(status_code=400, detail="model_version is not supported for separate results")
+        
         # Perform search with separate results
         logger.info(f"Performing separate results search for {len(request.languages)} languages")
         response = await engine.search_with_separate_results(request)
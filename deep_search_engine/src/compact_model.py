@@ -0,0 +1,414 @@
+"""
+Compact, memory-mappable model format for the simple classifier.
+
+A trained TF-IDF + logistic regression ``Pipeline`` is exported to a directory of
+plain NumPy arrays that are memory-mapped on load:
+
+    manifest.json        format version, classes and vectorizer settings
+    vocab_bytes.npy      UTF-8 bytes of every vocabulary term, sorted
+    vocab_offsets.npy    start offset of each term in vocab_bytes (plus end sentinel)
+    vocab_columns.npy    feature column of each term
+    idf.npy              IDF weight per feature column
+    coef.npy             logistic regression coefficient per feature column
+
+An online classifier trained on hashed features (see ``online_learner``) has no
+vocabulary; its export is just ``manifest.json`` and ``coef.npy``, and the same
+``HashedFeatures`` function maps terms to columns at training and inference time.
+
+Loading only parses the small manifest; the arrays are mapped read-only, so model
+load is near-instant and worker processes share the same pages. Inference is done
+by ``CompactLinearClassifier`` or ``CompactHashedClassifier`` in pure NumPy, without
+unpickling scikit-learn objects.
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import zlib
+from pathlib import Path
+from typing import List, Dict, Any, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+COMPACT_FORMAT = "tfidf-logistic"
+HASHED_FORMAT = "hashed-logistic"
+COMPACT_FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+
+DEFAULT_TOKEN_PATTERN = r"(?u)\b\w\w+\b"
+
+
+def compact_path_for(model_file: Union[str, Path]) -> Path:
+    """Return the compact export directory that belongs to a pickled model file."""
+    return Path(model_file).with_suffix(".compact")
+
+
+def analyze_words(text: str, token_pattern: re.Pattern, lowercase: bool, ngram_range: Tuple[int, int]) -> List[str]:
+    """Tokenize and build word n-grams the same way TfidfVectorizer does."""
+    if lowercase:
+        text = text.lower()
+    tokens = token_pattern.findall(text)
+
+    min_n, max_n = ngram_range
+    if max_n == 1:
+        return tokens
+
+    terms = list(tokens) if min_n == 1 else []
+    for n in range(max(min_n, 2), max_n + 1):
+        for i in range(len(tokens) - n + 1):
+            terms.append(" ".join(tokens[i:i + n]))
+    return terms
+
+
+class HashedFeatures:
+    """Maps texts to l2-normalized word n-gram counts in a fixed number of hashed columns.
+
+    Columns are the CRC32 of the UTF-8 term modulo ``n_features``, which is stable
+    across processes and Python versions, so a model trained in one process can be
+    scored from its compact export in another.
+    """
+
+    def __init__(self, n_features: int = 2 ** 18, ngram_range: Tuple[int, int] = (1, 2),
+                 lowercase: bool = True, token_pattern: str = DEFAULT_TOKEN_PATTERN):
+        self.n_features = int(n_features)
+        self.ngram_range = tuple(ngram_range)
+        self.lowercase = lowercase
+        self.token_pattern = token_pattern
+        self._compiled_pattern = re.compile(token_pattern)
+
+    @classmethod
+    def from_settings(cls, settings: Dict[str, Any]) -> "HashedFeatures":
+        return cls(settings["n_features"], settings["ngram_range"], settings["lowercase"], settings["token_pattern"])
+
+    def settings(self) -> Dict[str, Any]:
+        return {
+            "n_features": self.n_features,
+            "ngram_range": list(self.ngram_range),
+            "lowercase": self.lowercase,
+            "token_pattern": self.token_pattern,
+        }
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_compiled_pattern"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._compiled_pattern = re.compile(self.token_pattern)
+
+    def column(self, term: str) -> int:
+        return zlib.crc32(term.encode('utf-8')) % self.n_features
+
+    def transform_pairs(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return (rows, columns, values) of the sparse feature matrix for texts."""
+        rows, columns = [], []
+        column_cache: Dict[str, int] = {}
+        for row, text in enumerate(texts):
+            for term in analyze_words(text, self._compiled_pattern, self.lowercase, self.ngram_range):
+                column = column_cache.get(term)
+                if column is None:
+                    column = column_cache[term] = self.column(term)
+                rows.append(row)
+                columns.append(column)
+
+        if not rows:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, np.zeros(0, dtype=np.float64)
+
+        pairs = np.array(rows, dtype=np.int64) * self.n_features + np.array(columns, dtype=np.int64)
+        unique_pairs, counts = np.unique(pairs, return_counts=True)
+        pair_rows = unique_pairs // self.n_features
+        pair_columns = unique_pairs % self.n_features
+
+        values = counts.astype(np.float64)
+        norms = np.sqrt(np.bincount(pair_rows, weights=values * values, minlength=len(texts)))
+        values /= norms[pair_rows]
+        return pair_rows, pair_columns, values
+
+
+def _vectorizer_settings(vectorizer) -> Dict[str, Any]:
+    """Extract the vectorizer settings the compact scorer reproduces, rejecting the rest."""
+    unsupported = []
+    if vectorizer.analyzer != 'word':
+        unsupported.append(f"analyzer={vectorizer.analyzer!r}")
+    for attribute in ('preprocessor', 'tokenizer', 'stop_words', 'strip_accents'):
+        if getattr(vectorizer, attribute) is not None:
+            unsupported.append(attribute)
+    if unsupported:
+        raise ValueError(f"Unsupported vectorizer settings for compact export: {', '.join(unsupported)}")
+
+    return {
+        "lowercase": bool(vectorizer.lowercase),
+        "token_pattern": vectorizer.token_pattern,
+        "ngram_range": list(vectorizer.ngram_range),
+        "binary": bool(vectorizer.binary),
+        "use_idf": bool(vectorizer.use_idf),
+        "sublinear_tf": bool(vectorizer.sublinear_tf),
+        "norm": vectorizer.norm,
+    }
+
+
+def _idf_weights(vectorizer) -> np.ndarray:
+    """IDF vector of a fitted vectorizer, including models pickled by older scikit-learn releases."""
+    try:
+        return np.asarray(vectorizer.idf_, dtype=np.float64)
+    except AttributeError:
+        # Older releases keep the IDF as a sparse diagonal matrix on the inner transformer
+        return np.asarray(vectorizer._tfidf._idf_diag.diagonal(), dtype=np.float64)
+
+
+def _write_export(directory: Path, arrays: Dict[str, np.ndarray], manifest: Dict[str, Any]) -> Path:
+    """Write arrays and manifest to a temporary directory and rename it into place."""
+    directory.parent.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix=f".{directory.name}.", dir=directory.parent))
+    try:
+        for name, array in arrays.items():
+            np.save(staging / f"{name}.npy", array)
+        with open(staging / MANIFEST_FILE, 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        if directory.exists():
+            shutil.rmtree(directory)
+        os.replace(staging, directory)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return directory
+
+
+def _export_hashed_model(model, directory: Path) -> Path:
+    """Export an online classifier trained on HashedFeatures."""
+    if not model.is_fitted:
+        raise ValueError("Compact export requires a fitted model")
+
+    manifest = {
+        "format": HASHED_FORMAT,
+        "format_version": COMPACT_FORMAT_VERSION,
+        "classes": [str(label) for label in model.classes_],
+        "n_features": model.hasher.n_features,
+        "intercept": float(model.intercept),
+        "version": int(model.version),
+        "hashing": model.hasher.settings(),
+    }
+    _write_export(directory, {"coef": np.asarray(model.coef, dtype=np.float64)}, manifest)
+
+    logger.info(f"Exported compact hashed model to {directory} ({model.hasher.n_features} features)")
+    return directory
+
+
+def export_compact_model(model, directory: Union[str, Path]) -> Path:
+    """Export a fitted TF-IDF + logistic regression pipeline or online classifier to the compact format.
+
+    The export is written to a temporary directory and renamed into place, so readers
+    never observe a half-written model. Raises ValueError for unsupported models.
+    """
+    directory = Path(directory)
+    if isinstance(getattr(model, 'hasher', None), HashedFeatures):
+        return _export_hashed_model(model, directory)
+
+    steps = getattr(model, 'named_steps', None)
+    if not steps or 'tfidf' not in steps or 'classifier' not in steps:
+        raise ValueError("Compact export requires a Pipeline with 'tfidf' and 'classifier' steps")
+
+    vectorizer = steps['tfidf']
+    classifier = steps['classifier']
+    if len(classifier.classes_) != 2 or classifier.coef_.shape[0] != 1:
+        raise ValueError("Compact export supports binary classifiers only")
+
+    settings = _vectorizer_settings(vectorizer)
+
+    # Sort terms by their UTF-8 bytes so lookups can binary search the raw buffer
+    encoded_terms = sorted((term.encode('utf-8'), column) for term, column in vectorizer.vocabulary_.items())
+    vocab_bytes = np.frombuffer(b"".join(term for term, _ in encoded_terms), dtype=np.uint8)
+    vocab_offsets = np.zeros(len(encoded_terms) + 1, dtype=np.int64)
+    vocab_offsets[1:] = np.cumsum([len(term) for term, _ in encoded_terms])
+    vocab_columns = np.array([column for _, column in encoded_terms], dtype=np.int32)
+
+    n_features = len(vectorizer.vocabulary_)
+    idf = _idf_weights(vectorizer) if settings["use_idf"] else np.ones(n_features)
+
+    manifest = {
+        "format": COMPACT_FORMAT,
+        "format_version": COMPACT_FORMAT_VERSION,
+        "classes": [str(label) for label in classifier.classes_],
+        "n_features": n_features,
+        "intercept": float(classifier.intercept_[0]),
+        "vectorizer": settings,
+    }
+
+    _write_export(directory, {
+        "vocab_bytes": vocab_bytes,
+        "vocab_offsets": vocab_offsets,
+        "vocab_columns": vocab_columns,
+        "idf": idf,
+        "coef": np.asarray(classifier.coef_[0], dtype=np.float64),
+    }, manifest)
+
+    logger.info(f"Exported compact model to {directory} ({n_features} features)")
+    return directory
+
+
+def load_compact_model(directory: Union[str, Path]):
+    """Load a compact model export with its arrays memory-mapped read-only."""
+    with open(Path(directory) / MANIFEST_FILE, 'r') as f:
+        model_format = json.load(f).get("format")
+    if model_format == HASHED_FORMAT:
+        return CompactHashedClassifier(directory)
+    return CompactLinearClassifier(directory)
+
+
+class CompactLinearClassifier:
+    """Pure-NumPy TF-IDF + logistic regression scorer over a memory-mapped compact export.
+
+    Exposes ``classes_`` and ``predict_proba`` like the scikit-learn pipeline it was
+    exported from, so the engine can use either interchangeably for inference.
+    """
+
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+        with open(self.directory / MANIFEST_FILE, 'r') as f:
+            self.manifest = json.load(f)
+
+        if (self.manifest.get("format") != COMPACT_FORMAT or
+                self.manifest.get("format_version") != COMPACT_FORMAT_VERSION):
+            raise ValueError(f"Unsupported compact model format in {self.directory}")
+
+        self.classes_ = np.array(self.manifest["classes"])
+        self.intercept = self.manifest["intercept"]
+
+        settings = self.manifest["vectorizer"]
+        self._lowercase = settings["lowercase"]
+        self._token_pattern = re.compile(settings["token_pattern"])
+        self._min_n, self._max_n = settings["ngram_range"]
+        self._binary = settings["binary"]
+        self._sublinear_tf = settings["sublinear_tf"]
+        self._norm = settings["norm"]
+
+        self._vocab_bytes = np.load(self.directory / "vocab_bytes.npy", mmap_mode='r')
+        self._vocab_offsets = np.load(self.directory / "vocab_offsets.npy", mmap_mode='r')
+        self._vocab_columns = np.load(self.directory / "vocab_columns.npy", mmap_mode='r')
+        self.idf = np.load(self.directory / "idf.npy", mmap_mode='r')
+        self.coef = np.load(self.directory / "coef.npy", mmap_mode='r')
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the mapped arrays in bytes."""
+        return sum(array.nbytes for array in (
+            self._vocab_bytes, self._vocab_offsets, self._vocab_columns, self.idf, self.coef
+        ))
+
+    def _analyze(self, text: str) -> List[str]:
+        """Tokenize and build word n-grams the same way TfidfVectorizer does."""
+        return analyze_words(text, self._token_pattern, self._lowercase, (self._min_n, self._max_n))
+
+    def _column(self, term: str) -> int:
+        """Binary search the sorted vocabulary buffer; returns -1 for unknown terms."""
+        key = term.encode('utf-8')
+        offsets = self._vocab_offsets
+        lo, hi = 0, len(self._vocab_columns)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            candidate = self._vocab_bytes[offsets[mid]:offsets[mid + 1]].tobytes()
+            if candidate < key:
+                lo = mid + 1
+            elif candidate > key:
+                hi = mid
+            else:
+                return int(self._vocab_columns[mid])
+        return -1
+
+    def decision_function(self, texts: List[str]) -> np.ndarray:
+        """Linear decision value for each text."""
+        rows, columns = [], []
+        column_cache: Dict[str, int] = {}
+        for row, text in enumerate(texts):
+            for term in self._analyze(text):
+                column = column_cache.get(term)
+                if column is None:
+                    column = column_cache[term] = self._column(term)
+                if column >= 0:
+                    rows.append(row)
+                    columns.append(column)
+
+        decisions = np.full(len(texts), self.intercept, dtype=np.float64)
+        if not rows:
+            return decisions
+
+        # Collapse repeated (row, column) pairs into term counts
+        pairs = np.array(rows, dtype=np.int64) * self.coef.shape[0] + np.array(columns, dtype=np.int64)
+        unique_pairs, counts = np.unique(pairs, return_counts=True)
+        pair_rows = unique_pairs // self.coef.shape[0]
+        pair_columns = unique_pairs % self.coef.shape[0]
+
+        values = counts.astype(np.float64)
+        if self._binary:
+            values = np.ones_like(values)
+        elif self._sublinear_tf:
+            values = np.log(values) + 1.0
+        values *= self.idf[pair_columns]
+
+        if self._norm == 'l2':
+            norms = np.sqrt(np.bincount(pair_rows, weights=values * values, minlength=len(texts)))
+            values /= norms[pair_rows]
+        elif self._norm == 'l1':
+            norms = np.bincount(pair_rows, weights=np.abs(values), minlength=len(texts))
+            values /= norms[pair_rows]
+
+        decisions += np.bincount(pair_rows, weights=values * self.coef[pair_columns], minlength=len(texts))
+        return decisions
+
+    def predict_proba(self, texts: List[str]) -> np.ndarray:
+        """Class probabilities in ``classes_`` order, matching LogisticRegression.predict_proba."""
+        positive = 1.0 / (1.0 + np.exp(-self.decision_function(list(texts))))
+        return np.column_stack([1.0 - positive, positive])
+
+    def predict(self, texts: List[str]) -> np.ndarray:
+        """Predicted class label for each text."""
+        return self.classes_[(self.decision_function(list(texts)) > 0).astype(int)]
+
+
+class CompactHashedClassifier:
+    """Pure-NumPy scorer for an online classifier exported with hashed features."""
+
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+        with open(self.directory / MANIFEST_FILE, 'r') as f:
+            self.manifest = json.load(f)
+
+        if (self.manifest.get("format") != HASHED_FORMAT or
+                self.manifest.get("format_version") != COMPACT_FORMAT_VERSION):
+            raise ValueError(f"Unsupported compact model format in {self.directory}")
+
+        self.classes_ = np.array(self.manifest["classes"])
+        self.intercept = self.manifest["intercept"]
+        self.version = self.manifest.get("version", 0)
+        self.hasher = HashedFeatures.from_settings(self.manifest["hashing"])
+        self.coef = np.load(self.directory / "coef.npy", mmap_mode='r')
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the mapped arrays in bytes."""
+        return self.coef.nbytes
+
+    def decision_function(self, texts: List[str]) -> np.ndarray:
+        """Linear decision value for each text."""
+        rows, columns, values = self.hasher.transform_pairs(texts)
+        decisions = np.full(len(texts), self.intercept, dtype=np.float64)
+        if rows.size:
+            decisions += np.bincount(rows, weights=values * self.coef[columns], minlength=len(texts))
+        return decisions
+
+    def predict_proba(self, texts: List[str]) -> np.ndarray:
+        """Class probabilities in ``classes_`` order."""
+        positive = 1.0 / (1.0 + np.exp(-self.decision_function(list(texts))))
+        return np.column_stack([1.0 - positive, positive])
+
+    def predict(self, texts: List[str]) -> np.ndarray:
+        """Predicted class label for each text."""
+        return self.classes_[(self.decision_function(list(texts)) > 0).astype(int)]
@@ -74,6 +74,52 @@ class Config:
     def max_text_length(self) -> int:
         return self._config["detection"]["max_text_length"]
     
+    @property
+    def model_pool(self) -> Dict[str, Any]:
+        defaults = {
+            "max_models": 4,
+            "max_memory_mb": 512
+        }
+        return {**defaults, **self._config.get("models", {}).get("pool", {})}
+    
+    @property
+    def shadow_evaluation(self) -> Dict[str, Any]:
+        defaults = {
+            "sample_rate": 0.1,
+            "max_pending": 4,
+            "history": 1000,
+            "budget_ms": 250,
+            "pause_ratio": 3.0
+        }
+        return {**defaults, **self._config.get("models", {}).get("shadow", {})}
+    
+    @property
+    def probability_cache_max_bytes(self) -> int:
+        cache_config = self._config.get("detection", {}).get("probability_cache", {})
+        return int(float(cache_config.get("max_memory_mb", 32)) * 1024 * 1024)
+    
+    @property
+    def online_learning(self) -> Dict[str, Any]:
+        defaults = {
+            "n_features": 262144,
+            "C": 1.0,
+            "holdout_fraction": 0.1,
+            "batch_size": 256,
+            "rebuild_epochs": 5,
+            "log_dir": "models/training_log",
+            "max_segment_mb": 64,
+            "metrics_history": 100
+        }
+        return {**defaults, **self._config.get("training", {}).get("online", {})}
+    
+    @property
+    def retrain_scheduler(self) -> Dict[str, Any]:
+        defaults = {
+            "batch_size": 100,
+            "max_delay_seconds": 30.0
+        }
+        return {**defaults, **self._config.get("training", {}).get("scheduler", {})}
+    
     @property
     def debug(self) -> bool:
         return os.getenv("DEBUG", "false").lower() == "true"
@@ -2,7 +2,7 @@ import asyncio
 import logging
 import re
 import uuid
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
 from datetime import datetime
 import spacy
 from transformers import (
@@ -130,6 +130,11 @@ class DeepSearchEngine:
         
         logger.info(f"Starting deep search for text length: {len(request.text)}")
         
+        # Only the simple engine can serve a pinned model version
+        if request.model_version:
+            logger.info(f"Using Simple Learning Engine for pinned model version {request.model_version}")
+            return await self.simple_engine.search(request)
+        
         # Priority 1: Use cascaded detection if available
         if self.use_cascaded_detection and self.cascaded_detector.is_initialized:
             logger.info("Using Parallel Cascaded PII Detection (BERT + DeBERTa + Ollama)")
@@ -238,6 +243,9 @@ class DeepSearchEngine:
         if not (self.use_cascaded_detection and self.cascaded_detector.is_initialized):
             raise RuntimeError("Separate results only available with cascaded detection")
         
+        if request.model_version:
+            raise RuntimeError("Separate results cannot use a pinned model_version")
+        
         logger.info(f"Starting separate results search for text length: {len(request.text)}")
         return await self._search_with_cascaded_detector(request, separate_results=True)
     
@@ -525,6 +533,24 @@ class DeepSearchEngine:
             # Store for future advanced model training
             # This would be implemented for transformer model fine-tuning
     
+    async def reload_model(self, activate: Optional[Callable[[], None]] = None):
+        """Reload the simple engine's model, switching the active model files with activate first."""
+        await self.simple_engine.reload_model(activate)
+    
+    async def start_shadow_evaluation(self, model_version: str, sample_rate: Optional[float] = None) -> Dict[str, Any]:
+        """Shadow a stored model version against the active simple engine model."""
+        return await self.simple_engine.start_shadow_evaluation(model_version, sample_rate)
+    
+    async def stop_shadow_evaluation(self) -> Dict[str, Any]:
+        return await self.simple_engine.stop_shadow_evaluation()
+    
+    def get_shadow_report(self) -> Dict[str, Any]:
+        return self.simple_engine.get_shadow_report()
+    
+    async def shutdown(self):
+        """Stop background work before the service exits."""
+        await self.simple_engine.shutdown()
+    
     def set_engine_mode(self, use_simple: bool):
         """Switch between simple and advanced engine modes."""
         self.use_simple_engine = use_simple
@@ -546,6 +572,10 @@ class DeepSearchEngine:
             "simple_engine_ready": self.simple_engine.is_ready() if hasattr(self.simple_engine, 'is_ready') else False,
             "cascaded_detection_ready": self.use_cascaded_detection and self.cascaded_detector.is_initialized,
             "advanced_models_ready": self._has_advanced_models(),
+            "simple_engine_probability_cache": self.simple_engine.probability_cache.get_stats(),
+            "model_pool": (
+                self.simple_engine.model_manager.model_pool.get_stats() if self.simple_engine.model_manager else None
+            ),
             "current_mode": (
                 "cascaded" if self.use_cascaded_detection and self.cascaded_detector.is_initialized
                 else "simple" if self.use_simple_engine
@@ -4,33 +4,129 @@ Model Management System for Deep Search Engine
 Handles model deployment, backup, and rollback operations.
 """
 
-import os
 import shutil
 import json
 import pickle
 import logging
+import tempfile
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 from pathlib import Path
 
+from .config import config
+from .compact_model import MANIFEST_FILE, compact_path_for, export_compact_model, load_compact_model
+from .model_pool import ModelPool, PooledModel
+from .model_store import MANIFEST_KINDS, ModelCatalog, ModelStore, atomic_write, manifest_checksum
+
 logger = logging.getLogger(__name__)
 
+# Untracked directory holding the store, catalog and active link
+RUNTIME_DIR_NAME = "runtime"
+# Name of the pickled model in every version, backup and the active directory
+MODEL_FILE = "simple_classifier.pkl"
+
 class ModelManager:
-    """Manages ML model versions, deployment, and rollback operations."""
+    """Manages ML model versions, deployment, and rollback operations.
+    
+    Versions and backups are manifests in a content-addressed ModelStore and the
+    active model directory is a symlink to a tree of hard links into that store, so
+    deploys and rollbacks are a single symlink swap regardless of how many versions
+    exist. Listings are served from the ModelCatalog index rather than the manifests,
+    and recently used versions stay loaded in a ModelPool.
     
-    def __init__(self, models_dir: str = "models"):
-        self.models_dir = Path(models_dir)
-        self.active_model_path = self.models_dir / "active"
+    Everything the manager writes lives under the runtime directory. The model shipped
+    in models/active is only read, to seed the active link the first time.
+    """
+    
+    def __init__(self, models_dir: Optional[str] = None):
+        self.models_dir = Path(models_dir or config.model_path)
+        self.runtime_dir = self.models_dir / RUNTIME_DIR_NAME
+        self.seed_model_path = self.models_dir / "active"
+        self.active_model_path = self.runtime_dir / "active"
         self.backup_dir = self.models_dir / "backups"
         self.versions_dir = self.models_dir / "versions"
         
         # Create necessary directories
-        self.models_dir.mkdir(exist_ok=True)
-        self.backup_dir.mkdir(exist_ok=True)
-        self.versions_dir.mkdir(exist_ok=True)
+        self.runtime_dir.mkdir(parents=True, exist_ok=True)
+        self.store = ModelStore(self.runtime_dir / "store")
+        self.catalog = ModelCatalog(self.runtime_dir / "catalog.json", self.store)
+        self.model_pool = ModelPool(
+            max_models=config.model_pool["max_models"],
+            max_bytes=int(float(config.model_pool["max_memory_mb"]) * 1024 * 1024)
+        )
         
         # Active model info file
-        self.active_info_file = self.models_dir / "active_model.json"
+        self.active_info_file = self.runtime_dir / "active_model.json"
+        
+        self._seed_active_model()
+        self._migrate_legacy_layout()
+        self.store.prune_trees(keep=[self.store.tree_of(self.active_model_path)])
+    
+    def _seed_active_model(self) -> None:
+        """Point the active link at a model the first time the runtime directory is used.
+        
+        A plain directory already at the link (a model saved before the manager ran) is
+        moved into the store; otherwise the shipped model is copied in and left as is.
+        """
+        try:
+            if self.active_model_path.is_symlink():
+                return
+            if self.active_model_path.is_dir() and any(self.active_model_path.iterdir()):
+                self.store.point(self.active_model_path, self.store.adopt_tree(self.active_model_path))
+                logger.info("Moved active model directory into the model store")
+                return
+            if self.active_model_path.is_dir():
+                self.active_model_path.rmdir()
+            
+            files = {}
+            if self.seed_model_path.is_dir():
+                for path in sorted(self.seed_model_path.rglob('*')):
+                    if path.is_file() and not path.name.startswith('.'):
+                        files[path.relative_to(self.seed_model_path).as_posix()] = {
+                            "sha256": self.store.put_file(path), "size": path.stat().st_size
+                        }
+            self.store.point(self.active_model_path, self.store.materialize({"files": files}))
+            if files:
+                logger.info(f"Seeded the active model from {self.seed_model_path}")
+        except Exception as e:
+            logger.error(f"Failed to seed the active model: {e}")
+    
+    def _migrate_legacy_layout(self) -> None:
+        """Move version and backup directories written by the copy-based layout into the store."""
+        try:
+            if self.versions_dir.is_dir():
+                for version_dir in self.versions_dir.iterdir():
+                    if not version_dir.is_dir():
+                        continue
+                    info = self._read_json(version_dir / "model_info.json")
+                    self.catalog.add(self.store.snapshot(version_dir, "versions", version_dir.name, info=info,
+                                                         exclude=["model_info.json"]))
+                    shutil.rmtree(version_dir)
+                    logger.info(f"Migrated model version {version_dir.name} into the model store")
+                self.versions_dir.rmdir()
+            
+            if self.backup_dir.is_dir():
+                for backup_path in self.backup_dir.iterdir():
+                    if not backup_path.is_dir():
+                        continue
+                    self.catalog.add(self.store.snapshot(
+                        backup_path / "model", "backups", backup_path.name,
+                        info=self._read_json(backup_path / "model_info.json"),
+                        metadata=self._read_json(backup_path / "backup_metadata.json")
+                    ))
+                    shutil.rmtree(backup_path)
+                    logger.info(f"Migrated backup {backup_path.name} into the model store")
+                self.backup_dir.rmdir()
+                
+        except Exception as e:
+            logger.error(f"Failed to migrate legacy model directories: {e}")
+    
+    @staticmethod
+    def _read_json(path: Path) -> Dict[str, Any]:
+        if not path.exists():
+            return {}
+        with open(path, 'r') as f:
+            return json.load(f)
     
     def get_active_model_info(self) -> Dict[str, Any]:
         """Get information about the currently active model."""
@@ -54,8 +150,7 @@ class ModelManager:
     def set_active_model_info(self, model_info: Dict[str, Any]) -> None:
         """Set information about the currently active model."""
         try:
-            with open(self.active_info_file, 'w') as f:
-                json.dump(model_info, f, indent=2)
+            atomic_write(self.active_info_file, json.dumps(model_info, indent=2).encode('utf-8'))
         except Exception as e:
             logger.error(f"Failed to write active model info: {e}")
     
@@ -74,62 +169,46 @@ class ModelManager:
             "trainedDate": active_info.get("deployed_at", datetime.now().isoformat()),
             "sampleCount": active_info.get("sample_count", 100),
             "isActive": True,
-            "size": self._calculate_model_size(self.active_model_path),
+            "size": self._format_size(self._active_model_size()),
             "type": active_info.get("type", "simple")
         })
         
         # Add version models
-        if self.versions_dir.exists():
-            for version_dir in self.versions_dir.iterdir():
-                if version_dir.is_dir():
-                    version_info_file = version_dir / "model_info.json"
-                    if version_info_file.exists():
-                        try:
-                            with open(version_info_file, 'r') as f:
-                                version_info = json.load(f)
-                            
-                            models.append({
-                                "id": f"model_{version_info['version']}",
-                                "version": version_info["version"],
-                                "name": version_info.get("name", f"Model v{version_info['version']}"),
-                                "accuracy": version_info.get("accuracy", 0.0),
-                                "trainedDate": version_info.get("trained_at", datetime.now().isoformat()),
-                                "sampleCount": version_info.get("sample_count", 0),
-                                "isActive": version_info["version"] == active_version,
-                                "size": self._calculate_model_size(version_dir),
-                                "type": version_info.get("type", "simple")
-                            })
-                        except Exception as e:
-                            logger.error(f"Failed to read version info for {version_dir}: {e}")
+        for entry in self.catalog.entries("versions"):
+            try:
+                version_info = {**entry["info"], "version": entry["name"]}
+                models.append({
+                    "id": f"model_{version_info['version']}",
+                    "version": version_info["version"],
+                    "name": version_info.get("name", f"Model v{version_info['version']}"),
+                    "accuracy": version_info.get("accuracy", 0.0),
+                    "trainedDate": version_info.get("trained_at", datetime.now().isoformat()),
+                    "sampleCount": version_info.get("sample_count", 0),
+                    "isActive": version_info["version"] == active_version,
+                    "size": self._format_size(entry["size"]),
+                    "type": version_info.get("type", "simple"),
+                    "checksum": entry["checksum"]
+                })
+            except Exception as e:
+                logger.error(f"Failed to read version info for {entry.get('name')}: {e}")
         
         return models
     
     def create_backup(self) -> str:
         """Create a backup of the current active model."""
         backup_id = f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        backup_path = self.backup_dir / backup_id
         
         try:
-            # Create backup directory
-            backup_path.mkdir(exist_ok=True)
-            
-            # Copy active model files
-            if self.active_model_path.exists():
-                shutil.copytree(self.active_model_path, backup_path / "model", dirs_exist_ok=True)
-            
-            # Copy active model info
-            if self.active_info_file.exists():
-                shutil.copy2(self.active_info_file, backup_path / "model_info.json")
-            
-            # Create backup metadata
+            # Only file content not already in the store is written
             backup_metadata = {
                 "backup_id": backup_id,
                 "created_at": datetime.now().isoformat(),
                 "original_version": self.get_active_model_info().get("version", "unknown")
             }
-            
-            with open(backup_path / "backup_metadata.json", 'w') as f:
-                json.dump(backup_metadata, f, indent=2)
+            info = self._read_json(self.active_info_file)
+            self.catalog.add(
+                self.store.snapshot(self.active_model_path, "backups", backup_id, info=info, metadata=backup_metadata)
+            )
             
             logger.info(f"Created backup: {backup_id}")
             return backup_id
@@ -138,37 +217,37 @@ class ModelManager:
             logger.error(f"Failed to create backup: {e}")
             raise
     
+    def _activate_manifest(self, manifest: Dict[str, Any]) -> None:
+        """Point the active model at a fresh tree for the manifest and drop the previous tree."""
+        tree = self.store.materialize(manifest)
+        previous = self.store.point(self.active_model_path, tree)
+        self.catalog.set_active(self.store.manifest_size(manifest), manifest)
+        if previous is not None and previous != tree:
+            # Readers that already opened files keep them; the links just disappear
+            self.store.remove_tree(previous)
+    
     def deploy_model(self, model_version: str, replace_current: bool = True) -> None:
         """Deploy a specific model version as the active model."""
-        version_path = self.versions_dir / model_version
-        
-        if not version_path.exists():
+        if not self.store.has_manifest("versions", model_version):
             raise ValueError(f"Model version {model_version} not found")
         
         try:
+            manifest = self.store.read_manifest("versions", model_version)
+            
             # Create backup if replacing current model
             if replace_current and self.active_model_path.exists():
                 backup_id = self.create_backup()
                 logger.info(f"Created backup {backup_id} before deployment")
             
-            # Remove current active model
-            if self.active_model_path.exists():
-                shutil.rmtree(self.active_model_path)
-            
-            # Copy new model to active location
-            shutil.copytree(version_path, self.active_model_path)
+            self._activate_manifest(manifest)
             
             # Update active model info
-            version_info_file = version_path / "model_info.json"
-            if version_info_file.exists():
-                with open(version_info_file, 'r') as f:
-                    version_info = json.load(f)
-                
-                active_info = {
-                    **version_info,
-                    "deployed_at": datetime.now().isoformat()
-                }
-                self.set_active_model_info(active_info)
+            active_info = {
+                **manifest["info"],
+                "version": model_version,
+                "deployed_at": datetime.now().isoformat()
+            }
+            self.set_active_model_info(active_info)
             
             logger.info(f"Successfully deployed model version {model_version}")
             
@@ -178,25 +257,16 @@ class ModelManager:
     
     def rollback_model(self, backup_id: str) -> None:
         """Rollback to a previous model backup."""
-        backup_path = self.backup_dir / backup_id
-        
-        if not backup_path.exists():
+        if not self.store.has_manifest("backups", backup_id):
             raise ValueError(f"Backup {backup_id} not found")
         
         try:
-            # Remove current active model
-            if self.active_model_path.exists():
-                shutil.rmtree(self.active_model_path)
-            
-            # Restore from backup
-            backup_model_path = backup_path / "model"
-            if backup_model_path.exists():
-                shutil.copytree(backup_model_path, self.active_model_path)
+            manifest = self.store.read_manifest("backups", backup_id)
+            self._activate_manifest(manifest)
             
             # Restore model info
-            backup_info_file = backup_path / "model_info.json"
-            if backup_info_file.exists():
-                shutil.copy2(backup_info_file, self.active_info_file)
+            if manifest["info"]:
+                self.set_active_model_info(manifest["info"])
             
             logger.info(f"Successfully rolled back to backup {backup_id}")
             
@@ -207,30 +277,29 @@ class ModelManager:
     def save_trained_model(self, model_data: Any, model_info: Dict[str, Any]) -> str:
         """Save a newly trained model as a version."""
         version = model_info.get("version", f"v{datetime.now().strftime('%Y%m%d_%H%M%S')}")
-        version_path = self.versions_dir / version
+        staging = Path(tempfile.mkdtemp(prefix=".staging.", dir=self.store.root))
         
         try:
-            # Create version directory
-            version_path.mkdir(exist_ok=True)
-            
             # Save model data
-            if hasattr(model_data, 'save'):
-                # For sklearn models or similar
-                model_file = version_path / "model.pkl"
-                with open(model_file, 'wb') as f:
-                    pickle.dump(model_data, f)
-            else:
-                # For other model types, implement specific saving logic
-                model_file = version_path / "model.pkl"
-                with open(model_file, 'wb') as f:
-                    pickle.dump(model_data, f)
+            model_file = staging / MODEL_FILE
+            with open(model_file, 'wb') as f:
+                pickle.dump(model_data, f)
+            
+            # Export the compact, memory-mappable format alongside the pickle
+            try:
+                export_compact_model(model_data, compact_path_for(model_file))
+            except ValueError as e:
+                logger.info(f"Skipping compact export for version {version}: {e}")
             
             # Save model info
             model_info["saved_at"] = datetime.now().isoformat()
             model_info["version"] = version
             
-            with open(version_path / "model_info.json", 'w') as f:
-                json.dump(model_info, f, indent=2)
+            manifest = self.store.snapshot(staging, "versions", version, info=model_info)
+            self.catalog.add(manifest)
+            
+            # A freshly trained version is ready for deployment without reloading it
+            self.model_pool.put(manifest_checksum(manifest), model_data, self.store.manifest_size(manifest))
             
             logger.info(f"Saved trained model as version {version}")
             return version
@@ -238,45 +307,97 @@ class ModelManager:
         except Exception as e:
             logger.error(f"Failed to save trained model: {e}")
             raise
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+    
+    @property
+    def active_model_key(self) -> Optional[str]:
+        """Pool key of the active model: the checksum of the manifest it was deployed from."""
+        return self.catalog.active.get("checksum")
+    
+    def pool_active_model(self, model: Any) -> Optional[PooledModel]:
+        """Keep the model just loaded from the active directory in the pool."""
+        if self.active_model_key is None:
+            return None
+        return self.model_pool.put(self.active_model_key, model, self._active_model_size())
     
-    def _calculate_model_size(self, model_path: Path) -> str:
-        """Calculate the size of a model directory."""
-        if not model_path.exists():
-            return "0 MB"
+    def has_model(self, model_version: str) -> bool:
+        """Whether a version or backup with this name exists."""
+        return any(self.catalog.get(kind, model_version) is not None for kind in MANIFEST_KINDS)
+    
+    def load_model(self, model_version: str) -> PooledModel:
+        """Return a version or backup from the pool, loading it from the store if needed."""
+        for kind in MANIFEST_KINDS:
+            entry = self.catalog.get(kind, model_version)
+            if entry is not None:
+                break
+        else:
+            raise ValueError(f"Model version {model_version} not found")
+        
+        return self.model_pool.get_or_load(
+            entry["checksum"], lambda: (self._read_manifest_model(kind, model_version), entry["size"])
+        )
+    
+    def _read_manifest_model(self, kind: str, name: str) -> Any:
+        """Load the model a manifest holds, preferring its compact export over the pickle."""
+        manifest = self.store.read_manifest(kind, name)
+        pickles = sorted(path for path in manifest["files"] if path.endswith(".pkl") and "/" not in path)
+        if not pickles:
+            raise ValueError(f"No model file in {kind[:-1]} {name}")
         
+        tree = self.store.materialize(manifest)
         try:
-            total_size = 0
-            for file_path in model_path.rglob('*'):
-                if file_path.is_file():
-                    total_size += file_path.stat().st_size
-            
-            # Convert to human readable format
-            if total_size < 1024 * 1024:
-                return f"{total_size / 1024:.1f} KB"
-            elif total_size < 1024 * 1024 * 1024:
-                return f"{total_size / (1024 * 1024):.1f} MB"
-            else:
-                return f"{total_size / (1024 * 1024 * 1024):.1f} GB"
-                
-        except Exception as e:
-            logger.error(f"Failed to calculate model size: {e}")
-            return "Unknown"
+            model_file = tree / pickles[0]
+            compact_path = compact_path_for(model_file)
+            if (compact_path / MANIFEST_FILE).exists():
+                # Memory maps stay valid after the tree's links are removed
+                return load_compact_model(compact_path)
+            with open(model_file, 'rb') as f:
+                return pickle.load(f)
+        finally:
+            self.store.remove_tree(tree)
+    
+    def _active_model_size(self) -> int:
+        """Size of the active model, recorded in the catalog when it was deployed."""
+        size = self.catalog.active.get("size")
+        if size is None:
+            # Active trees from before the catalog existed are measured once
+            size = self._directory_size(self.active_model_path)
+            self.catalog.set_active(size)
+        return size
+    
+    @staticmethod
+    def _directory_size(model_path: Path) -> int:
+        return sum(file_path.stat().st_size for file_path in model_path.rglob('*') if file_path.is_file())
+    
+    @staticmethod
+    def _format_size(total_size: int) -> str:
+        """Convert a byte count to human readable format."""
+        if total_size < 1024 * 1024:
+            return f"{total_size / 1024:.1f} KB"
+        elif total_size < 1024 * 1024 * 1024:
+            return f"{total_size / (1024 * 1024):.1f} MB"
+        else:
+            return f"{total_size / (1024 * 1024 * 1024):.1f} GB"
     
     def cleanup_old_backups(self, keep_count: int = 10) -> None:
         """Clean up old backups, keeping only the most recent ones."""
         try:
-            backups = []
-            for backup_dir in self.backup_dir.iterdir():
-                if backup_dir.is_dir() and backup_dir.name.startswith("backup_"):
-                    backups.append(backup_dir)
+            backups = [entry for entry in self.catalog.entries("backups") if entry["name"].startswith("backup_")]
             
             # Sort by creation time (newest first)
-            backups.sort(key=lambda x: x.stat().st_mtime, reverse=True)
+            backups.sort(key=lambda entry: entry["created_at"], reverse=True)
             
             # Remove old backups
             for backup_to_remove in backups[keep_count:]:
-                shutil.rmtree(backup_to_remove)
-                logger.info(f"Removed old backup: {backup_to_remove.name}")
+                self.store.delete_manifest("backups", backup_to_remove["name"])
+                self.catalog.remove("backups", backup_to_remove["name"])
+                logger.info(f"Removed old backup: {backup_to_remove['name']}")
+            
+            # Blobs shared with remaining versions and backups are kept
+            removed = self.store.collect_garbage()
+            if removed:
+                logger.info(f"Removed {removed} unreferenced model blobs")
                 
         except Exception as e:
-            logger.error(f"Failed to cleanup old backups: {e}")
\ No newline at end of file
+            logger.error(f"Failed to cleanup old backups: {e}")
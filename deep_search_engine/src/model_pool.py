@@ -0,0 +1,96 @@
+"""In-memory pool of loaded model versions for the Deep Search Engine."""
+
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PooledModel:
+    """A loaded model with what the engine needs to score with it."""
+    key: str
+    model: Any
+    size_bytes: int
+
+
+class ModelPool:
+    """Keeps the most recently used model versions loaded, keyed by manifest checksum.
+
+    The pool holds at most max_models models and evicts the least recently used ones
+    once their estimated size exceeds max_bytes. Pooled models are shared between
+    requests and must not be modified; training always works on a copy.
+    """
+
+    def __init__(self, max_models: int = 4, max_bytes: int = 512 * 1024 * 1024):
+        self.max_models = max_models
+        self.max_bytes = max_bytes
+        self._models: "OrderedDict[str, PooledModel]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._models)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._models
+
+    def get(self, key: Optional[str]) -> Optional[PooledModel]:
+        with self._lock:
+            pooled = self._models.get(key) if key else None
+            if pooled is None:
+                self.misses += 1
+                return None
+
+            self._models.move_to_end(key)
+            self.hits += 1
+            return pooled
+
+    def put(self, key: str, model: Any, size_bytes: int) -> PooledModel:
+        pooled = PooledModel(key, model, size_bytes)
+        with self._lock:
+            previous = self._models.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous.size_bytes
+
+            self._models[key] = pooled
+            self.current_bytes += size_bytes
+
+            # The newest model stays even if it alone exceeds the memory limit
+            while len(self._models) > 1 and (len(self._models) > self.max_models or self.current_bytes > self.max_bytes):
+                evicted_key, evicted = self._models.popitem(last=False)
+                self.current_bytes -= evicted.size_bytes
+                self.evictions += 1
+                logger.info(f"Evicted model {evicted_key[:12]} from the model pool")
+        return pooled
+
+    def get_or_load(self, key: str, loader: Callable[[], Tuple[Any, int]]) -> PooledModel:
+        """Return the pooled model for key, calling loader for (model, size_bytes) on a miss."""
+        pooled = self.get(key)
+        if pooled is not None:
+            return pooled
+
+        model, size_bytes = loader()
+        self.loads += 1
+        return self.put(key, model, size_bytes)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "models": [key[:12] for key in self._models],
+            "memory_bytes": self.current_bytes,
+            "max_memory_bytes": self.max_bytes,
+            "max_models": self.max_models,
+            "hits": self.hits,
+            "misses": self.misses,
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
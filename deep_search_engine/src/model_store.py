@@ -0,0 +1,335 @@
+"""
+Content-addressed storage for model versions and backups.
+
+Every model file is stored once as a blob named by its SHA-256 digest. Versions and
+backups are small JSON manifests mapping relative file paths to blobs, and the active
+model is a symlink to a tree of hard links into the blob store, so saving, deploying
+and rolling back never copy model data.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_KINDS = ("versions", "backups")
+_NAME_PATTERN = re.compile(r"^[\w.\-]+$")
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def atomic_write(path: Path, data: bytes) -> None:
+    """Replace path with data without ever rewriting the existing file in place.
+
+    Files in the active model tree are hard links to blobs, so writing through them
+    would silently change stored versions; a rename only swaps the directory entry.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+    try:
+        os.chmod(temp_path, 0o644)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ModelStore:
+    """Blobs, manifests and materialized trees under a single root directory."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.blobs_dir = self.root / "blobs"
+        self.manifests_dir = self.root / "manifests"
+        self.trees_dir = self.root / "trees"
+
+        for directory in [self.blobs_dir, self.trees_dir] + [self.manifests_dir / kind for kind in MANIFEST_KINDS]:
+            directory.mkdir(parents=True, exist_ok=True)
+
+    # Blobs
+
+    def blob_path(self, digest: str) -> Path:
+        return self.blobs_dir / digest[:2] / digest
+
+    def put_file(self, path: Path, known_digest: Optional[str] = None) -> str:
+        """Store a file as a blob and return its digest; existing content is not written again."""
+        digest = known_digest or file_digest(path)
+        blob = self.blob_path(digest)
+        if blob.exists():
+            return digest
+
+        blob.parent.mkdir(exist_ok=True)
+        temp_blob = blob.parent / f".{digest}.{uuid.uuid4().hex}"
+        try:
+            # Link rather than copy when the file is on the same filesystem
+            os.link(path, temp_blob)
+        except OSError:
+            shutil.copy2(path, temp_blob)
+        os.replace(temp_blob, blob)
+        return digest
+
+    # Manifests
+
+    def _manifest_path(self, kind: str, name: str) -> Path:
+        if kind not in MANIFEST_KINDS:
+            raise ValueError(f"Unknown manifest kind: {kind}")
+        if not _NAME_PATTERN.match(name):
+            raise ValueError(f"Invalid {kind[:-1]} name: {name}")
+        return self.manifests_dir / kind / f"{name}.json"
+
+    def has_manifest(self, kind: str, name: str) -> bool:
+        try:
+            return self._manifest_path(kind, name).exists()
+        except ValueError:
+            return False
+
+    def read_manifest(self, kind: str, name: str) -> Dict[str, Any]:
+        path = self._manifest_path(kind, name)
+        if not path.exists():
+            raise ValueError(f"{kind[:-1].capitalize()} {name} not found")
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def write_manifest(self, kind: str, name: str, files: Dict[str, Dict[str, Any]],
+                       info: Optional[Dict[str, Any]] = None, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        manifest = {
+            "name": name,
+            "kind": kind,
+            "created_at": datetime.now().isoformat(),
+            "files": files,
+            "info": info or {},
+            "metadata": metadata or {}
+        }
+        atomic_write(self._manifest_path(kind, name), json.dumps(manifest, indent=2).encode('utf-8'))
+        return manifest
+
+    def iter_manifests(self, kind: str) -> Iterator[Dict[str, Any]]:
+        for path in sorted((self.manifests_dir / kind).glob("*.json")):
+            try:
+                with open(path, 'r') as f:
+                    yield json.load(f)
+            except Exception as e:
+                logger.error(f"Failed to read manifest {path}: {e}")
+
+    def delete_manifest(self, kind: str, name: str) -> None:
+        self._manifest_path(kind, name).unlink(missing_ok=True)
+
+    def snapshot(self, directory: Path, kind: str, name: str, info: Optional[Dict[str, Any]] = None,
+                 metadata: Optional[Dict[str, Any]] = None, exclude: Iterable[str] = ()) -> Dict[str, Any]:
+        """Store every file under directory and record them in a manifest.
+
+        Files that are still hard links to the blobs they were materialized from are
+        recognized by inode and not read again.
+        """
+        source_files = self._tree_source(directory)
+        files = {}
+        for path in sorted(Path(directory).rglob('*')):
+            if not path.is_file() or path.name.startswith('.'):
+                continue
+            relative = path.relative_to(directory).as_posix()
+            if relative in exclude:
+                continue
+            files[relative] = {"sha256": self.put_file(path, self._unchanged_digest(path, source_files.get(relative))),
+                               "size": path.stat().st_size}
+        return self.write_manifest(kind, name, files, info, metadata)
+
+    def _unchanged_digest(self, path: Path, entry: Optional[Dict[str, Any]]) -> Optional[str]:
+        if entry is None:
+            return None
+        try:
+            file_stat, blob_stat = path.stat(), self.blob_path(entry["sha256"]).stat()
+        except OSError:
+            return None
+        if (file_stat.st_dev, file_stat.st_ino) == (blob_stat.st_dev, blob_stat.st_ino):
+            return entry["sha256"]
+        return None
+
+    def referenced_digests(self) -> set:
+        return {entry["sha256"] for kind in MANIFEST_KINDS for manifest in self.iter_manifests(kind)
+                for entry in manifest["files"].values()}
+
+    def collect_garbage(self) -> int:
+        """Delete blobs no manifest refers to and return how many were removed."""
+        referenced = self.referenced_digests()
+        removed = 0
+        for blob in self.blobs_dir.glob("*/*"):
+            if not blob.name.startswith('.') and blob.name not in referenced:
+                blob.unlink()
+                removed += 1
+        return removed
+
+    # Trees and the active pointer
+
+    def _tree_source(self, directory: Path) -> Dict[str, Dict[str, Any]]:
+        source_file = self.trees_dir / f"{Path(directory).resolve().name}.source.json"
+        if Path(directory).resolve().parent != self.trees_dir.resolve() or not source_file.exists():
+            return {}
+        with open(source_file, 'r') as f:
+            return json.load(f)
+
+    def materialize(self, manifest: Dict[str, Any]) -> Path:
+        """Build a fresh tree of hard links to the manifest's blobs."""
+        tree_id = uuid.uuid4().hex
+        staging = self.trees_dir / f".{tree_id}"
+        staging.mkdir()
+        try:
+            for relative, entry in manifest["files"].items():
+                target = staging / relative
+                target.parent.mkdir(parents=True, exist_ok=True)
+                try:
+                    os.link(self.blob_path(entry["sha256"]), target)
+                except OSError:
+                    shutil.copy2(self.blob_path(entry["sha256"]), target)
+            atomic_write(self.trees_dir / f"{tree_id}.source.json", json.dumps(manifest["files"]).encode('utf-8'))
+            tree = self.trees_dir / tree_id
+            os.replace(staging, tree)
+            return tree
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+    def adopt_tree(self, directory: Path) -> Path:
+        """Move an existing directory into the trees area without copying it."""
+        tree = self.trees_dir / uuid.uuid4().hex
+        os.replace(directory, tree)
+        return tree
+
+    def point(self, link: Path, tree: Path) -> Optional[Path]:
+        """Atomically repoint link at tree and return the tree it pointed at before."""
+        link = Path(link)
+        previous = self.tree_of(link)
+
+        temp_link = link.parent / f".{link.name}.{uuid.uuid4().hex}"
+        os.symlink(os.path.relpath(tree, link.parent), temp_link)
+        os.replace(temp_link, link)
+        return previous
+
+    def tree_of(self, link: Path) -> Optional[Path]:
+        if not Path(link).is_symlink():
+            return None
+        return (Path(link).parent / os.readlink(link)).resolve()
+
+    def remove_tree(self, tree: Path) -> None:
+        if tree.resolve().parent != self.trees_dir.resolve():
+            return
+        shutil.rmtree(tree, ignore_errors=True)
+        (self.trees_dir / f"{tree.name}.source.json").unlink(missing_ok=True)
+
+    def prune_trees(self, keep: List[Path]) -> None:
+        """Remove trees and staging directories left behind by interrupted operations."""
+        kept = {Path(tree).resolve().name for tree in keep if tree is not None}
+        for path in self.trees_dir.iterdir():
+            tree_name = path.name[:-len(".source.json")] if path.name.endswith(".source.json") else path.name
+            if tree_name.lstrip('.') in kept and not path.name.startswith('.'):
+                continue
+            if path.is_dir():
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                path.unlink(missing_ok=True)
+
+    def manifest_size(self, manifest: Dict[str, Any]) -> int:
+        return sum(entry["size"] for entry in manifest["files"].values())
+
+
+def manifest_checksum(manifest: Dict[str, Any]) -> str:
+    """Digest identifying the exact set of files a manifest refers to."""
+    return hashlib.sha256(json.dumps(manifest["files"], sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class ModelCatalog:
+    """Single JSON index of the store's versions and backups.
+
+    Each entry records the manifest's size, checksum, info and metadata, so listing
+    models reads one file instead of every manifest. It is updated whenever a manifest
+    is written or deleted and rebuilt from the manifests if missing or unreadable.
+    """
+
+    def __init__(self, path: Path, store: ModelStore):
+        self.path = Path(path)
+        self.store = store
+        self._catalog = self._load()
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, 'r') as f:
+                catalog = json.load(f)
+            if all(kind in catalog for kind in MANIFEST_KINDS):
+                return catalog
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Rebuilding unreadable model catalog {self.path}: {e}")
+        return self.rebuild()
+
+    def rebuild(self) -> Dict[str, Any]:
+        self._catalog = {kind: {} for kind in MANIFEST_KINDS}
+        self._catalog["active"] = {}
+        for kind in MANIFEST_KINDS:
+            for manifest in self.store.iter_manifests(kind):
+                self._catalog[kind][manifest["name"]] = self._entry(manifest)
+        self._save()
+        return self._catalog
+
+    def _save(self) -> None:
+        atomic_write(self.path, json.dumps(self._catalog, indent=2).encode('utf-8'))
+
+    def _entry(self, manifest: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "name": manifest["name"],
+            "created_at": manifest["created_at"],
+            "size": self.store.manifest_size(manifest),
+            "file_count": len(manifest["files"]),
+            "checksum": manifest_checksum(manifest),
+            "info": manifest["info"],
+            "metadata": manifest["metadata"]
+        }
+
+    def add(self, manifest: Dict[str, Any]) -> None:
+        self._catalog[manifest["kind"]][manifest["name"]] = self._entry(manifest)
+        self._save()
+
+    def remove(self, kind: str, name: str) -> None:
+        if self._catalog[kind].pop(name, None) is not None:
+            self._save()
+
+    def get(self, kind: str, name: str) -> Optional[Dict[str, Any]]:
+        return self._catalog[kind].get(name)
+
+    def entries(self, kind: str) -> List[Dict[str, Any]]:
+        return [self._catalog[kind][name] for name in sorted(self._catalog[kind])]
+
+    @property
+    def active(self) -> Dict[str, Any]:
+        """The manifest the active tree was built from, with its size."""
+        return self._catalog["active"]
+
+    def set_active(self, size: int, manifest: Optional[Dict[str, Any]] = None) -> None:
+        self._catalog["active"] = {
+            "kind": manifest["kind"] if manifest else None,
+            "name": manifest["name"] if manifest else None,
+            "checksum": manifest_checksum(manifest) if manifest else None,
+            "size": size
+        }
+        self._save()
@@ -44,6 +44,7 @@ class DeepSearchRequest:
     max_characters: Optional[int] = 10000
     confidence_threshold: Optional[float] = 0.7
     stage1_weights: Optional[List[Dict[str, Any]]] = None
+    model_version: Optional[str] = None  # score with this stored version instead of the active model
 
 @dataclass
 class DeepSearchResponse:
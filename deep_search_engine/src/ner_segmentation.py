@@ -1,24 +1,34 @@
 """NER-based text segmentation methods for the Simple Learning Engine."""
 
+import heapq
 import logging
 import re
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator
 
 logger = logging.getLogger(__name__)
 
 
 def segment_text_with_ner(nlp, text: str) -> List[Dict[str, Any]]:
     """Extract individual words using NER, focusing on nouns and removing verbs/articles."""
-    segments = []
-    
+    return list(iter_segments_with_ner(nlp, text))
+
+
+def iter_segments_with_ner(nlp, text: str) -> Iterator[Dict[str, Any]]:
+    """Yield the segments of segment_text_with_ner in start order.
+
+    Without an NLP model segments are produced lazily from a single scan of the text,
+    so callers can stream through large inputs.
+    """
     if not nlp:
         logger.warning("NLP model not available, falling back to basic segmentation")
-        return basic_segment_text(text)
+        yield from iter_basic_segments(text)
+        return
     
     # Process text with spaCy
     doc = nlp(text)
     
     # Extract words that are nouns or proper nouns, and skip articles/verbs
+    token_segments = []
     for token in doc:
         # Skip tokens that are:
         # - Stop words (articles, prepositions, etc.)
@@ -35,7 +45,7 @@ def segment_text_with_ner(nlp, text: str) -> List[Dict[str, Any]]:
             pii_type = determine_pii_type(token)
             
             if pii_type:
-                segments.append({
+                token_segments.append({
                     'text': token.text,
                     'start': token.idx,
                     'end': token.idx + len(token.text),
@@ -46,40 +56,48 @@ def segment_text_with_ner(nlp, text: str) -> List[Dict[str, Any]]:
                 })
     
     # Also extract multi-word entities identified by NER
-    for ent in doc.ents:
-        if is_pii_entity_type(ent.label_):
-            # Check if this entity overlaps with existing segments
-            overlap = any(
-                ent.start_char < seg['end'] and ent.end_char > seg['start']
-                for seg in segments
-            )
-            
-            if not overlap:
-                segments.append({
-                    'text': ent.text,
-                    'start': ent.start_char,
-                    'end': ent.end_char,
-                    'type': map_ner_label_to_pii_type(ent.label_),
-                    'pattern_matched': True,  # High confidence from NER
-                    'pos': 'ENTITY',
-                    'ent_type': ent.label_
-                })
-    
-    # Add pattern-based detection for specific PII formats
-    pattern_segments = extract_pattern_based_segments(text)
-    for seg in pattern_segments:
-        # Check for overlaps with NER results
-        overlap = any(
-            seg['start'] < existing['end'] and seg['end'] > existing['start']
-            for existing in segments
-        )
-        if not overlap:
-            segments.append(seg)
+    entity_segments = [
+        {
+            'text': ent.text,
+            'start': ent.start_char,
+            'end': ent.end_char,
+            'type': map_ner_label_to_pii_type(ent.label_),
+            'pattern_matched': True,  # High confidence from NER
+            'pos': 'ENTITY',
+            'ent_type': ent.label_
+        }
+        for ent in doc.ents
+        if is_pii_entity_type(ent.label_)
+    ]
     
-    # Sort segments by start position
-    segments.sort(key=lambda x: x['start'])
+    # Tokens win over entities, entities over pattern matches, and patterns in PII_PATTERNS order
+    priority_classes = [token_segments, entity_segments]
+    priority_classes.extend(scan_patterns(text).values())
+    yield from resolve_overlaps(priority_classes)
+
+
+def resolve_overlaps(priority_classes: List[List[Dict[str, Any]]]) -> Iterator[Dict[str, Any]]:
+    """Merge segment classes in priority order, dropping segments that overlap a kept one.
+
+    Each class must be sorted by start and free of overlaps within itself (spaCy tokens,
+    spaCy entities and the matches of one regex all are). A segment is then kept exactly
+    when it overlaps no kept segment of a higher-priority class, which a sorted sweep of
+    the class against the kept segments decides in linear time.
+    """
+    kept: List[Dict[str, Any]] = []
+    for candidates in priority_classes:
+        accepted = []
+        i = 0
+        for segment in candidates:
+            # Kept segments are disjoint and sorted, so their ends are sorted too
+            while i < len(kept) and kept[i]['end'] <= segment['start']:
+                i += 1
+            if i < len(kept) and kept[i]['start'] < segment['end']:
+                continue
+            accepted.append(segment)
+        kept = list(heapq.merge(kept, accepted, key=lambda segment: segment['start']))
     
-    return segments
+    yield from kept
 
 
 def determine_pii_type(token) -> Optional[str]:
@@ -142,57 +160,180 @@ def map_ner_label_to_pii_type(label: str) -> str:
     return mapping.get(label, 'unknown')
 
 
+# PII formats NER might miss, in priority order
+PII_PATTERNS = [
+    (r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', 'email'),  # Email
+    (r'\b(?:\+?1[-.\s]?)?\(?([0-9]{3})\)?[-.\s]?([0-9]{3})[-.\s]?([0-9]{4})\b', 'phone'),  # Phone
+    (r'\b\d{3}-\d{2}-\d{4}\b', 'ssn'),  # SSN
+    (r'\b\d{4}[-\s]?\d{4}[-\s]?\d{4}[-\s]?\d{4}\b', 'credit_card'),  # Credit Card
+    (r'\b\d{5}(?:-\d{4})?\b', 'postal_code'),  # ZIP codes
+]
+
+_PATTERN_GROUPS = [f"p{index}" for index in range(len(PII_PATTERNS))]
+
+
+def _build_scanner() -> re.Pattern:
+    """Compile one regex that stops wherever any PII pattern matches.
+
+    Each stop reports, through lookahead groups, what every pattern would match
+    starting there, so the text is scanned once instead of once per pattern.
+    """
+    union = "|".join(f"(?:{pattern})" for pattern, _ in PII_PATTERNS)
+    captures = "".join(
+        f"(?=(?P<{group}>{pattern})?)" for group, (pattern, _) in zip(_PATTERN_GROUPS, PII_PATTERNS)
+    )
+    # Every pattern starts at a word boundary, which rejects most positions cheaply
+    return re.compile(rf"\b(?={union}){captures}", re.IGNORECASE)
+
+
+_SCANNER = _build_scanner()
+
+
+def scan_patterns(text: str) -> Dict[str, List[Dict[str, Any]]]:
+    """Find PII pattern matches in a single pass over the text.
+
+    Returns, per pattern type in priority order, the segments that a separate
+    ``re.finditer`` pass of that pattern would produce.
+    """
+    pattern_segments: Dict[str, List[Dict[str, Any]]] = {pii_type: [] for _, pii_type in PII_PATTERNS}
+    next_start = [0] * len(PII_PATTERNS)
+    
+    for match in _SCANNER.finditer(text):
+        position = match.start()
+        for index, group in enumerate(_PATTERN_GROUPS):
+            end = match.end(group)
+            # finditer resumes after the previous match of the same pattern
+            if end >= 0 and position >= next_start[index]:
+                next_start[index] = end
+                pattern_segments[PII_PATTERNS[index][1]].append({
+                    'text': text[position:end].strip(),
+                    'start': position,
+                    'end': end,
+                    'type': PII_PATTERNS[index][1],
+                    'pattern_matched': True,
+                    'pos': 'PATTERN',
+                    'ent_type': 'PATTERN'
+                })
+    
+    return pattern_segments
+
+
 def extract_pattern_based_segments(text: str) -> List[Dict[str, Any]]:
     """Extract PII using regex patterns for formats NER might miss."""
     segments = []
-    
-    # Define PII patterns with their types
-    pii_patterns = [
-        (r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', 'email'),  # Email
-        (r'\b(?:\+?1[-.\s]?)?\(?([0-9]{3})\)?[-.\s]?([0-9]{3})[-.\s]?([0-9]{4})\b', 'phone'),  # Phone
-        (r'\b\d{3}-\d{2}-\d{4}\b', 'ssn'),  # SSN
-        (r'\b\d{4}[-\s]?\d{4}[-\s]?\d{4}[-\s]?\d{4}\b', 'credit_card'),  # Credit Card
-        (r'\b\d{5}(?:-\d{4})?\b', 'postal_code'),  # ZIP codes
-    ]
-    
-    for pattern, pii_type in pii_patterns:
-        for match in re.finditer(pattern, text, re.IGNORECASE):
-            segments.append({
-                'text': match.group().strip(),
-                'start': match.start(),
-                'end': match.end(),
-                'type': pii_type,
-                'pattern_matched': True,
-                'pos': 'PATTERN',
-                'ent_type': 'PATTERN'
-            })
-    
+    for pattern_matches in scan_patterns(text).values():
+        segments.extend(pattern_matches)
     return segments
 
 
 def basic_segment_text(text: str) -> List[Dict[str, Any]]:
     """Fallback basic segmentation when NER is not available."""
-    segments = []
-    words = text.split()
-    start_pos = 0
-    
-    for word in words:
-        # Find the actual position in text
-        word_start = text.find(word, start_pos)
-        word_end = word_start + len(word)
-        
-        # Basic check if word could be PII (capitalized, contains digits, etc.)
-        if (word[0].isupper() or any(c.isdigit() for c in word) or '@' in word):
-            segments.append({
-                'text': word,
-                'start': word_start,
-                'end': word_end,
-                'type': 'unknown',
-                'pattern_matched': False,
-                'pos': 'UNKNOWN',
-                'ent_type': 'NONE'
-            })
+    return list(iter_basic_segments(text))
+
+
+# Script classes for text without spaces between words
+_HAN = '\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+_HIRAGANA = '\u3041-\u309f'
+_KATAKANA = '\u30a0-\u30fa\u30fc-\u30ff\u31f0-\u31ff\uff66-\uff9f'
+_HANGUL = '\u1100-\u11ff\u3130-\u318f\uac00-\ud7af'
+# CJK punctuation, the ideographic space and the katakana middle dot separate words
+_CJK_SEPARATORS = '\u3000-\u303f\u30fb\uff01\uff0c\uff0e\uff1a\uff1b\uff1f'
+
+# One scan splits text into runs of a single script. Anything that is not CJK is a
+# maximal run of non-space characters, exactly the whitespace word used before, so
+# text without CJK characters segments as it always has. Hiragana runs (particles
+# and inflections) and separators are skipped.
+_SCRIPT_RUN = re.compile(
+    rf"(?P<other>[^\s{_HAN}{_HIRAGANA}{_KATAKANA}{_HANGUL}{_CJK_SEPARATORS}]+)"
+    rf"|(?P<han>[{_HAN}]+)"
+    rf"|(?P<katakana>[{_KATAKANA}]+)"
+    rf"|(?P<hangul>[{_HANGUL}]+)"
+)
+
+# Frequent single-character function words that delimit content words in Han runs
+_HAN_FUNCTION_CHARS = '的是在了和与及或我你他她它们这那有也就都而把被给从到为对于以等个之其'
+_HAN_WORD = re.compile(rf"[^{_HAN_FUNCTION_CHARS}]+")
+
+# Korean particles attached to the preceding word, longest first
+_KOREAN_PARTICLES = (
+    '에서', '에게', '께서', '한테', '부터', '까지', '으로', '이다',
+    '은', '는', '이', '가', '을', '를', '의', '에', '와', '과', '도', '로', '님', '씨'
+)
+
+# Common Chinese surnames; in long Han runs they start three-character name candidates
+_CHINESE_SURNAMES = frozenset(
+    '王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗郑梁谢宋唐许韩冯邓曹彭曾肖田董袁潘于蒋蔡余杜叶程苏魏吕丁任'
+    '沈姚卢姜崔钟谭陆汪范金石廖贾夏韦付方白邹孟熊秦邱江尹薛闫段雷侯龙史陶黎贺顾毛郝龚邵万钱严覃武戴莫孔向汤'
+)
+
+# Han runs up to this length are kept whole (most names and place names); longer
+# runs are covered by overlapping character bigrams plus surname-led trigrams
+_MAX_CJK_WORD_LENGTH = 4
+_MIN_CJK_WORD_LENGTH = 2
+
+
+def _cjk_segment(text: str, start: int) -> Dict[str, Any]:
+    return {
+        'text': text,
+        'start': start,
+        'end': start + len(text),
+        'type': 'unknown',
+        'pattern_matched': False,
+        'pos': 'CJK',
+        'ent_type': 'NONE'
+    }
+
+
+def _han_segments(run: str, offset: int) -> Iterator[Dict[str, Any]]:
+    """Split a Han run at function characters; long pieces become character n-grams."""
+    for piece in _HAN_WORD.finditer(run):
+        word = piece.group()
+        start = offset + piece.start()
+        if len(word) < _MIN_CJK_WORD_LENGTH:
+            continue
+        if len(word) <= _MAX_CJK_WORD_LENGTH:
+            yield _cjk_segment(word, start)
+        else:
+            for i in range(len(word) - 1):
+                yield _cjk_segment(word[i:i + 2], start + i)
+                if word[i] in _CHINESE_SURNAMES and i + 3 <= len(word):
+                    yield _cjk_segment(word[i:i + 3], start + i)
+
+
+def _strip_korean_particle(word: str) -> str:
+    for particle in _KOREAN_PARTICLES:
+        if word.endswith(particle) and len(word) - len(particle) >= _MIN_CJK_WORD_LENGTH:
+            return word[:-len(particle)]
+    return word
+
+
+def iter_basic_segments(text: str) -> Iterator[Dict[str, Any]]:
+    """Yield words that could be PII, with their offsets, in one pass.
+
+    Whitespace separates words; within Chinese, Japanese and Korean text, words are
+    split further by script: Han runs at function characters (or into bigrams),
+    katakana runs whole, and Hangul runs with trailing particles removed.
+    """
+    for match in _SCRIPT_RUN.finditer(text):
+        script = match.lastgroup
+        word = match.group()
         
-        start_pos = word_end
-    
-    return segments
\ No newline at end of file
+        if script == 'other':
+            # Basic check if word could be PII (capitalized, contains digits, etc.)
+            if (word[0].isupper() or any(c.isdigit() for c in word) or '@' in word):
+                yield {
+                    'text': word,
+                    'start': match.start(),
+                    'end': match.end(),
+                    'type': 'unknown',
+                    'pattern_matched': False,
+                    'pos': 'UNKNOWN',
+                    'ent_type': 'NONE'
+                }
+        elif script == 'han':
+            yield from _han_segments(word, match.start())
+        else:
+            if script == 'hangul':
+                word = _strip_korean_particle(word)
+            if len(word) >= _MIN_CJK_WORD_LENGTH:
+                yield _cjk_segment(word, match.start())
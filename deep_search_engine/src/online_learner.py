@@ -0,0 +1,64 @@
+"""Incrementally trained classifier for the Simple Learning Engine."""
+
+from typing import List, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import accuracy_score
+
+from .compact_model import HashedFeatures
+
+PII_CLASSES = ("non_pii", "pii")
+
+
+class OnlineClassifier:
+    """Binary logistic regression over hashed word n-grams, trained with ``partial_fit``.
+
+    Hashing removes the fitted vocabulary, so a labeled batch updates the model in
+    time proportional to the batch instead of refitting on everything seen so far.
+    Exposes ``classes_`` and ``predict_proba`` like the scikit-learn pipeline it replaces.
+    """
+
+    def __init__(self, n_features: int = 2 ** 18, ngram_range: Tuple[int, int] = (1, 2),
+                 alpha: float = 1e-4, classes: Tuple[str, ...] = PII_CLASSES):
+        self.hasher = HashedFeatures(n_features=n_features, ngram_range=ngram_range)
+        self.classifier = SGDClassifier(loss='log_loss', alpha=alpha, random_state=42)
+        self.classes_ = np.array(sorted(classes))
+        self.version = 0
+        self.samples_seen = 0
+
+    @property
+    def is_fitted(self) -> bool:
+        return hasattr(self.classifier, 'coef_')
+
+    @property
+    def coef(self) -> np.ndarray:
+        return self.classifier.coef_[0]
+
+    @property
+    def intercept(self) -> float:
+        return float(self.classifier.intercept_[0])
+
+    def transform(self, texts: List[str]) -> csr_matrix:
+        """Hashed feature matrix for texts."""
+        rows, columns, values = self.hasher.transform_pairs(list(texts))
+        return csr_matrix((values, (rows, columns)), shape=(len(texts), self.hasher.n_features))
+
+    def partial_fit(self, texts: List[str], labels: List[str]) -> "OnlineClassifier":
+        """Update the model with one batch of labeled texts."""
+        self.classifier.partial_fit(self.transform(texts), labels, classes=self.classes_)
+        self.samples_seen += len(texts)
+        return self
+
+    def predict_proba(self, texts: List[str]) -> np.ndarray:
+        """Class probabilities in ``classes_`` order."""
+        return self.classifier.predict_proba(self.transform(texts))
+
+    def predict(self, texts: List[str]) -> np.ndarray:
+        """Predicted class label for each text."""
+        return self.classifier.predict(self.transform(texts))
+
+    def score(self, texts: List[str], labels: List[str]) -> float:
+        """Accuracy on a labeled batch."""
+        return float(accuracy_score(labels, self.predict(texts)))
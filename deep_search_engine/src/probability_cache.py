@@ -0,0 +1,78 @@
+"""Bounded LRU cache of per-token PII probabilities for the Simple Learning Engine."""
+
+import sys
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+CacheKey = Tuple[int, str, str, str]
+
+# Approximate per-entry cost of the OrderedDict node, key tuple and float value
+_ENTRY_OVERHEAD_BYTES = 200
+
+
+class TokenProbabilityCache:
+    """Maps (model version, token text, PII type, POS tag) to the probability computed for it.
+
+    Memory is bounded by an estimate of the bytes held by keys and values; the least
+    recently used entries are evicted first. The cache must be cleared whenever the
+    model is replaced, since a reloaded model can reuse a version number.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[CacheKey, Tuple[float, int]]" = OrderedDict()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _entry_size(key: CacheKey) -> int:
+        return _ENTRY_OVERHEAD_BYTES + sum(sys.getsizeof(part) for part in key[1:])
+
+    def get(self, key: CacheKey) -> Optional[float]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key: CacheKey, probability: float):
+        size = self._entry_size(key)
+        if size > self.max_bytes:
+            return
+
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.current_bytes -= previous[1]
+
+        self._entries[key] = (probability, size)
+        self.current_bytes += size
+
+        while self.current_bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.current_bytes -= evicted_size
+            self.evictions += 1
+
+    def clear(self):
+        """Drop all entries; hit and miss counters are kept."""
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "memory_bytes": self.current_bytes,
+            "max_memory_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
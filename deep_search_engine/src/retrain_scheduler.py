@@ -0,0 +1,151 @@
+"""Coalescing scheduler for model updates triggered by training data ingestion."""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Sample = Tuple[str, str]
+
+
+class RetrainScheduler:
+    """Buffers incoming training samples and trains on them in as few runs as possible.
+
+    ``submit`` only appends to the buffer and returns. A single background worker
+    trains on everything buffered once ``batch_size`` samples are waiting or the oldest
+    sample has waited ``max_delay_seconds``, whichever comes first. Training runs hold
+    a lock, so at most one runs at a time, including full retrains started elsewhere.
+    """
+
+    def __init__(self, train: Callable[[List[Sample]], Awaitable[None]],
+                 batch_size: int = 100, max_delay_seconds: float = 30.0):
+        self._train = train
+        self.batch_size = batch_size
+        self.max_delay_seconds = max_delay_seconds
+
+        self._pending: List[Sample] = []
+        self._first_pending_at: Optional[float] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        self.is_training = False
+        self.last_retrain_at: Optional[float] = None
+        self.retrains_completed = 0
+        self.samples_trained = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def queue_size(self) -> int:
+        return len(self._pending)
+
+    def submit(self, samples: List[Sample]):
+        """Buffer samples for the next training run; never waits for training."""
+        if not samples:
+            return
+
+        self._ensure_worker()
+        if not self._pending:
+            self._first_pending_at = time.monotonic()
+        self._pending.extend(samples)
+        self._wakeup.set()
+
+    async def flush(self):
+        """Train on everything buffered now, waiting for a running update first."""
+        self._ensure_worker()
+        async with self._lock:
+            await self._train_pending()
+
+    async def run_exclusive(self, retrain: Callable[[], Awaitable[None]]):
+        """Run a full retrain under the training lock.
+
+        Buffered samples are dropped: they are already in the training log, so the
+        full retrain covers them.
+        """
+        self._ensure_worker()
+        async with self._lock:
+            self._pending = []
+            self._first_pending_at = None
+            await self._run(retrain, 0)
+
+    async def stop(self):
+        """Stop the background worker. Buffered samples stay in the training log."""
+        if self._worker is not None:
+            # wait_for can swallow the cancellation when its wakeup fires at the same
+            # time; the flag still ends the worker loop on its next pass
+            self._stopping = True
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "queue_size": self.queue_size,
+            "is_training": self.is_training,
+            "seconds_since_last_retrain": (
+                round(time.time() - self.last_retrain_at, 3) if self.last_retrain_at is not None else None
+            ),
+            "retrains_completed": self.retrains_completed,
+            "samples_trained": self.samples_trained,
+            "batch_size": self.batch_size,
+            "max_delay_seconds": self.max_delay_seconds,
+            "last_error": self.last_error,
+        }
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            if self._lock is None:
+                self._lock = asyncio.Lock()
+                self._wakeup = asyncio.Event()
+            self._stopping = False
+            self._worker = asyncio.get_event_loop().create_task(self._work())
+
+    async def _work(self):
+        while not self._stopping:
+            if not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            remaining = self._first_pending_at + self.max_delay_seconds - time.monotonic()
+            if len(self._pending) < self.batch_size and remaining > 0:
+                # Wait for more samples or the deadline, whichever comes first
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            async with self._lock:
+                await self._train_pending()
+
+    async def _train_pending(self):
+        """Train on the whole buffer; the caller holds the lock."""
+        if not self._pending:
+            return
+
+        samples = self._pending
+        self._pending = []
+        self._first_pending_at = None
+        await self._run(lambda: self._train(samples), len(samples))
+
+    async def _run(self, train: Callable[[], Awaitable[None]], sample_count: int):
+        self.is_training = True
+        try:
+            await train()
+            self.retrains_completed += 1
+            self.samples_trained += sample_count
+            self.last_error = None
+        except Exception as e:
+            self.last_error = str(e)
+            logger.error(f"Scheduled retrain failed: {e}")
+        finally:
+            self.is_training = False
+            self.last_retrain_at = time.time()
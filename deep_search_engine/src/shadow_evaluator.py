@@ -0,0 +1,224 @@
+"""Shadow evaluation of a candidate model on sampled live search traffic."""
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .model_pool import PooledModel
+from .models import DeepSearchRequest, PIIClassificationResult
+
+logger = logging.getLogger(__name__)
+
+# Yields the candidate's detections one chunk of segments at a time
+ShadowScorer = Callable[[DeepSearchRequest, PooledModel], Iterable[List[PIIClassificationResult]]]
+
+
+class ShadowBudgetExceeded(Exception):
+    """A sample took longer to score than the evaluator's budget."""
+
+
+def _percentiles(values: Deque[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"p50": None, "p95": None, "mean": None}
+    array = np.fromiter(values, dtype=float)
+    return {
+        "p50": round(float(np.percentile(array, 50)), 3),
+        "p95": round(float(np.percentile(array, 95)), 3),
+        "mean": round(float(array.mean()), 3),
+    }
+
+
+class ShadowEvaluator:
+    """Scores a sampled fraction of search requests with a candidate model.
+
+    ``offer`` is called after the primary response is computed and returns at once;
+    sampled requests are scored on a dedicated worker thread and compared with the
+    primary results. When ``max_pending`` evaluations are already queued, further
+    samples are dropped instead of queueing, so the shadow can never fall behind.
+
+    The worker thread still needs the GIL, which primary requests scored on the event
+    loop need too. The scorer yields in chunks and the worker sleeps after each chunk
+    for ``pause_ratio`` times as long as the chunk took, so the candidate holds the GIL for
+    roughly 1 / (1 + pause_ratio) of the time at most; a sample whose scoring exceeds
+    ``budget_ms`` is abandoned and counted as over budget.
+    """
+
+    def __init__(self, score: ShadowScorer, max_pending: int = 4, history: int = 1000,
+                 budget_ms: float = 250.0, pause_ratio: float = 3.0):
+        self._score = score
+        self.max_pending = max_pending
+        self.history = history
+        self.budget_ms = budget_ms
+        self.pause_ratio = pause_ratio
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._rng = random.Random()
+        self._generation = 0
+
+        self.candidate: Optional[PooledModel] = None
+        self.candidate_version: Optional[str] = None
+        self.sample_rate = 0.0
+        self._reset()
+
+    def _reset(self):
+        self.started_at: Optional[str] = None
+        self.requests_seen = 0
+        self.requests_sampled = 0
+        self.requests_dropped = 0
+        self.over_budget = 0
+        self.evaluated = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self.identical_requests = 0
+        self.detections_both = 0
+        self.detections_primary_only = 0
+        self.detections_candidate_only = 0
+        self._primary_latency_ms: Deque[float] = deque(maxlen=self.history)
+        self._shadow_latency_ms: Deque[float] = deque(maxlen=self.history)
+        self._probability_deltas: Deque[float] = deque(maxlen=self.history)
+
+    @property
+    def is_active(self) -> bool:
+        return self.candidate is not None
+
+    def start(self, candidate: PooledModel, version: str, sample_rate: float):
+        """Begin shadowing with a new candidate; the previous report is discarded."""
+        if not 0.0 < sample_rate <= 1.0:
+            raise ValueError("sample_rate must be in (0, 1]")
+
+        self._reset()
+        self._generation += 1
+        self.candidate = candidate
+        self.candidate_version = version
+        self.sample_rate = sample_rate
+        self.started_at = datetime.now().isoformat()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow-eval")
+        logger.info(f"Shadow evaluation of model {version} started at sample rate {sample_rate}")
+
+    async def stop(self) -> Dict[str, Any]:
+        """Stop shadowing, wait for in-flight evaluations and return the final report."""
+        self.candidate = None
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        report = self.get_report()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        return report
+
+    def offer(self, request: DeepSearchRequest, primary_items: List[PIIClassificationResult],
+              primary_latency_ms: float):
+        """Consider a finished primary request for shadow scoring; never waits."""
+        candidate = self.candidate
+        if candidate is None or request.model_version:
+            return
+
+        self.requests_seen += 1
+        if self._rng.random() >= self.sample_rate:
+            return
+        if len(self._tasks) >= self.max_pending:
+            self.requests_dropped += 1
+            return
+
+        self.requests_sampled += 1
+        task = asyncio.get_event_loop().create_task(
+            self._evaluate(request, candidate, list(primary_items), primary_latency_ms, self._generation)
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _evaluate(self, request: DeepSearchRequest, candidate: PooledModel,
+                        primary_items: List[PIIClassificationResult], primary_latency_ms: float, generation: int):
+        loop = asyncio.get_event_loop()
+        try:
+            shadow_items, shadow_latency_ms = await loop.run_in_executor(
+                self._executor, self._score_bounded, request, candidate
+            )
+        except ShadowBudgetExceeded:
+            self.over_budget += 1
+            return
+        except Exception as e:
+            self.errors += 1
+            self.last_error = str(e)
+            logger.warning(f"Shadow evaluation failed: {e}")
+            return
+
+        # A new candidate may have been started while this request was being scored
+        if generation != self._generation:
+            return
+        self._record(primary_items, shadow_items, primary_latency_ms, shadow_latency_ms)
+
+    def _score_bounded(self, request: DeepSearchRequest,
+                       candidate: PooledModel) -> Tuple[List[PIIClassificationResult], float]:
+        """Score on the worker thread, pausing between chunks; returns the items and scoring time."""
+        items: List[PIIClassificationResult] = []
+        busy_ms = 0.0
+        chunks = iter(self._score(request, candidate))
+        while True:
+            start = time.perf_counter()
+            chunk = next(chunks, None)
+            chunk_ms = (time.perf_counter() - start) * 1000
+            if chunk is None:
+                return items, busy_ms
+            items.extend(chunk)
+            busy_ms += chunk_ms
+            if busy_ms > self.budget_ms:
+                raise ShadowBudgetExceeded()
+            time.sleep(chunk_ms * self.pause_ratio / 1000)
+
+    def _record(self, primary_items: List[PIIClassificationResult], shadow_items: List[PIIClassificationResult],
+                primary_latency_ms: float, shadow_latency_ms: float):
+        primary = {(item.position.start, item.position.end): item.probability for item in primary_items}
+        shadow = {(item.position.start, item.position.end): item.probability for item in shadow_items}
+        both = primary.keys() & shadow.keys()
+
+        self.evaluated += 1
+        self.identical_requests += int(primary.keys() == shadow.keys())
+        self.detections_both += len(both)
+        self.detections_primary_only += len(primary.keys() - shadow.keys())
+        self.detections_candidate_only += len(shadow.keys() - primary.keys())
+        self._probability_deltas.extend(shadow[span] - primary[span] for span in both)
+        self._primary_latency_ms.append(primary_latency_ms)
+        self._shadow_latency_ms.append(shadow_latency_ms)
+
+    def get_report(self) -> Dict[str, Any]:
+        detections = self.detections_both + self.detections_primary_only + self.detections_candidate_only
+        deltas = np.fromiter(self._probability_deltas, dtype=float)
+        return {
+            "active": self.is_active,
+            "candidate_version": self.candidate_version,
+            "sample_rate": self.sample_rate,
+            "started_at": self.started_at,
+            "requests_seen": self.requests_seen,
+            "requests_sampled": self.requests_sampled,
+            "requests_dropped": self.requests_dropped,
+            "over_budget": self.over_budget,
+            "evaluated": self.evaluated,
+            "pending": len(self._tasks),
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "latency_ms": {
+                "primary": _percentiles(self._primary_latency_ms),
+                "candidate": _percentiles(self._shadow_latency_ms),
+            },
+            "agreement": {
+                "request_agreement_rate": round(self.identical_requests / self.evaluated, 4) if self.evaluated else None,
+                "detection_agreement_rate": round(self.detections_both / detections, 4) if detections else None,
+                "detected_by_both": self.detections_both,
+                "primary_only": self.detections_primary_only,
+                "candidate_only": self.detections_candidate_only,
+            },
+            "probability_drift": {
+                "mean_delta": round(float(deltas.mean()), 4) if deltas.size else None,
+                "mean_abs_delta": round(float(np.abs(deltas).mean()), 4) if deltas.size else None,
+                "max_abs_delta": round(float(np.abs(deltas).max()), 4) if deltas.size else None,
+            },
+        }
@@ -1,12 +1,15 @@
 import asyncio
+import copy
+import itertools
+import json
 import logging
 import pickle
 import os
-from typing import List, Dict, Any, Optional
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Iterator, Tuple, Callable
 from datetime import datetime
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
-from sklearn.pipeline import Pipeline
 from sklearn.metrics import classification_report, accuracy_score
 import numpy as np
 # import spacy  # Disabled for simplified setup
@@ -23,10 +26,59 @@ from .models import (
     TrainingRequest,
     ModelInfo
 )
-from .ner_segmentation import segment_text_with_ner
+from .ner_segmentation import segment_text_with_ner, iter_segments_with_ner
+from .stage1_index import Stage1WeightIndex
+from .compact_model import (
+    MANIFEST_FILE, compact_path_for, export_compact_model, load_compact_model
+)
+from .online_learner import OnlineClassifier, PII_CLASSES
+from .training_log import TrainingLog, is_held_out
+from .retrain_scheduler import RetrainScheduler
+from .probability_cache import TokenProbabilityCache
+from .model_store import atomic_write
+from .model_pool import PooledModel
+from .model_manager import MODEL_FILE, RUNTIME_DIR_NAME
+from .shadow_evaluator import ShadowEvaluator
 
 logger = logging.getLogger(__name__)
 
+# Segments scored per model call when streaming through a request; shadow
+# scoring uses smaller chunks because it pauses between them
+SEGMENT_CHUNK_SIZE = 4096
+SHADOW_CHUNK_SIZE = 256
+
+# Basic training data for bootstrapping; replayed before the training log on every rebuild
+DEFAULT_TRAINING_DATA = [
+    # PII examples
+    ("john.doe@example.com", "pii"),
+    ("john.smith@gmail.com", "pii"),
+    ("contact@company.org", "pii"),
+    ("John Doe", "pii"),
+    ("Jane Smith", "pii"),
+    ("555-123-4567", "pii"),
+    ("(555) 987-6543", "pii"),
+    ("123 Main Street", "pii"),
+    ("New York, NY 10001", "pii"),
+    ("4532-1234-5678-9012", "pii"),
+    ("123-45-6789", "pii"),
+    ("December 15, 1990", "pii"),
+    ("01/15/1985", "pii"),
+    
+    # Non-PII examples
+    ("the weather is nice today", "non_pii"),
+    ("machine learning is fascinating", "non_pii"),
+    ("please review the document", "non_pii"),
+    ("the meeting is scheduled", "non_pii"),
+    ("artificial intelligence", "non_pii"),
+    ("data processing completed", "non_pii"),
+    ("system maintenance required", "non_pii"),
+    ("backup completed successfully", "non_pii"),
+    ("performance metrics improved", "non_pii"),
+    ("security updates installed", "non_pii"),
+    ("network connectivity restored", "non_pii"),
+    ("database optimization finished", "non_pii"),
+]
+
 class SimpleLearningEngine:
     """Simple ML Classification engine using scikit-learn for binary PII detection with NER-based noun extraction."""
     
@@ -34,9 +86,33 @@ class SimpleLearningEngine:
         self.model = None
         self.nlp = None  # spaCy model for NER
         self.is_initialized = False
-        self.model_path = "models/active/simple_classifier.pkl"
-        self.training_data = []
+        self.model_path = os.path.join(config.model_path, RUNTIME_DIR_NAME, "active", MODEL_FILE)
+        # Shipped with the repository; read when there is no active model yet, never written
+        self.seed_model_path = os.path.join(config.model_path, "active", MODEL_FILE)
+        self.training_log = TrainingLog(
+            config.online_learning["log_dir"],
+            max_segment_bytes=int(float(config.online_learning["max_segment_mb"]) * 1024 * 1024)
+        )
+        self.version_metrics: List[Dict[str, Any]] = []
+        self.probability_cache = TokenProbabilityCache(config.probability_cache_max_bytes)
+        self.retrain_scheduler = RetrainScheduler(
+            self._update_model,
+            batch_size=config.retrain_scheduler["batch_size"],
+            max_delay_seconds=config.retrain_scheduler["max_delay_seconds"]
+        )
+        self.shadow_evaluator = ShadowEvaluator(
+            self._score_shadow_request,
+            max_pending=config.shadow_evaluation["max_pending"],
+            history=config.shadow_evaluation["history"],
+            budget_ms=config.shadow_evaluation["budget_ms"],
+            pause_ratio=config.shadow_evaluation["pause_ratio"]
+        )
+        self.shadow_probability_cache = TokenProbabilityCache(config.probability_cache_max_bytes)
         self.training_status = {"is_training": False, "progress": 0, "model": None}
+        # Held by model updates, rebuilds and reloads so none of them overwrites another's model
+        self._model_lock = asyncio.Lock()
+        # Single thread for training log writes, which fsync and must not interleave
+        self._log_executor: Optional[ThreadPoolExecutor] = None
         
         # Create models directory if it doesn't exist
         os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
@@ -54,6 +130,8 @@ class SimpleLearningEngine:
             # Try to load existing model
             if os.path.exists(self.model_path):
                 await self._load_model()
+            elif os.path.exists(self.seed_model_path):
+                await self._load_seed_model()
             else:
                 # Create default model with basic training data
                 await self._create_default_model()
@@ -72,71 +150,189 @@ class SimpleLearningEngine:
     async def _load_model(self):
         """Load the trained model from disk."""
         try:
-            with open(self.model_path, 'rb') as f:
-                self.model = pickle.load(f)
+            self._activate_model(self._read_model_from_disk())
+            self.version_metrics = self._read_version_metrics()
             logger.info("Loaded existing model from disk")
         except Exception as e:
             logger.error(f"Failed to load model: {e}")
             await self._create_default_model()
     
+    async def _load_seed_model(self):
+        """Start from the shipped model and save a copy of it as the active model."""
+        try:
+            with open(self.seed_model_path, 'rb') as f:
+                self._activate_model(pickle.load(f))
+            await self._save_model()
+            logger.info(f"Loaded shipped model from {self.seed_model_path}")
+        except Exception as e:
+            logger.error(f"Failed to load shipped model: {e}")
+            await self._create_default_model()
+    
+    def _activate_model(self, model):
+        """Swap in a new model and drop probabilities cached for the previous one."""
+        self.model = model
+        self.probability_cache.clear()
+    
+    def _read_model_from_disk(self):
+        """Read the active model, preferring an up-to-date compact export over the pickle."""
+        compact_path = compact_path_for(self.model_path)
+        manifest_file = compact_path / MANIFEST_FILE
+        if manifest_file.exists() and manifest_file.stat().st_mtime >= os.path.getmtime(self.model_path):
+            try:
+                return load_compact_model(compact_path)
+            except Exception as e:
+                logger.warning(f"Failed to load compact model, falling back to pickle: {e}")
+        
+        with open(self.model_path, 'rb') as f:
+            model = pickle.load(f)
+        
+        # Export so the next load can skip unpickling
+        self._export_compact_model(model)
+        return model
+    
+    def _export_compact_model(self, model):
+        """Write the compact, memory-mappable export next to the pickled model."""
+        try:
+            export_compact_model(model, compact_path_for(self.model_path))
+        except ValueError as e:
+            logger.info(f"Model not exportable to compact format: {e}")
+        except Exception as e:
+            logger.error(f"Failed to export compact model: {e}")
+    
+    def _get_trainable_model(self):
+        """Return the trainable model, unpickling it if only the compact scorer is loaded."""
+        if hasattr(self.model, 'fit') or hasattr(self.model, 'partial_fit'):
+            return self.model
+        
+        with open(self.model_path, 'rb') as f:
+            return pickle.load(f)
+    
     async def _save_model(self):
         """Save the trained model to disk."""
         try:
-            with open(self.model_path, 'wb') as f:
-                pickle.dump(self.model, f)
+            # Replace rather than rewrite: the active files may be hard links into the model store
+            atomic_write(self.model_path, pickle.dumps(self.model))
             logger.info("Model saved to disk")
         except Exception as e:
             logger.error(f"Failed to save model: {e}")
+            return
+        
+        self._export_compact_model(self.model)
     
     async def _create_default_model(self):
-        """Create a default model with basic training data."""
+        """Create a default model from the bootstrap data and any logged training samples."""
         logger.info("Creating default model with basic training data...")
         
-        # Basic training data for bootstrapping
-        default_training_data = [
-            # PII examples
-            ("john.doe@example.com", "pii"),
-            ("john.smith@gmail.com", "pii"),
-            ("contact@company.org", "pii"),
-            ("John Doe", "pii"),
-            ("Jane Smith", "pii"),
-            ("555-123-4567", "pii"),
-            ("(555) 987-6543", "pii"),
-            ("123 Main Street", "pii"),
-            ("New York, NY 10001", "pii"),
-            ("4532-1234-5678-9012", "pii"),
-            ("123-45-6789", "pii"),
-            ("December 15, 1990", "pii"),
-            ("01/15/1985", "pii"),
-            
-            # Non-PII examples
-            ("the weather is nice today", "non_pii"),
-            ("machine learning is fascinating", "non_pii"),
-            ("please review the document", "non_pii"),
-            ("the meeting is scheduled", "non_pii"),
-            ("artificial intelligence", "non_pii"),
-            ("data processing completed", "non_pii"),
-            ("system maintenance required", "non_pii"),
-            ("backup completed successfully", "non_pii"),
-            ("performance metrics improved", "non_pii"),
-            ("security updates installed", "non_pii"),
-            ("network connectivity restored", "non_pii"),
-            ("database optimization finished", "non_pii"),
-        ]
+        self._activate_rebuilt_model(*self._rebuild_online_model())
+        await self._save_model()
+        
+        logger.info("Default model created and saved")
+    
+    @property
+    def model_version(self) -> int:
+        """Version of the active model; incremented by every incremental update or rebuild."""
+        return getattr(self.model, 'version', 0)
+    
+    @property
+    def metrics_path(self) -> str:
+        """Per-version training metrics, stored alongside the active model."""
+        return os.path.join(os.path.dirname(self.model_path), "training_metrics.json")
+    
+    def _read_version_metrics(self) -> List[Dict[str, Any]]:
+        """Load the per-version metrics that belong to the active model."""
+        try:
+            with open(self.metrics_path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+        except Exception as e:
+            logger.warning(f"Failed to read training metrics: {e}")
+            return []
+    
+    def _record_version_metrics(self, model: OnlineClassifier, kind: str, samples: int,
+                                accuracy: Optional[float], evaluation: str, evaluated_samples: int,
+                                latency_ms: float):
+        """Record accuracy, the number of samples it was measured on, and update latency for a new model version."""
+        self.version_metrics.append({
+            "version": model.version,
+            "kind": kind,
+            "samples": samples,
+            "total_samples_seen": model.samples_seen,
+            "accuracy": accuracy,
+            "evaluation": evaluation,
+            "evaluated_samples": evaluated_samples,
+            "update_latency_ms": round(latency_ms, 3),
+            "timestamp": datetime.now().isoformat()
+        })
+        self.version_metrics = self.version_metrics[-config.online_learning["metrics_history"]:]
+        
+        try:
+            atomic_write(self.metrics_path, json.dumps(self.version_metrics, indent=2).encode('utf-8'))
+        except Exception as e:
+            logger.error(f"Failed to save training metrics: {e}")
+    
+    def _iter_training_batches(self, batch_size: int, epoch: int = 0,
+                               held_out: bool = False) -> Iterator[Tuple[List[str], List[str]]]:
+        """Stream one split of the bootstrap data and training log, shuffling within each batch.
         
-        # Train initial model
-        texts = [item[0] for item in default_training_data]
-        labels = [item[1] for item in default_training_data]
+        The bootstrap data always trains; logged samples are split by content hash, so
+        the held-out split stays the same from one rebuild to the next.
+        """
+        rng = random.Random(epoch)
+        if not held_out:
+            yield self._shuffled(
+                [item[0] for item in DEFAULT_TRAINING_DATA], [item[1] for item in DEFAULT_TRAINING_DATA], rng
+            )
         
-        self.model = Pipeline([
-            ('tfidf', TfidfVectorizer(max_features=1000, ngram_range=(1, 2))),
-            ('classifier', LogisticRegression(random_state=42))
-        ])
+        fraction = config.online_learning["holdout_fraction"]
+        for texts, labels in self.training_log.iter_batches(batch_size):
+            selected = [i for i in range(len(texts)) if is_held_out(texts[i], labels[i], fraction) == held_out]
+            if selected:
+                yield self._shuffled([texts[i] for i in selected], [labels[i] for i in selected], rng)
+    
+    @staticmethod
+    def _shuffled(texts: List[str], labels: List[str], rng: random.Random) -> Tuple[List[str], List[str]]:
+        order = list(range(len(texts)))
+        rng.shuffle(order)
+        return [texts[i] for i in order], [labels[i] for i in order]
+    
+    def _rebuild_online_model(self) -> Tuple[OnlineClassifier, Dict[str, Any]]:
+        """Train a new online model from scratch by streaming the bootstrap data and training log.
         
-        self.model.fit(texts, labels)
-        await self._save_model()
+        Safe to run on a worker thread: returns the model with its metrics, which
+        _activate_rebuilt_model records on the event loop.
+        """
+        settings = config.online_learning
+        # The same penalty as LogisticRegression(C) fitted to all samples, so rebuilt models give
+        # the probabilities of the pipeline they replaced instead of much sharper ones
+        corpus_size = len(DEFAULT_TRAINING_DATA) + len(self.training_log)
+        model = OnlineClassifier(n_features=settings["n_features"], alpha=1.0 / (settings["C"] * corpus_size))
         
-        logger.info("Default model created and saved")
+        start = time.perf_counter()
+        for epoch in range(settings["rebuild_epochs"]):
+            for texts, labels in self._iter_training_batches(settings["batch_size"], epoch):
+                model.partial_fit(texts, labels)
+        latency_ms = (time.perf_counter() - start) * 1000
+        
+        # Accuracy on logged samples the rebuild never trained on
+        correct = held_out = 0
+        for texts, labels in self._iter_training_batches(settings["batch_size"], held_out=True):
+            correct += model.score(texts, labels) * len(texts)
+            held_out += len(texts)
+        
+        return model, {
+            "kind": "rebuild",
+            "samples": model.samples_seen // settings["rebuild_epochs"],
+            "accuracy": correct / held_out if held_out else None,
+            "evaluation": "held_out",
+            "evaluated_samples": held_out,
+            "latency_ms": latency_ms
+        }
+    
+    def _activate_rebuilt_model(self, model: OnlineClassifier, metrics: Dict[str, Any]):
+        model.version = self.model_version + 1
+        self._record_version_metrics(model, **metrics)
+        self._activate_model(model)
     
     def is_ready(self) -> bool:
         """Check if the engine is ready to process requests."""
@@ -149,37 +345,66 @@ class SimpleLearningEngine:
         
         logger.info(f"Starting binary classification for text length: {len(request.text)}")
         
-        detected_items = []
-        
-        # Process Stage 1 weights if available
-        stage1_weights = self._process_stage1_weights(request.stage1_weights if request.stage1_weights else [])
+        start = time.perf_counter()
+        # A per-request version override scores with a pooled model; the active model is untouched
+        pooled = await self._get_pooled_model(request.model_version) if request.model_version else None
+        detected_items = self._detect_pii(request, pooled)
         
-        # Enhanced text segmentation - use word-based approach
-        segments = self._segment_text_enhanced(request.text)
-        
-        for segment in segments:
-            if len(segment['text'].strip()) > 0:
-                # Apply Stage 1 weights to influence classification
-                stage1_weight = self._find_stage1_weight(segment, stage1_weights)
-                
-                classification_result = await self._classify_segment_with_weights(
-                    segment, request.confidence_threshold, stage1_weight
-                )
-                if classification_result:
-                    detected_items.append(classification_result)
+        # Compare a sample of requests against the shadow candidate, off the critical path
+        self.shadow_evaluator.offer(request, detected_items, (time.perf_counter() - start) * 1000)
         
         response = DeepSearchResponse(
             items=detected_items,
             model_info={
                 "primary_model": "simple_learning_classifier",
                 "languages_processed": request.languages,
-                "method": "sklearn_binary_classification"
+                "method": "sklearn_binary_classification",
+                "model_version": request.model_version or str(self.model_version)
             }
         )
         
         logger.info(f"Binary classification completed. Found {len(detected_items)} PII segments")
         return response
     
+    def _detect_pii(self, request: DeepSearchRequest, pooled: Optional[PooledModel] = None,
+                    probability_cache: Optional[TokenProbabilityCache] = None) -> List[PIIClassificationResult]:
+        """Segment the request text and classify every segment, with the active or a pooled model."""
+        return [item for chunk in self._iter_detections(request, pooled, probability_cache) for item in chunk]
+    
+    def _iter_detections(self, request: DeepSearchRequest, pooled: Optional[PooledModel] = None,
+                         probability_cache: Optional[TokenProbabilityCache] = None,
+                         chunk_size: int = SEGMENT_CHUNK_SIZE) -> Iterator[List[PIIClassificationResult]]:
+        """Yield the detections of each chunk of up to chunk_size segments."""
+        # Process Stage 1 weights if available
+        stage1_weights = self._process_stage1_weights(request.stage1_weights if request.stage1_weights else [])
+        
+        # Enhanced text segmentation - use word-based approach, streamed lazily
+        segments = (
+            segment for segment in iter_segments_with_ner(self.nlp, request.text)
+            if len(segment['text'].strip()) > 0
+        )
+        stage1_index = Stage1WeightIndex(stage1_weights)
+        
+        # Score segments in chunks, one model call per chunk, so large texts never
+        # hold every segment in memory at once
+        while True:
+            chunk = list(itertools.islice(segments, chunk_size))
+            if not chunk:
+                break
+            
+            # Apply Stage 1 weights to influence classification
+            stage1_matches = [stage1_index.find(segment) for segment in chunk]
+            yield self._classify_segments_batch(
+                chunk, request.confidence_threshold, stage1_matches, pooled, probability_cache
+            )
+    
+    def _score_shadow_request(self, request: DeepSearchRequest, candidate: PooledModel) -> Iterator[List[PIIClassificationResult]]:
+        """Shadow scoring runs on a worker thread, so it keeps its own probability cache.
+        
+        Small chunks give the evaluator frequent points to pause or give up at.
+        """
+        return self._iter_detections(request, candidate, self.shadow_probability_cache, SHADOW_CHUNK_SIZE)
+    
     def _segment_text(self, text: str) -> List[Dict[str, Any]]:
         """Extract individual words using NER, focusing on nouns and removing verbs/articles."""
         return segment_text_with_ner(self.nlp, text)
@@ -219,7 +444,10 @@ class SimpleLearningEngine:
         return processed_weights
     
     def _find_stage1_weight(self, segment: Dict[str, Any], stage1_weights: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
-        """Find corresponding Stage 1 weight for a segment."""
+        """Find corresponding Stage 1 weight for a segment.
+        
+        Linear reference lookup; search() uses Stage1WeightIndex, which returns the same weight.
+        """
         segment_start = segment['start']
         segment_end = segment['end']
         segment_text = segment['text'].lower()
@@ -244,6 +472,173 @@ class SimpleLearningEngine:
         
         return None
     
+    def _model_pii_probabilities(self, texts: List[str], model=None) -> np.ndarray:
+        """Return the PII probability of the given (default: active) model for each text, scoring duplicates once."""
+        model = model if model is not None else self.model
+        unique_texts = list(dict.fromkeys(texts))
+        
+        probabilities = model.predict_proba(unique_texts)
+        pii_index = np.where(model.classes_ == 'pii')[0]
+        if len(pii_index) > 0:
+            pii_probabilities = probabilities[:, pii_index[0]]
+        else:
+            pii_probabilities = np.zeros(len(unique_texts))
+        
+        lookup = dict(zip(unique_texts, pii_probabilities))
+        return np.fromiter((lookup[text] for text in texts), dtype=float, count=len(texts))
+    
+    def _classify_segments_batch(self, segments: List[Dict[str, Any]], threshold: float,
+                                 stage1_matches: List[Optional[Dict[str, Any]]],
+                                 pooled: Optional[PooledModel] = None,
+                                 probability_cache: Optional[TokenProbabilityCache] = None) -> List[PIIClassificationResult]:
+        """Classify all segments at once, equivalent to calling _classify_segment_with_weights per segment.
+        
+        A pooled model, when given, is used instead of the active model.
+        """
+        if not segments:
+            return []
+        
+        count = len(segments)
+        texts = [segment['text'] for segment in segments]
+        pii_types = [segment.get('type', 'unknown') for segment in segments]
+        pos_tags = [segment.get('pos', 'UNKNOWN') for segment in segments]
+        ent_types = np.array([segment.get('ent_type', 'NONE') for segment in segments], dtype=object)
+        pattern_matched = np.fromiter(
+            (bool(segment.get('pattern_matched', False)) for segment in segments), dtype=bool, count=count
+        )
+        
+        # Stage 1 matches boost the probability by 30% of the rule-based weight
+        has_stage1 = np.fromiter((match is not None for match in stage1_matches), dtype=bool, count=count)
+        stage1_weights = np.fromiter(
+            (match['weight'] if match is not None else 0.0 for match in stage1_matches), dtype=float, count=count
+        )
+        
+        def apply_stage1_boost(probabilities: np.ndarray, indices: np.ndarray) -> np.ndarray:
+            return np.where(
+                has_stage1[indices], np.minimum(0.99, probabilities + stage1_weights[indices] * 0.3), probabilities
+            )
+        
+        # Update PII type if Stage 1 had better type identification; the model features keep the segment type
+        result_types = list(pii_types)
+        for i in np.flatnonzero(has_stage1):
+            stage1_type = stage1_matches[i]['type']
+            if stage1_type != 'unknown' and pii_types[i] == 'unknown':
+                result_types[i] = stage1_type
+        
+        # Cheap word-level filters run first, so rejected words never reach the model
+        valid = np.fromiter(
+            (self._is_valid_pii_word(texts[i], result_types[i], pos_tags[i]) for i in range(count)),
+            dtype=bool, count=count
+        )
+        
+        # Pattern and NER matches have fixed probabilities; everything else needs the model
+        is_pattern = pattern_matched & (ent_types == 'PATTERN')
+        is_entity = pattern_matched & (ent_types != 'NONE') & ~is_pattern
+        
+        final_probabilities = np.zeros(count)
+        final_probabilities[is_pattern] = 0.98
+        final_probabilities[is_entity] = 0.90
+        fixed_indices = np.flatnonzero(is_pattern | is_entity)
+        final_probabilities[fixed_indices] = apply_stage1_boost(final_probabilities[fixed_indices], fixed_indices)
+        
+        model_indices = np.flatnonzero(valid & ~(is_pattern | is_entity))
+        scored = valid & (is_pattern | is_entity)
+        if model_indices.size > 0:
+            pos_multipliers = np.fromiter(
+                (self._get_pos_multiplier(pos_tags[i], pii_types[i]) for i in model_indices),
+                dtype=float, count=model_indices.size
+            )
+            type_boosts = np.fromiter(
+                (self._get_type_boost(texts[i], pii_types[i]) for i in model_indices),
+                dtype=float, count=model_indices.size
+            )
+            base_probabilities = self._cached_word_probabilities(
+                [texts[i] for i in model_indices],
+                [pii_types[i] for i in model_indices],
+                [pos_tags[i] for i in model_indices],
+                pos_multipliers,
+                type_boosts,
+                pooled,
+                probability_cache
+            )
+            final_probabilities[model_indices] = apply_stage1_boost(base_probabilities, model_indices)
+            scored[model_indices] = True
+        
+        # Apply the confidence threshold
+        candidates = np.flatnonzero(scored & (final_probabilities >= threshold))
+        
+        results = []
+        for i in candidates:
+            segment = segments[i]
+            probability = float(final_probabilities[i])
+            sources = ["ner_word_analysis"]
+            if has_stage1[i]:
+                sources.append("stage1_weighted")
+            
+            results.append(PIIClassificationResult(
+                id=f"ner_{segment['start']}_{segment['end']}",
+                text=texts[i],
+                type=result_types[i],
+                classification=PIIClassification.PII,
+                language="universal",
+                position=Position(start=segment['start'], end=segment['end']),
+                probability=probability,
+                confidence_level=self._get_confidence_level(probability),
+                context=self._extract_context_for_word(texts[i], segment['start'], segment['end']),
+                sources=sources
+            ))
+        
+        return results
+    
+    def _cached_word_probabilities(self, texts: List[str], pii_types: List[str], pos_tags: List[str],
+                                   pos_multipliers: Optional[np.ndarray] = None,
+                                   type_boosts: Optional[np.ndarray] = None,
+                                   pooled: Optional[PooledModel] = None,
+                                   probability_cache: Optional[TokenProbabilityCache] = None) -> np.ndarray:
+        """Model-based word probabilities, served from the probability cache where possible.
+        
+        POS multipliers and type boosts are computed here unless the caller already has them.
+        """
+        cache = probability_cache if probability_cache is not None else self.probability_cache
+        model_version = pooled.key if pooled else self.model_version
+        keys = [(model_version, text, pii_type, pos_tag) for text, pii_type, pos_tag in zip(texts, pii_types, pos_tags)]
+        probabilities = np.array([cache.get(key) for key in keys], dtype=float)
+        
+        missing = np.flatnonzero(np.isnan(probabilities))
+        if missing.size == 0:
+            return probabilities
+        
+        try:
+            model_probabilities = self._model_pii_probabilities(
+                [texts[i] for i in missing], pooled.model if pooled else None
+            )
+            cacheable = True
+        except Exception as e:
+            logger.error(f"Batch prediction failed: {e}")
+            model_probabilities = np.zeros(missing.size)
+            cacheable = False
+        
+        if pos_multipliers is None:
+            pos_multipliers = np.fromiter(
+                (self._get_pos_multiplier(pos_tag, pii_type) for pii_type, pos_tag in zip(pii_types, pos_tags)),
+                dtype=float, count=len(texts)
+            )
+        if type_boosts is None:
+            type_boosts = np.fromiter(
+                (self._get_type_boost(text, pii_type) for text, pii_type in zip(texts, pii_types)),
+                dtype=float, count=len(texts)
+            )
+        probabilities[missing] = np.minimum(
+            0.99, model_probabilities * pos_multipliers[missing] + type_boosts[missing]
+        )
+        
+        # Failed predictions fall back to zero and must not be cached
+        if cacheable:
+            for i in missing:
+                cache.put(keys[i], float(probabilities[i]))
+        
+        return probabilities
+    
     async def _classify_segment_with_weights(self, segment: Dict[str, Any], threshold: float, stage1_weight: Optional[Dict[str, Any]] = None) -> Optional[PIIClassificationResult]:
         """Classify segment with Stage 1 weight influence."""
         try:
@@ -253,6 +648,16 @@ class SimpleLearningEngine:
             pos_tag = segment.get('pos', 'UNKNOWN')
             ent_type = segment.get('ent_type', 'NONE')
             
+            # Update PII type if Stage 1 had better type identification; the probability uses the segment type
+            result_type = pii_type
+            if stage1_weight and stage1_weight['type'] != 'unknown' and pii_type == 'unknown':
+                result_type = stage1_weight['type']
+            
+            # Apply additional word-level filters before any model work
+            if not self._is_valid_pii_word(text, result_type, pos_tag):
+                return None
+            
+            
             # Calculate base probability
             base_probability = self._calculate_word_pii_probability(
                 text, pii_type, pattern_matched, pos_tag, ent_type
@@ -264,17 +669,8 @@ class SimpleLearningEngine:
                 # Boost probability for items detected in Stage 1
                 weight_boost = stage1_weight['weight'] * 0.3  # 30% boost for rule-based matches
                 final_probability = min(0.99, base_probability + weight_boost)
-                
-                # Update PII type if Stage 1 had better type identification
-                if stage1_weight['type'] != 'unknown' and pii_type == 'unknown':
-                    pii_type = stage1_weight['type']
-                
                 logger.debug(f"Applied Stage 1 weight: {text} -> {base_probability:.3f} + {weight_boost:.3f} = {final_probability:.3f}")
             
-            # Apply additional word-level filters
-            if not self._is_valid_pii_word(text, pii_type, pos_tag):
-                return None
-            
             # Only return if above threshold and classified as PII
             if final_probability >= threshold:
                 sources = ["ner_word_analysis"]
@@ -284,7 +680,7 @@ class SimpleLearningEngine:
                 return PIIClassificationResult(
                     id=f"ner_{segment['start']}_{segment['end']}",
                     text=text,
-                    type=pii_type,
+                    type=result_type,
                     classification=PIIClassification.PII,
                     language="universal",
                     position=Position(start=segment['start'], end=segment['end']),
@@ -351,7 +747,13 @@ class SimpleLearningEngine:
         if pattern_matched and ent_type != 'NONE' and ent_type != 'PATTERN':
             return 0.90
         
+        cache_key = (self.model_version, text, pii_type, pos_tag)
+        cached_probability = self.probability_cache.get(cache_key)
+        if cached_probability is not None:
+            return cached_probability
+        
         # Use ML model for ambiguous cases
+        cacheable = True
         try:
             probabilities = self.model.predict_proba([text])[0]
             classes = self.model.classes_
@@ -360,6 +762,7 @@ class SimpleLearningEngine:
             base_probability = probabilities[pii_index[0]] if len(pii_index) > 0 else 0.0
         except:
             base_probability = 0.0
+            cacheable = False
         
         # Apply POS-based adjustments
         pos_multiplier = self._get_pos_multiplier(pos_tag, pii_type)
@@ -369,6 +772,9 @@ class SimpleLearningEngine:
         type_boost = self._get_type_boost(text, pii_type)
         final_probability = min(0.99, adjusted_probability + type_boost)
         
+        if cacheable:
+            self.probability_cache.put(cache_key, float(final_probability))
+        
         return final_probability
     
     def _get_pos_multiplier(self, pos_tag: str, pii_type: str) -> float:
@@ -483,34 +889,82 @@ class SimpleLearningEngine:
         return text
     
     async def add_training_data(self, text_segments: List[Dict[str, Any]]):
-        """Add new training data and retrain the model."""
+        """Log new training data and queue it for the next coalesced model update."""
         logger.info(f"Adding {len(text_segments)} training samples")
         
+        samples = []
         for segment in text_segments:
-            self.training_data.append((segment['text'], segment['classification']))
+            if segment['classification'] in PII_CLASSES:
+                samples.append((segment['text'], segment['classification']))
+            else:
+                logger.warning(f"Skipping training sample with unknown classification: {segment['classification']}")
         
-        # Retrain if we have enough new data
-        if len(text_segments) >= 5:
-            await self._retrain_model()
+        # Samples already in the log carry nothing new for the model
+        if self._log_executor is None:
+            self._log_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="training-log")
+        loop = asyncio.get_event_loop()
+        new_samples = await loop.run_in_executor(self._log_executor, self.training_log.append, samples)
+        if len(new_samples) < len(samples):
+            logger.info(f"Skipped {len(samples) - len(new_samples)} samples already in the training log")
+        logger.info(f"Queued {len(new_samples)} new training samples")
+        self.retrain_scheduler.submit(new_samples)
     
-    async def _retrain_model(self):
-        """Retrain the model with accumulated training data."""
-        if not self.training_data:
-            return
+    async def _update_model(self, samples: List[Tuple[str, str]]):
+        """Update the model with one batch of samples in time proportional to the batch."""
+        async with self._model_lock:
+            try:
+                model = self._get_trainable_model()
+                if not isinstance(model, OnlineClassifier):
+                    # Models trained before online learning are rebuilt; the log already holds this batch
+                    await self._rebuild_model()
+                    return
+                
+                # Train a copy off the event loop; requests keep using the current model until the swap
+                if model is self.model:
+                    model = copy.deepcopy(model)
+                loop = asyncio.get_event_loop()
+                accuracy, latency_ms = await loop.run_in_executor(None, self._fit_batch, model, samples)
+                
+                model.version = self.model_version + 1
+                self._activate_model(model)
+                self._record_version_metrics(
+                    model, "incremental", len(samples), accuracy, "prequential",
+                    len(samples) if accuracy is not None else 0, latency_ms
+                )
+                await self._save_model()
+                
+                logger.info(f"Model updated to version {model.version} with {len(samples)} samples in {latency_ms:.1f} ms")
+                
+            except Exception as e:
+                logger.error(f"Incremental model update failed: {e}")
+    
+    @staticmethod
+    def _fit_batch(model: OnlineClassifier, samples: List[Tuple[str, str]]) -> Tuple[Optional[float], float]:
+        """Apply one batch to the model, returning its prequential accuracy and the update latency in ms."""
+        texts = [item[0] for item in samples]
+        labels = [item[1] for item in samples]
         
-        logger.info(f"Retraining model with {len(self.training_data)} samples")
+        # Prequential accuracy: score the batch before learning from it
+        accuracy = model.score(texts, labels) if model.is_fitted else None
+        
+        start = time.perf_counter()
+        model.partial_fit(texts, labels)
+        return accuracy, (time.perf_counter() - start) * 1000
+    
+    async def _retrain_model(self):
+        """Rebuild the model from the bootstrap data and the full training log."""
+        async with self._model_lock:
+            await self._rebuild_model()
+    
+    async def _rebuild_model(self):
+        """Rebuild and activate the model; the caller holds the model lock."""
+        logger.info(f"Rebuilding model from {len(self.training_log)} logged samples")
         
         try:
-            texts = [item[0] for item in self.training_data]
-            labels = [item[1] for item in self.training_data]
-            
-            # Retrain the model
-            self.model.fit(texts, labels)
+            loop = asyncio.get_event_loop()
+            self._activate_rebuilt_model(*await loop.run_in_executor(None, self._rebuild_online_model))
             await self._save_model()
             
-            # Clear training data after successful retraining
-            self.training_data = []
-            
             logger.info("Model retraining completed successfully")
             
         except Exception as e:
@@ -548,9 +1002,8 @@ class SimpleLearningEngine:
                 if i % 25 == 0:
                     logger.info(f"Simple model training progress: {i}%")
             
-            # Perform actual retraining if we have data
-            if self.training_data:
-                await self._retrain_model()
+            # Rebuild from the full training log, never alongside a scheduled update
+            await self.retrain_scheduler.run_exclusive(self._retrain_model)
             
             self.training_status = {
                 "is_training": False,
@@ -574,15 +1027,52 @@ class SimpleLearningEngine:
     
     async def get_training_status(self) -> Dict[str, Any]:
         """Get current training status."""
-        return self.training_status
+        return {
+            **self.training_status,
+            "online_learning": {
+                "model_version": self.model_version,
+                "samples_logged": len(self.training_log),
+                "versions": self.version_metrics[-10:]
+            },
+            "scheduler": self.retrain_scheduler.get_status()
+        }
+    
+    async def _get_pooled_model(self, model_version: str) -> PooledModel:
+        """Return a stored model version from the model manager's pool."""
+        if self.model_manager is None:
+            raise ValueError("Model version overrides require a model manager")
+        
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, self.model_manager.load_model, model_version)
     
-    async def reload_model(self):
-        """Reload the model from the active model path."""
+    async def reload_model(self, activate: Optional[Callable[[], None]] = None):
+        """Reload the model from the active model path, or from the model pool if it is loaded there.
+        
+        activate, when given, first switches the active model files (a deploy or rollback).
+        Both run under the model lock, so a model update in flight finishes before the
+        switch instead of replacing the model it brings in.
+        """
+        async with self._model_lock:
+            if activate is not None:
+                activate()
+            await self._reload_active_model()
+    
+    async def _reload_active_model(self):
         try:
+            pooled = self.model_manager.model_pool.get(self.model_manager.active_model_key) if self.model_manager else None
+            if pooled is not None:
+                self._activate_model(pooled.model)
+                self.version_metrics = self._read_version_metrics()
+                logger.info("Model reloaded from the model pool")
+                return
+            
             logger.info("Reloading model from active path")
             if os.path.exists(self.model_path):
-                with open(self.model_path, 'rb') as f:
-                    self.model = pickle.load(f)
+                model = self._read_model_from_disk()
+                self._activate_model(model)
+                if self.model_manager:
+                    self.model_manager.pool_active_model(model)
+                self.version_metrics = self._read_version_metrics()
                 logger.info("Model reloaded successfully")
             else:
                 logger.warning("No active model found, creating new default model")
@@ -592,6 +1082,34 @@ class SimpleLearningEngine:
             # Fallback to default model
             await self._create_default_model()
     
+    async def start_shadow_evaluation(self, model_version: str, sample_rate: Optional[float] = None) -> Dict[str, Any]:
+        """Shadow-score a sample of live requests with a stored model version."""
+        candidate = await self._get_pooled_model(model_version)
+        self.shadow_probability_cache.clear()
+        self.shadow_evaluator.start(
+            candidate, model_version,
+            sample_rate if sample_rate is not None else config.shadow_evaluation["sample_rate"]
+        )
+        return self.shadow_evaluator.get_report()
+    
+    async def stop_shadow_evaluation(self) -> Dict[str, Any]:
+        """Stop shadow evaluation and return its final report."""
+        report = await self.shadow_evaluator.stop()
+        self.shadow_probability_cache.clear()
+        return report
+    
+    def get_shadow_report(self) -> Dict[str, Any]:
+        return self.shadow_evaluator.get_report()
+    
+    async def shutdown(self):
+        """Stop background training and shadow evaluation; queued samples remain in the training log."""
+        await self.retrain_scheduler.stop()
+        await self.shadow_evaluator.stop()
+        if self._log_executor is not None:
+            self._log_executor.shutdown(wait=True)
+            self._log_executor = None
+    
     def set_model_manager(self, model_manager):
-        """Set the model manager instance."""
-        self.model_manager = model_manager
\ No newline at end of file
+        """Set the model manager instance and read the active model from the directory it deploys to."""
+        self.model_manager = model_manager
+        self.model_path = str(model_manager.active_model_path / MODEL_FILE)
\ No newline at end of file
@@ -0,0 +1,155 @@
+"""Indexed lookup of Stage 1 weights for the Simple Learning Engine."""
+
+from bisect import bisect_left, bisect_right
+from typing import List, Dict, Any, Optional
+
+
+class Stage1WeightIndex:
+    """Answers SimpleLearningEngine._find_stage1_weight queries without scanning every weight.
+
+    The linear lookup returns the first weight (in list order) whose text equals the
+    segment text, whose position overlaps the segment, or whose text contains or is
+    contained in the segment text. The index returns the same weight by taking the
+    smallest matching list index from three structures built once per request:
+
+    - a dictionary from normalized weight text to its first index, probed with every
+      substring of the segment whose length matches a weight text length,
+    - a trigram prefilter mapping each trigram to the weights whose text contains it,
+      so only weights sharing the segment's rarest trigram are tested for containment,
+    - weights sorted by start position, bisected to the few intervals that can overlap.
+    """
+
+    _SEPARATOR = '\x00'
+    _GRAM = 3
+    # Intervals longer than this are checked linearly so one huge span cannot widen every search
+    _MAX_INDEXED_SPAN = 256
+
+    def __init__(self, stage1_weights: List[Dict[str, Any]]):
+        self.weights = stage1_weights
+        self._texts = [weight['text'].lower() for weight in stage1_weights]
+
+        # Normalized text -> first index, used for exact and contained-text matches
+        self._first_index_by_text: Dict[str, int] = {}
+        for index, text in enumerate(self._texts):
+            self._first_index_by_text.setdefault(text, index)
+        self._text_lengths = sorted({len(text) for text in self._texts})
+
+        # Trigram -> ascending weight indices, used for containing-text matches
+        self._indices_by_gram: Dict[str, List[int]] = {}
+        for index, text in enumerate(self._texts):
+            for gram in {text[i:i + self._GRAM] for i in range(len(text) - self._GRAM + 1)}:
+                self._indices_by_gram.setdefault(gram, []).append(index)
+
+        # Joined texts, used for containing-text matches of segments shorter than a trigram
+        self._joined_texts = self._SEPARATOR.join(self._texts)
+        self._text_offsets = []
+        offset = 0
+        for text in self._texts:
+            self._text_offsets.append(offset)
+            offset += len(text) + 1
+
+        # Sorted intervals, used for position overlap
+        indexed = []
+        self._unindexed_positions = []
+        for index, weight in enumerate(stage1_weights):
+            span = weight['end'] - weight['start']
+            if 0 < span <= self._MAX_INDEXED_SPAN:
+                indexed.append((weight['start'], weight['end'], index))
+            else:
+                self._unindexed_positions.append(index)
+        indexed.sort()
+        self._starts = [item[0] for item in indexed]
+        self._ends = [item[1] for item in indexed]
+        self._indices = [item[2] for item in indexed]
+        self._max_span = max((end - start for start, end, _ in indexed), default=0)
+
+    def __len__(self) -> int:
+        return len(self.weights)
+
+    def find(self, segment: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Find corresponding Stage 1 weight for a segment."""
+        if not self.weights:
+            return None
+
+        segment_text = segment['text'].lower()
+        best = len(self.weights)
+
+        best = self._first_overlapping(segment['start'], segment['end'], best)
+        best = self._first_containing(segment_text, best)
+        best = self._first_contained(segment_text, best)
+
+        return self.weights[best] if best < len(self.weights) else None
+
+    @staticmethod
+    def _positions_overlap(segment_start: int, segment_end: int, weight: Dict[str, Any]) -> bool:
+        """Position overlap test used by the linear lookup."""
+        return ((segment_start >= weight['start'] and segment_start < weight['end']) or
+                (segment_end > weight['start'] and segment_end <= weight['end']) or
+                (segment_start <= weight['start'] and segment_end >= weight['end']))
+
+    def _first_overlapping(self, segment_start: int, segment_end: int, bound: int) -> int:
+        """Smallest index below ``bound`` of a weight whose position overlaps the segment."""
+        if segment_end <= segment_start:
+            # Empty segments follow the linear rules exactly
+            for index, weight in enumerate(self.weights[:bound]):
+                if self._positions_overlap(segment_start, segment_end, weight):
+                    return index
+            return bound
+
+        # For non-empty intervals the linear test is a plain half-open overlap
+        lo = bisect_right(self._starts, segment_start - self._max_span)
+        hi = bisect_left(self._starts, segment_end)
+        for k in range(lo, hi):
+            if self._ends[k] > segment_start and self._indices[k] < bound:
+                bound = self._indices[k]
+
+        for index in self._unindexed_positions:
+            if index >= bound:
+                break
+            if self._positions_overlap(segment_start, segment_end, self.weights[index]):
+                return index
+
+        return bound
+
+    def _first_containing(self, segment_text: str, bound: int) -> int:
+        """Smallest index below ``bound`` of a weight whose text contains the segment text."""
+        if len(segment_text) >= self._GRAM:
+            # Any weight containing the segment contains each of its trigrams
+            candidates = None
+            for i in range(len(segment_text) - self._GRAM + 1):
+                postings = self._indices_by_gram.get(segment_text[i:i + self._GRAM])
+                if postings is None:
+                    return bound
+                if candidates is None or len(postings) < len(candidates):
+                    candidates = postings
+            for index in candidates:
+                if index >= bound:
+                    break
+                if segment_text in self._texts[index]:
+                    return index
+            return bound
+
+        if self._SEPARATOR in segment_text:
+            for index, text in enumerate(self._texts[:bound]):
+                if segment_text in text:
+                    return index
+            return bound
+
+        # Texts are joined in index order, so the first occurrence is the first weight
+        search_end = self._text_offsets[bound] if bound < len(self._texts) else len(self._joined_texts)
+        position = self._joined_texts.find(segment_text, 0, search_end)
+        if position < 0:
+            return bound
+        return bisect_right(self._text_offsets, position) - 1
+
+    def _first_contained(self, segment_text: str, bound: int) -> int:
+        """Smallest index below ``bound`` of a weight whose text is a substring of the segment text."""
+        lookup = self._first_index_by_text
+        for length in self._text_lengths:
+            if length > len(segment_text):
+                break
+            for start in range(len(segment_text) - length + 1):
+                index = lookup.get(segment_text[start:start + length])
+                if index is not None and index < bound:
+                    bound = index
+        return bound
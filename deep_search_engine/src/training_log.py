@@ -0,0 +1,201 @@
+"""Persistent log of labeled training samples for the Simple Learning Engine."""
+
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Iterator, List, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".jsonl"
+INDEX_SUFFIX = ".idx.npy"
+
+
+def sample_hash(text: str, label: str) -> int:
+    """64-bit content hash of a labeled sample."""
+    digest = hashlib.blake2b(f"{label}\x00{text}".encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def is_held_out(text: str, label: str, fraction: float) -> bool:
+    """Whether a sample belongs to the held-out split; the same sample always lands in the same split."""
+    return sample_hash(text, label) % 10000 < fraction * 10000
+
+
+class TrainingLog:
+    """Append-only, segment-rotated JSON Lines log of unique (text, label) samples.
+
+    Every sample received from the labeling system is appended here before the model
+    is updated, so a full rebuild can replay all of them in streamed batches. Once the
+    active segment reaches max_segment_bytes it is sealed together with a sorted array
+    of the content hashes it holds; duplicates are detected by searching those arrays
+    (memory-mapped) and an in-memory set for the active segment, so memory stays flat
+    no matter how many samples have been logged.
+    """
+
+    def __init__(self, directory: str = "models/training_log", max_segment_bytes: int = 64 * 1024 * 1024):
+        self.directory = directory
+        self.max_segment_bytes = max_segment_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._sealed_indexes: List[np.ndarray] = []
+        self._active_hashes: Set[int] = set()
+        self._active_number = 0
+        self._open_segments()
+        self._migrate_legacy_file(self.directory.rstrip(os.sep) + SEGMENT_SUFFIX)
+
+    def __len__(self) -> int:
+        return sum(len(index) for index in self._sealed_indexes) + len(self._active_hashes)
+
+    @property
+    def segment_count(self) -> int:
+        return len(self._sealed_indexes) + 1
+
+    def _segment_path(self, number: int) -> str:
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{number:06d}{SEGMENT_SUFFIX}")
+
+    def _index_path(self, number: int) -> str:
+        return self._segment_path(number)[:-len(SEGMENT_SUFFIX)] + INDEX_SUFFIX
+
+    def _segment_numbers(self) -> List[int]:
+        numbers = []
+        for name in os.listdir(self.directory):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+                try:
+                    numbers.append(int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]))
+                except ValueError:
+                    continue
+        return sorted(numbers)
+
+    def _open_segments(self):
+        """Load the sealed indexes and rebuild the hash set of the active segment."""
+        numbers = self._segment_numbers()
+        for position, number in enumerate(numbers):
+            index_path = self._index_path(number)
+            if os.path.exists(index_path):
+                self._sealed_indexes.append(np.load(index_path, mmap_mode='r'))
+            elif position < len(numbers) - 1:
+                # The process stopped between rotating and writing the index
+                self._sealed_indexes.append(self._seal(number))
+            else:
+                self._active_number = number
+                self._active_hashes = {sample_hash(text, label) for text, label in self._iter_segment(number)}
+                return
+
+        self._active_number = (numbers[-1] + 1) if numbers else 1
+
+    def _seal(self, number: int) -> np.ndarray:
+        hashes = np.unique(np.fromiter(
+            (sample_hash(text, label) for text, label in self._iter_segment(number)), dtype=np.uint64
+        ))
+        index_path = self._index_path(number)
+        temp_path = index_path + ".tmp"
+        with open(temp_path, 'wb') as f:
+            np.save(f, hashes)
+        os.replace(temp_path, index_path)
+        return np.load(index_path, mmap_mode='r')
+
+    def _rotate(self):
+        self._sealed_indexes.append(self._seal(self._active_number))
+        self._active_number += 1
+        self._active_hashes = set()
+        logger.info(f"Training log rotated to segment {self._active_number}")
+
+    def _is_logged(self, hashes: np.ndarray) -> np.ndarray:
+        logged = np.fromiter((int(value) in self._active_hashes for value in hashes), dtype=bool, count=len(hashes))
+        for index in self._sealed_indexes:
+            if len(index) == 0:
+                continue
+            positions = np.minimum(np.searchsorted(index, hashes), len(index) - 1)
+            logged |= index[positions] == hashes
+        return logged
+
+    def _migrate_legacy_file(self, legacy_path: str):
+        """Import the single-file log written by earlier versions, then set it aside."""
+        if not os.path.isfile(legacy_path):
+            return
+
+        imported = 0
+        for texts, labels in self._iter_file(legacy_path, 10000):
+            imported += len(self.append(list(zip(texts, labels))))
+        os.replace(legacy_path, legacy_path + ".migrated")
+        logger.info(f"Imported {imported} samples from legacy training log {legacy_path}")
+
+    def append(self, samples: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """Append the samples not already logged and return them."""
+        if not samples:
+            return []
+
+        hashes = np.fromiter((sample_hash(text, label) for text, label in samples), dtype=np.uint64, count=len(samples))
+        logged = self._is_logged(hashes)
+
+        new_samples, seen = [], set()
+        for (text, label), value, is_logged in zip(samples, hashes.tolist(), logged):
+            if not is_logged and value not in seen:
+                seen.add(value)
+                new_samples.append((text, label))
+        if not new_samples:
+            return []
+
+        timestamp = datetime.now().isoformat()
+        with open(self._segment_path(self._active_number), 'a', encoding='utf-8') as f:
+            for text, label in new_samples:
+                f.write(json.dumps({"text": text, "label": label, "timestamp": timestamp}, ensure_ascii=False))
+                f.write("\n")
+            f.flush()
+            os.fsync(f.fileno())
+            size = f.tell()
+
+        self._active_hashes.update(seen)
+        if size >= self.max_segment_bytes:
+            self._rotate()
+        return new_samples
+
+    def _iter_segment(self, number: int) -> Iterator[Tuple[str, str]]:
+        for texts, labels in self._iter_file(self._segment_path(number), 10000):
+            yield from zip(texts, labels)
+
+    @staticmethod
+    def _iter_file(path: str, batch_size: int) -> Iterator[Tuple[List[str], List[str]]]:
+        if not os.path.exists(path):
+            return
+
+        texts, labels = [], []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash mid-append can leave a truncated last line
+                    logger.warning(f"Skipping malformed line {line_number} of {path}")
+                    continue
+
+                texts.append(record["text"])
+                labels.append(record["label"])
+                if len(texts) >= batch_size:
+                    yield texts, labels
+                    texts, labels = [], []
+
+        if texts:
+            yield texts, labels
+
+    def iter_batches(self, batch_size: int) -> Iterator[Tuple[List[str], List[str]]]:
+        """Stream every segment as (texts, labels) batches without loading the log into memory."""
+        texts, labels = [], []
+        for number in self._segment_numbers():
+            for segment_texts, segment_labels in self._iter_file(self._segment_path(number), batch_size):
+                texts.extend(segment_texts)
+                labels.extend(segment_labels)
+                while len(texts) >= batch_size:
+                    yield texts[:batch_size], labels[:batch_size]
+                    texts, labels = texts[batch_size:], labels[batch_size:]
+
+        if texts:
+            yield texts, labels
@@ -0,0 +1,12 @@
+import pytest
+
+from src.config import config
+
+
+@pytest.fixture(autouse=True)
+def isolated_models_dir(tmp_path, monkeypatch):
+    """Point the models directory and training log at tmp_path so no test writes into the checkout."""
+    models_dir = tmp_path / "models"
+    monkeypatch.setitem(config._config["models"], "model_path", str(models_dir))
+    monkeypatch.setitem(config._config["training"]["online"], "log_dir", str(models_dir / "training_log"))
+    return models_dir
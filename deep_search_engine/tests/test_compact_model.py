@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+
+from src.compact_model import CompactLinearClassifier, compact_path_for, export_compact_model, load_compact_model
+from src.model_manager import MODEL_FILE, ModelManager
+
+TEXTS = [
+    "john.doe@example.com", "John Doe", "Jane Smith", "555-123-4567", "123 Main Street",
+    "Seoul 서울 김철수", "the weather is nice today", "please review the document",
+    "system maintenance required", "backup completed successfully",
+]
+LABELS = ["pii"] * 6 + ["non_pii"] * 4
+
+QUERIES = [
+    "John", "john doe", "Main Street", "the document", "unknown words only", "", "김철수",
+    "Jane Smith Jane Smith", "backup backup completed",
+]
+
+
+def _pipeline(**vectorizer_options):
+    model = Pipeline([
+        ('tfidf', TfidfVectorizer(max_features=1000, ngram_range=(1, 2), **vectorizer_options)),
+        ('classifier', LogisticRegression(random_state=42))
+    ])
+    model.fit(TEXTS, LABELS)
+    return model
+
+
+@pytest.mark.parametrize("options", [{}, {"sublinear_tf": True}, {"binary": True, "norm": "l1"}, {"use_idf": False}])
+def test_compact_scorer_matches_pipeline(tmp_path, options):
+    """The pure-NumPy scorer reproduces the pipeline's probabilities."""
+    model = _pipeline(**options)
+    compact = load_compact_model(export_compact_model(model, tmp_path / "model.compact"))
+
+    assert list(compact.classes_) == list(model.classes_)
+    np.testing.assert_allclose(compact.predict_proba(QUERIES), model.predict_proba(QUERIES), atol=1e-12)
+    assert list(compact.predict(QUERIES)) == list(model.predict(QUERIES))
+
+
+def test_compact_arrays_are_memory_mapped(tmp_path):
+    compact = CompactLinearClassifier(export_compact_model(_pipeline(), tmp_path / "model.compact"))
+    assert isinstance(compact.coef, np.memmap)
+    assert isinstance(compact.idf, np.memmap)
+
+
+def test_unsupported_vectorizer_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        export_compact_model(_pipeline(analyzer='char'), tmp_path / "model.compact")
+
+
+def test_versioned_models_get_compact_export(tmp_path):
+    """save_trained_model writes the compact format next to the pickle."""
+    manager = ModelManager(str(tmp_path / "models"))
+    version = manager.save_trained_model(_pipeline(), {"version": "v1", "accuracy": 0.9})
+
+    manager.deploy_model(version, replace_current=False)
+
+    compact = load_compact_model(compact_path_for(manager.active_model_path / MODEL_FILE))
+    assert compact.predict_proba(["John Doe"]).shape == (1, 2)
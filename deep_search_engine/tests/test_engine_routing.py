@@ -0,0 +1,49 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.engine import DeepSearchEngine
+from src.models import DeepSearchRequest
+
+TEXT = "Hello, my name is John Doe and my email is john@example.com"
+
+
+@pytest.fixture
+def engine():
+    engine = DeepSearchEngine()
+    engine.is_initialized = True
+    engine.use_cascaded_detection = True
+    engine.cascaded_detector.is_initialized = True
+    return engine
+
+
+@pytest.mark.asyncio
+async def test_pinned_model_version_is_served_by_the_simple_engine(engine):
+    request = DeepSearchRequest(text=TEXT, languages=["english"], model_version="v1")
+
+    with patch.object(engine.simple_engine, 'search', new_callable=AsyncMock) as simple_search, \
+         patch.object(engine, '_search_with_cascaded_detector', new_callable=AsyncMock) as cascaded_search:
+        await engine.search(request)
+
+    simple_search.assert_awaited_once_with(request)
+    cascaded_search.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_unpinned_request_uses_cascaded_detection(engine):
+    request = DeepSearchRequest(text=TEXT, languages=["english"])
+
+    with patch.object(engine.simple_engine, 'search', new_callable=AsyncMock) as simple_search, \
+         patch.object(engine, '_search_with_cascaded_detector', new_callable=AsyncMock) as cascaded_search:
+        await engine.search(request)
+
+    cascaded_search.assert_awaited_once_with(request, separate_results=False)
+    simple_search.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_separate_results_reject_a_pinned_model_version(engine):
+    request = DeepSearchRequest(text=TEXT, languages=["english"], model_version="v1")
+
+    with pytest.raises(RuntimeError, match="model_version"):
+        await engine.search_with_separate_results(request)
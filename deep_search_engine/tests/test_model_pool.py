@@ -0,0 +1,109 @@
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+
+from src.model_manager import ModelManager
+from src.model_pool import ModelPool
+from src.models import DeepSearchRequest
+from src.simple_learning_engine import SimpleLearningEngine, DEFAULT_TRAINING_DATA
+
+TEXT = "Contact John Doe at the Acme office in Springfield about the quarterly report for Jane Smith."
+
+
+def _model(training_data):
+    model = Pipeline([
+        ('tfidf', TfidfVectorizer(max_features=1000, ngram_range=(1, 2))),
+        ('classifier', LogisticRegression(random_state=42))
+    ])
+    model.fit([item[0] for item in training_data], [item[1] for item in training_data])
+    return model
+
+
+@pytest.fixture
+def engine(tmp_path):
+    manager = ModelManager(str(tmp_path / "models"))
+    manager.save_trained_model(_model(DEFAULT_TRAINING_DATA), {"version": "v1"})
+    manager.save_trained_model(_model(DEFAULT_TRAINING_DATA + [("Acme office", "pii")] * 5), {"version": "v2"})
+    manager.deploy_model("v1", replace_current=False)
+
+    engine = SimpleLearningEngine()
+    engine.set_model_manager(manager)
+    engine.is_initialized = True
+    return engine
+
+
+def test_pool_evicts_least_recently_used_by_count_and_memory():
+    pool = ModelPool(max_models=3, max_bytes=100)
+    for key in "abc":
+        pool.put(key, object(), 30)
+    assert pool.get("a") is not None
+
+    pool.put("d", object(), 30)
+    assert "b" not in pool and len(pool) == 3
+
+    pool.put("e", object(), 60)
+    assert list(pool.get_stats()["models"]) == ["d", "e"]
+    assert pool.current_bytes == 90
+    assert pool.get_stats()["evictions"] == 3
+
+
+@pytest.mark.asyncio
+async def test_deploys_of_pooled_versions_skip_the_disk(engine, monkeypatch):
+    manager = engine.model_manager
+    await engine.reload_model()
+    v1_model = engine.model
+
+    def no_disk_reads():
+        raise AssertionError("pooled versions must not be read from disk")
+
+    monkeypatch.setattr(engine, "_read_model_from_disk", no_disk_reads)
+    manager.deploy_model("v2")
+    await engine.reload_model()
+    assert engine.model is manager.load_model("v2").model
+
+    manager.deploy_model("v1")
+    await engine.reload_model()
+    assert engine.model is v1_model
+
+
+@pytest.mark.asyncio
+async def test_per_request_version_override(engine):
+    await engine.reload_model()
+    active_model = engine.model
+    request = DeepSearchRequest(text=TEXT, languages=["english"], confidence_threshold=0.5)
+
+    override = await engine.search(DeepSearchRequest(**{**request.__dict__, "model_version": "v2"}))
+    default = await engine.search(request)
+
+    assert engine.model is active_model
+    assert override.model_info["model_version"] == "v2"
+    engine.model_manager.deploy_model("v2")
+    await engine.reload_model()
+    deployed = await engine.search(request)
+    assert [(item.text, item.probability) for item in override.items] == \
+        [(item.text, item.probability) for item in deployed.items]
+    assert [(item.text, item.probability) for item in override.items] != \
+        [(item.text, item.probability) for item in default.items]
+
+    with pytest.raises(ValueError):
+        await engine.search(DeepSearchRequest(**{**request.__dict__, "model_version": "v9"}))
+
+
+@pytest.mark.asyncio
+async def test_deployed_version_is_served_after_a_restart(engine, tmp_path):
+    engine.model_manager.deploy_model("v2")
+    deployed = engine.model_manager.load_model("v2").model
+    request = DeepSearchRequest(text=TEXT, languages=["english"], confidence_threshold=0.5)
+
+    # A new manager starts with an empty pool, so the model must come from the active directory
+    manager = ModelManager(str(tmp_path / "models"))
+    assert len(manager.model_pool) == 0
+    restarted = SimpleLearningEngine()
+    restarted.set_model_manager(manager)
+    await restarted.initialize()
+
+    served = await restarted.search(request)
+    expected = deployed.predict_proba([item.text for item in served.items])
+    assert served.items
+    assert [item.probability for item in served.items] == pytest.approx(list(expected[:, 1]), abs=1e-6)
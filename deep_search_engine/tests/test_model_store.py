@@ -0,0 +1,156 @@
+import json
+import os
+
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+
+from src.model_manager import MODEL_FILE, ModelManager
+from src.model_store import atomic_write
+from src.simple_learning_engine import DEFAULT_TRAINING_DATA
+
+
+def _model(c=1.0):
+    model = Pipeline([
+        ('tfidf', TfidfVectorizer(max_features=1000, ngram_range=(1, 2))),
+        ('classifier', LogisticRegression(C=c, random_state=42))
+    ])
+    model.fit([item[0] for item in DEFAULT_TRAINING_DATA], [item[1] for item in DEFAULT_TRAINING_DATA])
+    return model
+
+
+def _blob_count(manager):
+    return sum(1 for blob in manager.store.blobs_dir.glob("*/*") if not blob.name.startswith('.'))
+
+
+def test_deploy_and_rollback_swap_the_active_symlink(tmp_path):
+    manager = ModelManager(str(tmp_path / "models"))
+    first = manager.save_trained_model(_model(1.0), {"version": "v1", "accuracy": 0.8})
+    second = manager.save_trained_model(_model(0.1), {"version": "v2", "accuracy": 0.9})
+
+    manager.deploy_model(first, replace_current=False)
+    assert manager.active_model_path.is_symlink()
+    v1_bytes = (manager.active_model_path / MODEL_FILE).read_bytes()
+
+    manager.deploy_model(second)
+    assert manager.get_active_model_info()["version"] == "v2"
+    backup_id = json.loads(next(manager.store.manifests_dir.joinpath("backups").glob("*.json")).read_text())["name"]
+
+    # Deployed files are links into the store, not copies
+    active_file = manager.active_model_path / MODEL_FILE
+    digest = manager.store.read_manifest("versions", "v2")["files"][MODEL_FILE]["sha256"]
+    assert os.stat(active_file).st_ino == os.stat(manager.store.blob_path(digest)).st_ino
+
+    manager.rollback_model(backup_id)
+    assert (manager.active_model_path / MODEL_FILE).read_bytes() == v1_bytes
+    assert manager.get_active_model_info()["version"] == "v1"
+    # Only the active tree is kept
+    assert len([tree for tree in manager.store.trees_dir.iterdir() if tree.is_dir()]) == 1
+
+    versions = {model["version"]: model for model in manager.get_available_models()[1:]}
+    assert set(versions) == {"v1", "v2"} and versions["v1"]["isActive"]
+
+
+def test_unchanged_content_is_stored_once(tmp_path):
+    manager = ModelManager(str(tmp_path / "models"))
+    manager.save_trained_model(_model(), {"version": "v1"})
+    manager.deploy_model("v1", replace_current=False)
+    blobs = _blob_count(manager)
+
+    for _ in range(5):
+        manager.deploy_model("v1")
+    assert _blob_count(manager) == blobs
+
+    # Replacing an active file never changes the stored blob it was linked to
+    active_file = manager.active_model_path / MODEL_FILE
+    original = active_file.read_bytes()
+    atomic_write(active_file, b"retrained")
+    manager.rollback_model(manager.create_backup())
+    manager.deploy_model("v1")
+    assert (manager.active_model_path / MODEL_FILE).read_bytes() == original
+    assert _blob_count(manager) == blobs + 1
+
+
+def test_cleanup_removes_unreferenced_blobs(tmp_path):
+    manager = ModelManager(str(tmp_path / "models"))
+    manager.save_trained_model(_model(), {"version": "v1"})
+    manager.deploy_model("v1", replace_current=False)
+    atomic_write(manager.active_model_path / "extra.bin", b"only in the backup")
+    manager.create_backup()
+    blobs = _blob_count(manager)
+
+    manager.cleanup_old_backups(keep_count=0)
+
+    assert _blob_count(manager) == blobs - 1
+    manager.deploy_model("v1")
+    assert (manager.active_model_path / MODEL_FILE).exists()
+
+
+def test_copy_based_layout_is_migrated(tmp_path):
+    models = tmp_path / "models"
+    (models / "active").mkdir(parents=True)
+    (models / "active" / "simple_classifier.pkl").write_bytes(b"active model")
+    (models / "versions" / "v1").mkdir(parents=True)
+    (models / "versions" / "v1" / MODEL_FILE).write_bytes(b"version one")
+    (models / "versions" / "v1" / "model_info.json").write_text(json.dumps({"version": "v1", "accuracy": 0.9}))
+    (models / "backups" / "backup_1" / "model").mkdir(parents=True)
+    (models / "backups" / "backup_1" / "model" / "simple_classifier.pkl").write_bytes(b"old model")
+
+    manager = ModelManager(str(models))
+
+    assert manager.active_model_path.is_symlink()
+    assert (manager.active_model_path / "simple_classifier.pkl").read_bytes() == b"active model"
+    assert not (models / "active").is_symlink()
+    assert not (models / "versions").exists() and not (models / "backups").exists()
+    assert manager.store.read_manifest("versions", "v1")["info"]["accuracy"] == 0.9
+
+    manager.rollback_model("backup_1")
+    assert (manager.active_model_path / "simple_classifier.pkl").read_bytes() == b"old model"
+    with pytest.raises(ValueError):
+        manager.deploy_model("../v1")
+
+
+def test_shipped_seed_model_is_never_modified(tmp_path):
+    models = tmp_path / "models"
+    (models / "active").mkdir(parents=True)
+    (models / "active" / "simple_classifier.pkl").write_bytes(b"shipped model")
+
+    manager = ModelManager(str(models))
+    assert manager.active_model_path.is_relative_to(models / "runtime")
+    version = manager.save_trained_model(_model(), {"version": "v1", "accuracy": 0.9})
+    manager.deploy_model(version)
+
+    assert sorted(path.name for path in (models / "active").iterdir()) == ["simple_classifier.pkl"]
+    assert (models / "active" / "simple_classifier.pkl").read_bytes() == b"shipped model"
+    assert not (models / "active").is_symlink()
+    assert sorted(path.name for path in models.iterdir()) == ["active", "runtime"]
+
+    # Later starts keep the deployed model instead of seeding again
+    restarted = ModelManager(str(models))
+    assert (restarted.active_model_path / MODEL_FILE).read_bytes() != b"shipped model"
+
+
+def test_listing_is_served_from_the_catalog(tmp_path, monkeypatch):
+    manager = ModelManager(str(tmp_path / "models"))
+    for i in range(3):
+        manager.save_trained_model(_model(), {"version": f"v{i}", "accuracy": 0.5 + i / 10, "trained_at": "2025-01-01"})
+    manager.deploy_model("v2", replace_current=False)
+    manager.create_backup()
+    expected = manager.get_available_models()
+
+    def no_walks(*args, **kwargs):
+        raise AssertionError("listing must not walk the store")
+
+    monkeypatch.setattr(manager.store, "iter_manifests", no_walks)
+    monkeypatch.setattr(ModelManager, "_directory_size", staticmethod(no_walks))
+    listed = manager.get_available_models()
+    assert listed == expected
+    assert [model["accuracy"] for model in listed[1:]] == [0.5, 0.6, 0.7]
+    monkeypatch.undo()
+
+    # A lost catalog is rebuilt from the manifests
+    manager.catalog.path.unlink()
+    rebuilt = ModelManager(str(tmp_path / "models"))
+    assert rebuilt.catalog.entries("versions") == manager.catalog.entries("versions")
+    assert len(rebuilt.catalog.entries("backups")) == 1
@@ -0,0 +1,131 @@
+import random
+import re
+
+from src.ner_segmentation import (
+    PII_PATTERNS,
+    basic_segment_text,
+    extract_pattern_based_segments,
+    iter_basic_segments,
+    iter_segments_with_ner,
+    resolve_overlaps,
+)
+
+FRAGMENTS = [
+    "John", "Doe", "john.doe@example.com", "555-123-4567", "(555) 987-6543", "+1 555.987.6543",
+    "123-45-6789", "4532-1234-5678-9012", "4532 1234 5678 9012", "10001", "10001-1234",
+    "the", "report", "Seoul", "Zürich", "#4821", "a@b", "x@y.io", "12345678901234567890", " ",
+    "\t", "\n", "  ", ",", ".", "(", ")", "-",
+]
+
+
+def _random_text(rng, length=60):
+    return "".join(rng.choice(FRAGMENTS) + rng.choice(["", " ", " ", "\n"]) for _ in range(length))
+
+
+def _basic_reference(text):
+    """Previous implementation: split, then locate each word with text.find."""
+    segments = []
+    start_pos = 0
+    for word in text.split():
+        word_start = text.find(word, start_pos)
+        word_end = word_start + len(word)
+        if word[0].isupper() or any(c.isdigit() for c in word) or '@' in word:
+            segments.append({
+                'text': word, 'start': word_start, 'end': word_end, 'type': 'unknown',
+                'pattern_matched': False, 'pos': 'UNKNOWN', 'ent_type': 'NONE'
+            })
+        start_pos = word_end
+    return segments
+
+
+def _patterns_reference(text):
+    """Previous implementation: one re.finditer pass per pattern."""
+    segments = []
+    for pattern, pii_type in PII_PATTERNS:
+        for match in re.finditer(pattern, text, re.IGNORECASE):
+            segments.append({
+                'text': match.group().strip(), 'start': match.start(), 'end': match.end(), 'type': pii_type,
+                'pattern_matched': True, 'pos': 'PATTERN', 'ent_type': 'PATTERN'
+            })
+    return segments
+
+
+def _overlaps_reference(priority_classes):
+    """Previous implementation: check each candidate against every kept segment."""
+    segments = []
+    for candidates in priority_classes:
+        for candidate in candidates:
+            if not any(candidate['start'] < kept['end'] and candidate['end'] > kept['start'] for kept in segments):
+                segments.append(candidate)
+    segments.sort(key=lambda segment: segment['start'])
+    return segments
+
+
+def test_basic_segmentation_without_cjk_matches_previous_offsets():
+    rng = random.Random(3)
+    for _ in range(200):
+        text = _random_text(rng)
+        assert basic_segment_text(text) == _basic_reference(text)
+
+
+def test_single_scan_matches_one_pass_per_pattern():
+    rng = random.Random(5)
+    for _ in range(200):
+        text = _random_text(rng)
+        assert extract_pattern_based_segments(text) == _patterns_reference(text)
+
+
+def test_sorted_sweep_matches_pairwise_overlap_checks():
+    rng = random.Random(11)
+
+    def disjoint_class(label):
+        segments, position = [], rng.randint(0, 5)
+        for _ in range(rng.randint(0, 15)):
+            length = rng.randint(1, 8)
+            segments.append({'text': label, 'start': position, 'end': position + length})
+            position += length + rng.randint(0, 6)
+        return segments
+
+    for _ in range(300):
+        priority_classes = [disjoint_class(str(k)) for k in range(rng.randint(1, 6))]
+        assert list(resolve_overlaps(priority_classes)) == _overlaps_reference(priority_classes)
+
+
+def test_basic_segments_are_yielded_lazily():
+    segments = iter_basic_segments("Alice " * 1000000)
+    assert next(segments) == {
+        'text': 'Alice', 'start': 0, 'end': 5, 'type': 'unknown',
+        'pattern_matched': False, 'pos': 'UNKNOWN', 'ent_type': 'NONE'
+    }
+
+
+def _cjk_words(text):
+    return [(segment['text'], segment['start']) for segment in basic_segment_text(text) if segment['pos'] == 'CJK']
+
+
+def test_chinese_runs_are_split_into_words_with_offsets():
+    text = "联系人王小明的电话是13812345678，住在北京。"
+    segments = basic_segment_text(text)
+
+    assert all(text[segment['start']:segment['end']] == segment['text'] for segment in segments)
+    assert ("王小明", 3) in _cjk_words(text)
+    assert ("电话", 7) in _cjk_words(text)
+    assert ("北京", 24) in _cjk_words(text)
+    assert ("13812345678", 10) in [(segment['text'], segment['start']) for segment in segments]
+    assert max(len(segment['text']) for segment in segments if segment['pos'] == 'CJK') <= 4
+
+
+def test_japanese_runs_split_at_script_boundaries():
+    text = "田中太郎さんの住所は東京です。ジョン・スミス"
+    assert _cjk_words(text) == [("田中太郎", 0), ("住所", 7), ("東京", 10), ("ジョン", 15), ("スミス", 19)]
+
+
+def test_korean_particles_are_stripped():
+    text = "김철수는 서울에서 일합니다"
+    assert _cjk_words(text)[:2] == [("김철수", 0), ("서울", 5)]
+
+
+def test_segments_with_ner_fallback_stays_sorted_for_cjk():
+    text = "联系人王小明的电话 田中太郎さん 김철수는 John"
+    starts = [segment['start'] for segment in iter_segments_with_ner(None, text)]
+    assert starts == sorted(starts)
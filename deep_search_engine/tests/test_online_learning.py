@@ -0,0 +1,234 @@
+import asyncio
+import pickle
+import threading
+
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+
+from src.simple_learning_engine import SimpleLearningEngine, DEFAULT_TRAINING_DATA
+from src.online_learner import OnlineClassifier
+from src.training_log import is_held_out
+from src.config import config
+from src.compact_model import CompactHashedClassifier, compact_path_for, export_compact_model, load_compact_model
+from src.model_store import atomic_write
+
+QUERIES = ["John Doe", "quarterly report", "zzyzx", "", "Seoul 서울 김철수", "555-123-4567 John"]
+
+
+@pytest.fixture
+def engine():
+    engine = SimpleLearningEngine()
+    engine.is_initialized = True
+    return engine
+
+
+def _word_probabilities(engine, texts):
+    """Model probabilities through the scoring path search uses, with neutral POS and type."""
+    return engine._cached_word_probabilities(texts, ["unknown"] * len(texts), ["UNKNOWN"] * len(texts))
+
+
+def _legacy_pipeline():
+    model = Pipeline([
+        ('tfidf', TfidfVectorizer(max_features=1000, ngram_range=(1, 2))),
+        ('classifier', LogisticRegression(random_state=42))
+    ])
+    model.fit([item[0] for item in DEFAULT_TRAINING_DATA], [item[1] for item in DEFAULT_TRAINING_DATA])
+    return model
+
+
+def test_hashed_compact_export_matches_online_model(tmp_path):
+    model = OnlineClassifier(n_features=2 ** 12)
+    model.partial_fit([item[0] for item in DEFAULT_TRAINING_DATA], [item[1] for item in DEFAULT_TRAINING_DATA])
+    model.version = 3
+
+    compact = load_compact_model(export_compact_model(model, tmp_path / "model.compact"))
+
+    assert isinstance(compact, CompactHashedClassifier)
+    assert compact.version == 3
+    assert isinstance(compact.coef, np.memmap)
+    np.testing.assert_allclose(compact.predict_proba(QUERIES), model.predict_proba(QUERIES), atol=1e-12)
+
+
+@pytest.mark.asyncio
+async def test_batches_update_model_incrementally(engine):
+    """Legacy models are rebuilt once; later batches only partial_fit and bump the version."""
+    engine.model = _legacy_pipeline()
+
+    await engine.add_training_data([{'text': 'Acme Corp', 'classification': 'pii'}])
+    # Ingestion only queues the batch
+    assert isinstance(engine.model, Pipeline)
+    assert (await engine.get_training_status())['scheduler']['queue_size'] == 1
+    await engine.retrain_scheduler.flush()
+    assert isinstance(engine.model, OnlineClassifier)
+    rebuilt_version = engine.model_version
+    assert engine.version_metrics[-1]['kind'] == 'rebuild'
+
+    await engine.add_training_data([
+        {'text': 'Globex Inc', 'classification': 'pii'},
+        {'text': 'status update', 'classification': 'non_pii'},
+    ])
+    await engine.retrain_scheduler.flush()
+    metrics = engine.version_metrics[-1]
+    assert engine.model_version == rebuilt_version + 1
+    assert metrics['kind'] == 'incremental'
+    assert metrics['samples'] == 2
+    assert metrics['evaluation'] == 'prequential'
+    assert 0.0 <= metrics['accuracy'] <= 1.0
+    assert metrics['update_latency_ms'] >= 0
+    assert len(engine.training_log) == 3
+
+    status = await engine.get_training_status()
+    assert status['online_learning']['model_version'] == engine.model_version
+    assert status['online_learning']['samples_logged'] == 3
+
+    # Reloading picks up the compact export with the same version and metrics
+    probabilities = _word_probabilities(engine, QUERIES)
+    reloaded = SimpleLearningEngine()
+    await reloaded._load_model()
+    assert isinstance(reloaded.model, CompactHashedClassifier)
+    assert reloaded.model_version == engine.model_version
+    assert reloaded.version_metrics == engine.version_metrics
+    np.testing.assert_allclose(_word_probabilities(reloaded, QUERIES), probabilities)
+
+    # Further updates continue from the pickled online model
+    reloaded.training_log = engine.training_log
+    await reloaded.add_training_data([{'text': 'Initech', 'classification': 'pii'}])
+    await reloaded.retrain_scheduler.flush()
+    assert reloaded.model_version == engine.model_version + 1
+
+
+@pytest.mark.asyncio
+async def test_rebuild_replays_the_training_log(engine):
+    """A full rebuild learns from every logged batch, not only the most recent one."""
+    engine.training_log.append([(f"zorblax quantum {i}", "pii") for i in range(20)])
+    engine.training_log.append([(f"widget shipment {i}", "non_pii") for i in range(20)])
+
+    await engine._retrain_model()
+
+    probabilities = _word_probabilities(engine, ["zorblax quantum", "widget shipment"])
+    assert probabilities[0] > 0.5 > probabilities[1]
+    metrics = engine.version_metrics[-1]
+    assert metrics['samples'] + metrics['evaluated_samples'] == len(DEFAULT_TRAINING_DATA) + 40
+
+
+def test_rebuild_accuracy_is_measured_on_held_out_samples(engine):
+    """Held-out samples never train the rebuilt model; without any, no accuracy is claimed."""
+    _, metrics = engine._rebuild_online_model()
+    assert metrics['accuracy'] is None
+    assert metrics['evaluated_samples'] == 0
+
+    samples = [(f"zorblax quantum {i}", "pii") for i in range(50)] + [(f"widget shipment {i}", "non_pii") for i in range(50)]
+    engine.training_log.append(samples)
+    held_out = [sample for sample in samples if is_held_out(*sample, config.online_learning["holdout_fraction"])]
+    trained = []
+    partial_fit = OnlineClassifier.partial_fit
+
+    def recording_partial_fit(model, texts, labels):
+        trained.extend(texts)
+        return partial_fit(model, texts, labels)
+
+    OnlineClassifier.partial_fit = recording_partial_fit
+    try:
+        model, metrics = engine._rebuild_online_model()
+    finally:
+        OnlineClassifier.partial_fit = partial_fit
+
+    assert held_out
+    assert not {text for text, _ in held_out} & set(trained)
+    assert metrics['evaluation'] == 'held_out'
+    assert metrics['evaluated_samples'] == len(held_out)
+    assert metrics['samples'] == len(DEFAULT_TRAINING_DATA) + len(samples) - len(held_out)
+    assert metrics['accuracy'] == model.score(*map(list, zip(*held_out)))
+
+
+def test_rebuilt_default_model_keeps_the_pipeline_probabilities(engine):
+    """The hashed model is regularized like the TF-IDF pipeline it replaced, so scores stay close."""
+    model, _ = engine._rebuild_online_model()
+    words = ["John", "Smith", "email", "meeting", "Monday", "weather", "Jane"]
+
+    np.testing.assert_allclose(
+        model.predict_proba(words)[:, 1], _legacy_pipeline().predict_proba(words)[:, 1], atol=0.03
+    )
+
+
+@pytest.mark.asyncio
+async def test_unknown_labels_are_not_logged(engine):
+    engine.model = _legacy_pipeline()
+    await engine.add_training_data([{'text': 'John', 'classification': 'maybe'}])
+
+    assert len(engine.training_log) == 0
+    assert isinstance(engine.model, Pipeline)
+
+
+@pytest.mark.asyncio
+async def test_reload_waits_for_model_update_in_flight(engine):
+    """A deploy during an incremental update is applied after it and is not overwritten."""
+    await engine._create_default_model()
+    fit_started = threading.Event()
+    release_fit = threading.Event()
+    fit_batch = engine._fit_batch
+
+    def blocking_fit_batch(model, samples):
+        fit_started.set()
+        release_fit.wait(5)
+        return fit_batch(model, samples)
+
+    engine._fit_batch = blocking_fit_batch
+    update = asyncio.create_task(engine._update_model([("Globex Inc", "pii")]))
+    while not fit_started.is_set():
+        await asyncio.sleep(0.01)
+
+    deployed, _ = engine._rebuild_online_model()
+    deployed.version = 42
+    activated_after_version = []
+
+    def deploy():
+        activated_after_version.append(engine.model_version)
+        atomic_write(engine.model_path, pickle.dumps(deployed))
+        export_compact_model(deployed, compact_path_for(engine.model_path))
+
+    reload = asyncio.create_task(engine.reload_model(deploy))
+    await asyncio.sleep(0.05)
+    assert not reload.done()
+
+    release_fit.set()
+    await asyncio.gather(update, reload)
+
+    assert activated_after_version == [2]
+    assert engine.model_version == 42
+
+
+def test_rebuild_leaves_metrics_to_the_event_loop(engine):
+    """The rebuild itself (run on a worker thread) returns its metrics instead of recording them."""
+    model, metrics = engine._rebuild_online_model()
+
+    assert engine.version_metrics == []
+    assert metrics['kind'] == 'rebuild'
+    assert metrics['samples'] == len(DEFAULT_TRAINING_DATA)
+
+
+@pytest.mark.asyncio
+async def test_training_data_is_logged_off_the_event_loop(engine, caplog):
+    """Log writes run on the training-log thread; queued and duplicate counts are both logged."""
+    threads = []
+    append = engine.training_log.append
+
+    def recording_append(samples):
+        threads.append(threading.current_thread().name)
+        return append(samples)
+
+    engine.training_log.append = recording_append
+    batch = [{'text': 'Globex Inc', 'classification': 'pii'}, {'text': 'status update', 'classification': 'non_pii'}]
+
+    with caplog.at_level("INFO", logger="src.simple_learning_engine"):
+        await engine.add_training_data(batch)
+        await engine.add_training_data(batch + [{'text': 'Initech', 'classification': 'pii'}])
+    await engine.shutdown()
+
+    assert all(name.startswith("training-log") for name in threads)
+    assert "Queued 2 new training samples" in caplog.text
+    assert "Skipped 2 samples already in the training log" in caplog.text
+    assert "Queued 1 new training samples" in caplog.text
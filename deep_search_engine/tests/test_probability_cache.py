@@ -0,0 +1,89 @@
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+
+from src.probability_cache import TokenProbabilityCache
+from src.simple_learning_engine import SimpleLearningEngine, DEFAULT_TRAINING_DATA
+from src.models import DeepSearchRequest
+
+TEXT = "Contact John Doe at the Acme office in Springfield about the quarterly report for Jane Smith."
+
+
+@pytest.fixture
+def engine():
+    engine = SimpleLearningEngine()
+    model = Pipeline([
+        ('tfidf', TfidfVectorizer(max_features=1000, ngram_range=(1, 2))),
+        ('classifier', LogisticRegression(random_state=42))
+    ])
+    model.fit([item[0] for item in DEFAULT_TRAINING_DATA], [item[1] for item in DEFAULT_TRAINING_DATA])
+    engine._activate_model(model)
+    engine.is_initialized = True
+    return engine
+
+
+def _record_model_calls(engine):
+    calls = []
+    predict_proba = engine.model.predict_proba
+
+    def recording_predict_proba(texts):
+        calls.append(list(texts))
+        return predict_proba(texts)
+
+    engine.model.predict_proba = recording_predict_proba
+    return calls
+
+
+def test_least_recently_used_entries_are_evicted_within_memory_bound():
+    entry_size = TokenProbabilityCache._entry_size((0, "token0", "name", "PROPN"))
+    cache = TokenProbabilityCache(max_bytes=entry_size * 3)
+
+    for i in range(3):
+        cache.put((0, f"token{i}", "name", "PROPN"), i / 10)
+    assert cache.get((0, "token0", "name", "PROPN")) == 0.0
+
+    cache.put((0, "token3", "name", "PROPN"), 0.3)
+
+    assert len(cache) == 3
+    assert cache.current_bytes <= cache.max_bytes
+    assert cache.get((0, "token1", "name", "PROPN")) is None
+    assert cache.get((0, "token0", "name", "PROPN")) == 0.0
+    stats = cache.get_stats()
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 2 and stats["misses"] == 1
+    assert stats["hit_rate"] == pytest.approx(2 / 3, abs=1e-4)
+
+
+@pytest.mark.asyncio
+async def test_repeated_documents_skip_the_model(engine):
+    request = DeepSearchRequest(text=TEXT, languages=["english"], confidence_threshold=0.5)
+    first = await engine.search(request)
+
+    calls = _record_model_calls(engine)
+    second = await engine.search(request)
+
+    assert calls == []
+    assert second.items == first.items
+    assert engine.probability_cache.get_stats()["hits"] > 0
+
+
+@pytest.mark.asyncio
+async def test_cache_is_cleared_when_model_changes(engine):
+    await engine.search(DeepSearchRequest(text=TEXT, languages=["english"]))
+    assert len(engine.probability_cache) > 0
+
+    engine._activate_model(engine.model)
+
+    assert len(engine.probability_cache) == 0
+
+
+def test_failed_predictions_are_not_cached(engine):
+    def failing_predict_proba(texts):
+        raise RuntimeError("model unavailable")
+
+    engine.model.predict_proba = failing_predict_proba
+    probabilities = engine._cached_word_probabilities(["John"], ["unknown"], ["UNKNOWN"])
+
+    assert probabilities[0] == 0.0
+    assert len(engine.probability_cache) == 0
@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+from src.retrain_scheduler import RetrainScheduler
+
+
+class RecordingTrainer:
+    def __init__(self, delay: float = 0.0):
+        self.batches = []
+        self.delay = delay
+        self.running = 0
+        self.max_running = 0
+
+    async def __call__(self, samples):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(self.delay)
+        self.batches.append(list(samples))
+        self.running -= 1
+
+
+@pytest.mark.asyncio
+async def test_small_batches_are_coalesced_by_size():
+    trainer = RecordingTrainer()
+    scheduler = RetrainScheduler(trainer, batch_size=10, max_delay_seconds=60)
+
+    for i in range(25):
+        scheduler.submit([(f"text {i}", "pii")])
+    await asyncio.sleep(0.05)
+
+    # Everything queued before the worker ran goes into a single update
+    assert [len(batch) for batch in trainer.batches] == [25]
+    assert scheduler.queue_size == 0
+    await scheduler.stop()
+
+
+@pytest.mark.asyncio
+async def test_partial_batch_trains_after_max_delay():
+    trainer = RecordingTrainer()
+    scheduler = RetrainScheduler(trainer, batch_size=100, max_delay_seconds=0.1)
+
+    scheduler.submit([("a", "pii"), ("b", "non_pii")])
+    await asyncio.sleep(0.02)
+    assert trainer.batches == []
+    assert scheduler.get_status()["queue_size"] == 2
+
+    await asyncio.sleep(0.2)
+    assert trainer.batches == [[("a", "pii"), ("b", "non_pii")]]
+    assert scheduler.get_status()["seconds_since_last_retrain"] >= 0
+    await scheduler.stop()
+
+
+@pytest.mark.asyncio
+async def test_one_update_at_a_time_and_submit_never_blocks():
+    trainer = RecordingTrainer(delay=0.1)
+    scheduler = RetrainScheduler(trainer, batch_size=1, max_delay_seconds=60)
+
+    scheduler.submit([("first", "pii")])
+    await asyncio.sleep(0.01)
+    assert scheduler.is_training
+
+    # Samples arriving during training are buffered and trained together afterwards
+    loop = asyncio.get_event_loop()
+    start = loop.time()
+    for i in range(5):
+        scheduler.submit([(f"later {i}", "pii")])
+    assert loop.time() - start < 0.05
+
+    await asyncio.sleep(0.35)
+    assert [len(batch) for batch in trainer.batches] == [1, 5]
+    assert trainer.max_running == 1
+    await scheduler.stop()
+
+
+@pytest.mark.asyncio
+async def test_full_retrain_waits_for_lock_and_drops_buffer():
+    trainer = RecordingTrainer(delay=0.05)
+    scheduler = RetrainScheduler(trainer, batch_size=1, max_delay_seconds=60)
+    retrains = []
+
+    async def retrain():
+        retrains.append(trainer.running)
+
+    scheduler.submit([("first", "pii")])
+    await asyncio.sleep(0.01)
+    scheduler.submit([("queued", "pii")])
+    await scheduler.run_exclusive(retrain)
+
+    assert retrains == [0]
+    assert scheduler.queue_size == 0
+    assert trainer.batches == [[("first", "pii")]]
+    await scheduler.stop()
+
+
+@pytest.mark.asyncio
+async def test_stop_right_after_a_submit_wakes_the_worker():
+    """Stopping while a submit has just woken the waiting worker still ends it promptly."""
+    trainer = RecordingTrainer()
+    scheduler = RetrainScheduler(trainer, batch_size=10, max_delay_seconds=60)
+
+    scheduler.submit([("first", "pii")])
+    await asyncio.sleep(0.01)
+    scheduler.submit([("second", "pii")])
+    await asyncio.sleep(0)
+    worker = scheduler._worker
+
+    stop = asyncio.ensure_future(scheduler.stop())
+    await asyncio.wait({worker}, timeout=1)
+    assert worker.done()
+    await stop
+    assert trainer.batches == []
@@ -0,0 +1,152 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+
+from src.model_manager import ModelManager
+from src.model_pool import PooledModel
+from src.models import (
+    ConfidenceLevel, DeepSearchRequest, PIIClassification, PIIClassificationResult, Position
+)
+from src.shadow_evaluator import ShadowEvaluator
+from src.simple_learning_engine import SimpleLearningEngine, DEFAULT_TRAINING_DATA
+
+TEXTS = [
+    "Contact John Doe at the Acme office in Springfield about the report.",
+    "Jane Smith and Bob Lee met Acme Corp in Seoul on Monday.",
+]
+
+
+def _model(training_data):
+    model = Pipeline([
+        ('tfidf', TfidfVectorizer(max_features=1000, ngram_range=(1, 2))),
+        ('classifier', LogisticRegression(random_state=42))
+    ])
+    model.fit([item[0] for item in training_data], [item[1] for item in training_data])
+    return model
+
+
+def _item(start, end, probability):
+    return PIIClassificationResult(
+        id=f"ner_{start}_{end}", text="x", type="name", classification=PIIClassification.PII,
+        language="universal", position=Position(start=start, end=end), probability=probability,
+        confidence_level=ConfidenceLevel.HIGH, context="x", sources=[]
+    )
+
+
+@pytest.mark.asyncio
+async def test_shadow_scoring_never_blocks_and_drops_when_busy():
+    release = threading.Event()
+
+    def slow_score(request, candidate):
+        release.wait(1.0)
+        yield [_item(0, 4, 0.9), _item(10, 14, 0.8)]
+
+    evaluator = ShadowEvaluator(slow_score, max_pending=1, budget_ms=5000)
+    evaluator.start(PooledModel("key", None, 0), "v2", sample_rate=1.0)
+    request = DeepSearchRequest(text="John at Acme", languages=["english"])
+
+    start = time.perf_counter()
+    for _ in range(5):
+        evaluator.offer(request, [_item(0, 4, 0.7), _item(20, 24, 0.75)], primary_latency_ms=2.0)
+    assert time.perf_counter() - start < 0.05
+    assert evaluator.get_report()["requests_dropped"] == 4
+
+    release.set()
+    report = await evaluator.stop()
+    assert report["evaluated"] == 1
+    assert report["agreement"] == {
+        "request_agreement_rate": 0.0, "detection_agreement_rate": 0.3333,
+        "detected_by_both": 1, "primary_only": 1, "candidate_only": 1,
+    }
+    assert report["probability_drift"]["mean_delta"] == pytest.approx(0.2)
+    assert report["latency_ms"]["primary"]["p50"] == 2.0
+
+
+@pytest.mark.asyncio
+async def test_samples_over_budget_are_abandoned_between_chunks():
+    scored_chunks = []
+
+    def chunked_score(request, candidate):
+        for index in range(10):
+            time.sleep(0.01)
+            scored_chunks.append(index)
+            yield [_item(index, index + 1, 0.9)]
+
+    evaluator = ShadowEvaluator(chunked_score, budget_ms=25, pause_ratio=0.5)
+    evaluator.start(PooledModel("key", None, 0), "v2", sample_rate=1.0)
+    evaluator.offer(DeepSearchRequest(text="John at Acme", languages=["english"]), [], primary_latency_ms=1.0)
+
+    report = await evaluator.stop()
+    assert report["over_budget"] == 1 and report["evaluated"] == 0 and report["errors"] == 0
+    assert len(scored_chunks) < 10
+
+
+async def _engine_with_candidate(tmp_path):
+    manager = ModelManager(str(tmp_path / "models"))
+    manager.save_trained_model(_model(DEFAULT_TRAINING_DATA), {"version": "v1"})
+    manager.save_trained_model(_model(DEFAULT_TRAINING_DATA + [("Acme office", "pii")] * 5), {"version": "v2"})
+    manager.deploy_model("v1", replace_current=False)
+
+    engine = SimpleLearningEngine()
+    engine.set_model_manager(manager)
+    engine.is_initialized = True
+    await engine.reload_model()
+    return engine
+
+
+@pytest.mark.asyncio
+async def test_engine_reports_candidate_against_active_model(tmp_path):
+    engine = await _engine_with_candidate(tmp_path)
+
+    requests = [DeepSearchRequest(text=text, languages=["english"], confidence_threshold=0.5) for text in TEXTS]
+    baseline = [await engine.search(request) for request in requests]
+
+    await engine.start_shadow_evaluation("v2", sample_rate=1.0)
+    shadowed = [await engine.search(request) for request in requests]
+    report = await engine.stop_shadow_evaluation()
+
+    # Primary responses are unaffected by the shadow
+    assert [response.items for response in shadowed] == [response.items for response in baseline]
+    assert report["candidate_version"] == "v2" and not report["active"]
+    assert report["evaluated"] == len(TEXTS) and report["errors"] == 0
+    assert report["probability_drift"]["mean_abs_delta"] > 0
+    assert report["latency_ms"]["candidate"]["p50"] > 0
+    assert len(engine.probability_cache) > 0 and len(engine.shadow_probability_cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_shadowing_keeps_primary_latency_close_to_unshadowed(tmp_path):
+    engine = await _engine_with_candidate(tmp_path)
+    request = DeepSearchRequest(text=" ".join(TEXTS * 150), languages=["english"], confidence_threshold=0.5)
+
+    async def primary_latencies_ms():
+        latencies = []
+        for _ in range(8):
+            start = time.perf_counter()
+            await engine.search(request)
+            latencies.append((time.perf_counter() - start) * 1000)
+            # Let queued shadow evaluations start between requests, as they would under real traffic
+            await asyncio.sleep(0)
+        return sorted(latencies)[len(latencies) // 2]
+
+    await primary_latencies_ms()
+    engine.shadow_evaluator.max_pending = 8
+    engine.shadow_evaluator.budget_ms = 60000
+    # Wall-clock medians are noisy on shared machines, so one of a few rounds has to stay close
+    rounds = []
+    for _ in range(3):
+        unshadowed = await primary_latencies_ms()
+        await engine.start_shadow_evaluation("v2", sample_rate=1.0)
+        shadowed = await primary_latencies_ms()
+        report = await engine.stop_shadow_evaluation()
+        assert report["evaluated"] > 0
+        rounds.append((shadowed, unshadowed))
+        if shadowed < unshadowed * 1.5 + 5:
+            break
+
+    assert any(shadowed < unshadowed * 1.5 + 5 for shadowed, unshadowed in rounds), rounds
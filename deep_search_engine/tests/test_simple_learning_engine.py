@@ -0,0 +1,207 @@
+import os
+import pickle
+import random
+
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+
+from src.simple_learning_engine import SimpleLearningEngine
+from src.stage1_index import Stage1WeightIndex
+from src.compact_model import CompactLinearClassifier
+from src.online_learner import OnlineClassifier
+from src.models import DeepSearchRequest
+
+TRAINING_DATA = [
+    ("john.doe@example.com", "pii"),
+    ("John Doe", "pii"),
+    ("Jane Smith", "pii"),
+    ("555-123-4567", "pii"),
+    ("123 Main Street", "pii"),
+    ("the weather is nice today", "non_pii"),
+    ("please review the document", "non_pii"),
+    ("system maintenance required", "non_pii"),
+    ("backup completed successfully", "non_pii"),
+]
+
+SAMPLE_TEXT = (
+    "Contact John Doe at john.doe@example.com or 555-123-4567. "
+    "John Doe lives at 123 Main Street, Springfield. The Meeting is on Monday. "
+    "Acme Corp and Jane Smith approved it. A B 12 Zz"
+)
+
+
+@pytest.fixture
+def engine():
+    engine = SimpleLearningEngine()
+    engine.model = Pipeline([
+        ('tfidf', TfidfVectorizer(max_features=1000, ngram_range=(1, 2))),
+        ('classifier', LogisticRegression(random_state=42))
+    ])
+    engine.model.fit([item[0] for item in TRAINING_DATA], [item[1] for item in TRAINING_DATA])
+    engine._activate_model(engine.model)
+    engine.is_initialized = True
+    return engine
+
+
+def _word_probabilities(engine, texts):
+    """Model probabilities through the scoring path search uses, with neutral POS and type."""
+    return engine._cached_word_probabilities(texts, ["unknown"] * len(texts), ["UNKNOWN"] * len(texts))
+
+
+def _segments_with_variety(engine, text):
+    segments = engine._segment_text_enhanced(text)
+    # Mix in pattern and NER style segments so every scoring branch is exercised
+    segments[0] = {**segments[0], 'pattern_matched': True, 'ent_type': 'PATTERN', 'pos': 'PATTERN'}
+    segments[1] = {**segments[1], 'pattern_matched': True, 'ent_type': 'PERSON', 'pos': 'ENTITY', 'type': 'name'}
+    segments[2] = {**segments[2], 'type': 'name', 'pos': 'PROPN'}
+    return segments
+
+
+@pytest.mark.asyncio
+async def test_batch_classification_matches_per_segment(engine):
+    """Batch scoring must produce exactly what the per-segment path produces."""
+    segments = _segments_with_variety(engine, SAMPLE_TEXT)
+    weights = engine._process_stage1_weights([
+        {'text': 'Springfield,', 'type': 'location', 'position': {'start': 95, 'end': 107}, 'weight': 0.9},
+        {'text': 'jane', 'type': 'name', 'position': {'start': 0, 'end': 0}, 'weight': 0.5},
+    ])
+    matches = [engine._find_stage1_weight(segment, weights) for segment in segments]
+
+    for threshold in (0.0, 0.5, 0.7, 0.95):
+        expected = []
+        for segment, match in zip(segments, matches):
+            result = await engine._classify_segment_with_weights(segment, threshold, match)
+            if result:
+                expected.append(result)
+
+        assert engine._classify_segments_batch(segments, threshold, matches) == expected
+
+
+def test_duplicate_texts_are_scored_once(engine):
+    """Each distinct text reaches the model only once per batch."""
+    calls = []
+    predict_proba = engine.model.predict_proba
+
+    def recording_predict_proba(texts):
+        calls.append(list(texts))
+        return predict_proba(texts)
+
+    engine.model.predict_proba = recording_predict_proba
+    probabilities = _word_probabilities(engine, ["John", "Doe", "John", "John"])
+
+    assert calls == [["John", "Doe"]]
+    assert probabilities[0] == probabilities[2] == probabilities[3]
+
+
+@pytest.mark.asyncio
+async def test_search_uses_single_model_call(engine):
+    """A whole request is scored with one predict_proba call."""
+    calls = []
+    predict_proba = engine.model.predict_proba
+
+    def recording_predict_proba(texts):
+        calls.append(list(texts))
+        return predict_proba(texts)
+
+    engine.model.predict_proba = recording_predict_proba
+    response = await engine.search(DeepSearchRequest(
+        text=SAMPLE_TEXT, languages=["english"], confidence_threshold=0.5
+    ))
+
+    assert len(calls) == 1
+    assert all(item.probability >= 0.5 for item in response.items)
+
+
+def test_stage1_index_matches_linear_lookup(engine):
+    """The Stage 1 index returns exactly the weight the linear scan returns."""
+    rng = random.Random(7)
+    vocabulary = ["john", "John Doe", "doe", "acme", "Acme Corp", "corp", "555", "555-1234", "", "x"]
+
+    def random_weight():
+        start = rng.randint(0, 300)
+        end = start + rng.choice([0, 1, 3, 8, 20, 400, -2])
+        return {'text': rng.choice(vocabulary), 'type': 'name', 'position': {'start': start, 'end': end}}
+
+    for _ in range(50):
+        weights = engine._process_stage1_weights([random_weight() for _ in range(rng.randint(0, 30))])
+        index = Stage1WeightIndex(weights)
+        for _ in range(40):
+            start = rng.randint(0, 320)
+            segment = {
+                'text': rng.choice(vocabulary + ["JOHN", "Acme", "unrelated", "5"]),
+                'start': start,
+                'end': start + rng.choice([0, 1, 4, 10])
+            }
+            assert index.find(segment) is engine._find_stage1_weight(segment, weights)
+
+
+@pytest.mark.asyncio
+async def test_engine_loads_compact_export(engine):
+    """Saving exports the compact format, which later loads skip unpickling for."""
+    await engine._save_model()
+
+    reloaded = SimpleLearningEngine()
+    await reloaded._load_model()
+
+    assert isinstance(reloaded.model, CompactLinearClassifier)
+    np.testing.assert_allclose(
+        _word_probabilities(reloaded, ["John Doe", "report"]),
+        _word_probabilities(engine, ["John Doe", "report"])
+    )
+    # Training still works from the compact scorer by falling back to the pickle
+    assert hasattr(reloaded._get_trainable_model(), 'fit')
+
+
+@pytest.mark.asyncio
+async def test_standalone_engine_starts_from_the_shipped_model(engine, isolated_models_dir):
+    """Without an active model the shipped one is copied in and left unchanged."""
+    seed = isolated_models_dir / "active" / "simple_classifier.pkl"
+    seed.parent.mkdir()
+    seed.write_bytes(pickle.dumps(engine.model))
+    shipped = seed.read_bytes()
+
+    standalone = SimpleLearningEngine()
+    assert standalone.seed_model_path == str(seed)
+    await standalone.initialize()
+
+    np.testing.assert_allclose(
+        _word_probabilities(standalone, ["John Doe", "report"]),
+        _word_probabilities(engine, ["John Doe", "report"])
+    )
+    assert os.path.exists(standalone.model_path)
+    assert seed.read_bytes() == shipped
+    assert sorted(path.name for path in seed.parent.iterdir()) == ["simple_classifier.pkl"]
+
+
+def test_rejected_words_never_reach_the_online_model(engine):
+    """Word filters run before the model, and thresholds only filter the scored results."""
+    model = OnlineClassifier(n_features=2 ** 12)
+    model.partial_fit([item[0] for item in TRAINING_DATA], [item[1] for item in TRAINING_DATA])
+    engine._activate_model(model)
+
+    segments = _segments_with_variety(engine, SAMPLE_TEXT * 3)
+    matches = [None] * len(segments)
+    calls = []
+    predict_proba = model.predict_proba
+
+    def recording_predict_proba(texts):
+        calls.append(list(texts))
+        return predict_proba(texts)
+
+    model.predict_proba = recording_predict_proba
+    all_results = engine._classify_segments_batch(segments, 0.0, matches)
+    scored = [text for texts in calls for text in texts]
+
+    rejected = [segment['text'] for segment in segments
+                if not engine._is_valid_pii_word(segment['text'], segment.get('type', 'unknown'),
+                                                 segment.get('pos', 'UNKNOWN'))]
+    assert rejected
+    assert not set(rejected) & set(scored)
+
+    for threshold in (0.5, 0.8, 0.95):
+        engine.probability_cache.clear()
+        results = engine._classify_segments_batch(segments, threshold, matches)
+        assert results == [result for result in all_results if result.probability >= threshold]
@@ -0,0 +1,54 @@
+import json
+
+from src.training_log import TrainingLog
+
+
+def _samples(start, stop, label="pii"):
+    return [(f"sample text number {i}", label) for i in range(start, stop)]
+
+
+def _read_all(log, batch_size=7):
+    samples = []
+    for texts, labels in log.iter_batches(batch_size):
+        assert len(texts) <= batch_size
+        samples.extend(zip(texts, labels))
+    return samples
+
+
+def test_segments_rotate_and_stream_in_order(tmp_path):
+    log = TrainingLog(str(tmp_path / "log"), max_segment_bytes=1024)
+    for start in range(0, 100, 10):
+        log.append(_samples(start, start + 10))
+
+    assert log.segment_count > 3
+    assert len(list((tmp_path / "log").glob("*.idx.npy"))) == log.segment_count - 1
+    assert _read_all(log) == _samples(0, 100)
+    assert len(log) == 100
+
+
+def test_duplicates_are_skipped_across_segments_and_restarts(tmp_path):
+    log = TrainingLog(str(tmp_path / "log"), max_segment_bytes=1024)
+    log.append(_samples(0, 50))
+
+    written = log.append(_samples(40, 60) + _samples(55, 60) + _samples(0, 5, label="non_pii"))
+    assert written == _samples(50, 60) + _samples(0, 5, label="non_pii")
+
+    reopened = TrainingLog(str(tmp_path / "log"), max_segment_bytes=1024)
+    assert len(reopened) == 65
+    assert reopened.append(_samples(0, 60)) == []
+    assert reopened.append(_samples(60, 61)) == _samples(60, 61)
+    assert _read_all(reopened) == _samples(0, 60) + _samples(0, 5, label="non_pii") + _samples(60, 61)
+
+
+def test_legacy_single_file_log_is_migrated(tmp_path):
+    legacy = tmp_path / "log.jsonl"
+    with open(legacy, "w", encoding="utf-8") as f:
+        for text, label in _samples(0, 3) + _samples(0, 3):
+            f.write(json.dumps({"text": text, "label": label}) + "\n")
+        f.write('{"text": "trunc')
+
+    log = TrainingLog(str(tmp_path / "log"))
+
+    assert _read_all(log) == _samples(0, 3)
+    assert not legacy.exists()
+    assert (tmp_path / "log.jsonl.migrated").exists()